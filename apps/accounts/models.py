@@ -13,6 +13,20 @@ class User(AbstractUser):
         default=Role.TRAVELER,
     )
 
+    # Nombre del guía en las tarjetas del catálogo (get_full_name o username)
+    CATALOGUE_FIELDS = ("username", "first_name", "last_name")
+
+    def catalogue_fields(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.CATALOGUE_FIELDS)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Foto de los campos del catálogo tal como están en BD
+        if set(cls.CATALOGUE_FIELDS).issubset(field_names):
+            instance._saved_catalogue_fields = instance.catalogue_fields()
+        return instance
+
     def is_guide(self) -> bool:
         return self.role == self.Role.GUIDE
 
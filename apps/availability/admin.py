@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ExperienceAvailability, AvailabilityBlock
+from .models import ExperienceAvailability, AvailabilityBlock, DailyOccupancy
 
 
 class HasDailyPeopleLimitFilter(admin.SimpleListFilter):
@@ -66,3 +66,11 @@ class AvailabilityBlockAdmin(admin.ModelAdmin):
         "availability__experience__guide__username",
         "reason",
     )
+
+
+@admin.register(DailyOccupancy)
+class DailyOccupancyAdmin(admin.ModelAdmin):
+    list_display = ("experience", "date", "bookings", "people", "updated_at")
+    list_filter = ("date",)
+    search_fields = ("experience__title", "experience__guide__username")
+    readonly_fields = ("experience", "date", "bookings", "people", "updated_at")
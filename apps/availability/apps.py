@@ -4,3 +4,6 @@ class AvailabilityConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.availability"
     label = "availability"
+
+    def ready(self):
+        import apps.availability.signals  # noqa
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.availability.services import rebuild_occupancy
+
+
+class Command(BaseCommand):
+    help = "Recompute the DailyOccupancy ledger from ACCEPTED bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--experience",
+            type=int,
+            action="append",
+            dest="experience_ids",
+            help="Only rebuild this experience id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_occupancy(options["experience_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Done. Wrote {rows} occupancy rows."))
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_occupancy(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    DailyOccupancy = apps.get_model("availability", "DailyOccupancy")
+
+    rows = (
+        Booking.objects.filter(status="accepted")
+        .values("experience_id", "date")
+        .annotate(total_bookings=Count("id"), total_people=Sum("people"))
+        .order_by()
+    )
+    DailyOccupancy.objects.bulk_create(
+        [
+            DailyOccupancy(
+                experience_id=row["experience_id"],
+                date=row["date"],
+                bookings=row["total_bookings"],
+                people=row["total_people"] or 0,
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('availability', '0002_experienceavailability_daily_capacity_bookings'),
+        ('experiences', '0004_experience_image'),
+        ('bookings', '0011_alter_booking_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('people', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('experience', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_occupancy', to='experiences.experience')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily occupancy',
+                'ordering': ['date'],
+                'unique_together': {('experience', 'date')},
+            },
+        ),
+        migrations.RunPython(populate_occupancy, migrations.RunPython.noop),
+    ]
@@ -53,3 +53,29 @@ class AvailabilityBlock(models.Model):
 
     def __str__(self):
         return f"Block({self.availability.experience.title} - {self.date})"
+
+
+class DailyOccupancy(models.Model):
+    """
+    Ledger materializado de ocupación real por (experiencia, día).
+    - bookings / people: reservas ACCEPTED y personas que suman ese día
+    - Se mantiene desde las señales de Booking (ver availability/signals.py)
+    - rebuild_occupancy lo recalcula desde cero si hay deriva
+    """
+    experience = models.ForeignKey(
+        Experience,
+        on_delete=models.CASCADE,
+        related_name="daily_occupancy",
+    )
+    date = models.DateField()
+    bookings = models.PositiveIntegerField(default=0)
+    people = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("experience", "date")
+        ordering = ["date"]
+        verbose_name_plural = "Daily occupancy"
+
+    def __str__(self):
+        return f"Occupancy({self.experience_id} - {self.date}: {self.bookings}/{self.people})"
@@ -0,0 +1,126 @@
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date as date_type
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ExperienceAvailability, AvailabilityBlock
+
+
+# Bit i = weekday i permitido (weekday(): Lunes=0, Domingo=6)
+ALL_WEEKDAYS = 0b1111111
+
+RULES_CACHE_TIMEOUT = getattr(settings, "AVAILABILITY_RULES_CACHE_TIMEOUT", 300)
+
+
+@dataclass(frozen=True)
+class AvailabilityRules:
+    """
+    Reglas de ExperienceAvailability "compiladas" para evaluar fechas sin queries:
+    - weekday_mask: bitmask de días permitidos (en vez de buscar en la lista JSON)
+    - blocked_dates: fechas bloqueadas ordenadas (búsqueda binaria)
+    - version: updated_at de la availability ("" si la experiencia no tiene reglas)
+
+    Sin availability configurada todo queda permitido (MVP).
+    """
+    version: str = ""
+    is_enabled: bool = True
+    start_date: date_type | None = None
+    end_date: date_type | None = None
+    weekday_mask: int = ALL_WEEKDAYS
+    blocked_dates: tuple[date_type, ...] = ()
+    daily_capacity_people: int | None = None
+    daily_capacity_bookings: int | None = None
+
+    @property
+    def has_capacity_limits(self) -> bool:
+        return self.daily_capacity_bookings is not None or self.daily_capacity_people is not None
+
+    def allows_weekday(self, day: date_type) -> bool:
+        return bool(self.weekday_mask & (1 << day.weekday()))
+
+    def is_blocked(self, day: date_type) -> bool:
+        i = bisect_left(self.blocked_dates, day)
+        return i < len(self.blocked_dates) and self.blocked_dates[i] == day
+
+
+def weekday_mask(weekdays: list[int] | None) -> int:
+    """Lista [0..6] -> bitmask. Lista vacía = cualquier día."""
+    if not weekdays:
+        return ALL_WEEKDAYS
+    mask = 0
+    for day in weekdays:
+        mask |= 1 << int(day)
+    return mask
+
+
+def compile_rules(
+    availability: ExperienceAvailability | None,
+    blocked_dates=(),
+) -> AvailabilityRules:
+    if availability is None:
+        return AvailabilityRules()
+
+    return AvailabilityRules(
+        version=availability.updated_at.isoformat() if availability.updated_at else "",
+        is_enabled=availability.is_enabled,
+        start_date=availability.start_date,
+        end_date=availability.end_date,
+        weekday_mask=weekday_mask(availability.weekdays),
+        blocked_dates=tuple(sorted(blocked_dates)),
+        daily_capacity_people=availability.daily_capacity_people,
+        daily_capacity_bookings=availability.daily_capacity_bookings,
+    )
+
+
+def _generation_key(experience_id: int) -> str:
+    return f"availability:rules:{experience_id}:generation"
+
+
+def _cache_key(experience_id: int) -> str:
+    """
+    Clave versionada con la generación de la experiencia: una petición que
+    compiló las reglas viejas y las guarda después de invalidar escribe en una
+    clave que ya no se lee (con cache.delete volvería a dejar reglas viejas).
+    """
+    key = _generation_key(experience_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Si la cache pierde el contador no debe volver a un valor ya usado
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return f"availability:rules:{experience_id}:{generation}"
+
+
+def load_rules(experience_id: int) -> AvailabilityRules:
+    """
+    Compila las reglas desde BD (2 queries). Todos los bloqueos, también los
+    pasados: el calendario de meses anteriores los sigue mostrando, y un corte
+    por "hoy" dejaría la entrada cacheada desfasada al cambiar de día.
+    """
+    availability = ExperienceAvailability.objects.filter(experience_id=experience_id).first()
+    if availability is None:
+        return compile_rules(None)
+
+    blocked = AvailabilityBlock.objects.filter(availability=availability).values_list("date", flat=True)
+    return compile_rules(availability, blocked)
+
+
+def get_rules(experience_id: int) -> AvailabilityRules:
+    """Reglas compiladas desde la caché de Django (se compilan al fallar)."""
+    key = _cache_key(experience_id)
+    rules = cache.get(key)
+    if rules is None:
+        rules = load_rules(experience_id)
+        cache.set(key, rules, RULES_CACHE_TIMEOUT)
+    return rules
+
+
+def invalidate_rules(experience_id: int) -> None:
+    key = _generation_key(experience_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
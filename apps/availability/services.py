@@ -1,10 +1,150 @@
-from datetime import date as date_type
+import calendar
+import threading
+from contextlib import contextmanager
+from datetime import date as date_type, datetime, timedelta
 
-from django.db.models import Sum
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
 
 from apps.bookings.models import Booking
 from apps.experiences.models import Experience
-from .models import ExperienceAvailability, AvailabilityBlock
+from .models import ExperienceAvailability, AvailabilityBlock, DailyOccupancy
+from .rules import AvailabilityRules, compile_rules, get_rules
+
+
+# SQLite no soporta SELECT ... FOR UPDATE: serializamos las reservas de cupo en proceso
+_sqlite_capacity_lock = threading.Lock()
+
+
+def apply_occupancy_change(old: tuple | None, new: tuple | None) -> None:
+    """
+    Mueve la ocupación de una reserva en el ledger DailyOccupancy.
+    old / new son Booking.occupancy_key: (experience_id, date, people) o None.
+    Se llama dentro de la transacción de Booking.save()/delete().
+    """
+    if old == new:
+        return
+
+    if old is not None:
+        experience_id, day, people = old
+        DailyOccupancy.objects.filter(experience_id=experience_id, date=day).update(
+            bookings=Greatest(F("bookings") - 1, Value(0)),
+            people=Greatest(F("people") - people, Value(0)),
+            updated_at=timezone.now(),
+        )
+
+    if new is not None:
+        experience_id, day, people = new
+        row, _ = DailyOccupancy.objects.get_or_create(experience_id=experience_id, date=day)
+        DailyOccupancy.objects.filter(pk=row.pk).update(
+            bookings=F("bookings") + 1,
+            people=F("people") + people,
+            updated_at=timezone.now(),
+        )
+
+
+def rebuild_occupancy(experience_ids: list[int] | None = None) -> int:
+    """
+    Recalcula DailyOccupancy desde las reservas ACCEPTED (todas o solo las de
+    experience_ids). Devuelve el número de filas escritas.
+    """
+    ledger = DailyOccupancy.objects.all()
+    bookings = Booking.objects.filter(status=Booking.Status.ACCEPTED)
+    if experience_ids is not None:
+        ledger = ledger.filter(experience_id__in=experience_ids)
+        bookings = bookings.filter(experience_id__in=experience_ids)
+
+    rows = (
+        bookings.values("experience_id", "date")
+        .annotate(total_bookings=Count("id"), total_people=Sum("people"))
+        .order_by()
+    )
+
+    with transaction.atomic():
+        ledger.delete()
+        created = DailyOccupancy.objects.bulk_create(
+            [
+                DailyOccupancy(
+                    experience_id=row["experience_id"],
+                    date=row["date"],
+                    bookings=row["total_bookings"],
+                    people=row["total_people"] or 0,
+                )
+                for row in rows.iterator()
+            ],
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def _check_people(experience: Experience, people: int) -> tuple[bool, str]:
+    """
+    Validaciones que no dependen de la fecha (experiencia activa y tamaño del grupo).
+    """
+    if not experience.is_active:
+        return False, "Esta experiencia no está activa."
+
+    if people <= 0:
+        return False, "El número de personas no es válido."
+
+    if people > experience.max_people:
+        return False, f"Máximo permitido por reserva: {experience.max_people} personas."
+
+    return True, "OK"
+
+
+def _check_day(
+    rules: AvailabilityRules,
+    date: date_type,
+    people: int,
+    *,
+    used_bookings: int,
+    used_people: int,
+) -> tuple[bool, str]:
+    """
+    Aplica las reglas compiladas a un día concreto con la ocupación ya calculada.
+    No hace queries: lo comparten is_date_available y get_range_availability.
+    """
+    if not rules.is_enabled:
+        return False, "Esta experiencia no acepta reservas ahora mismo."
+
+    if rules.start_date and date < rules.start_date:
+        return False, "Fecha no disponible (antes del rango permitido)."
+
+    if rules.end_date and date > rules.end_date:
+        return False, "Fecha no disponible (después del rango permitido)."
+
+    if not rules.allows_weekday(date):
+        return False, "Fecha no disponible (día de la semana no permitido)."
+
+    # Bloqueo por fecha
+    if rules.is_blocked(date):
+        return False, "Fecha bloqueada por el guía."
+
+    # Cupo diario de excursiones (reservas) (solo ACCEPTED cuentan)
+    if rules.daily_capacity_bookings is not None:
+        if used_bookings + 1 > rules.daily_capacity_bookings:
+            return False, "No hay más cupo de excursiones para ese día."
+
+    # Capacidad diaria total por personas (solo ACCEPTED consume cupo real)
+    if rules.daily_capacity_people is not None:
+        if used_people + people > rules.daily_capacity_people:
+            return False, "No hay capacidad disponible para ese día."
+
+    return True, "OK"
+
+
+def _load_rules_for_day(experience: Experience, date: date_type) -> AvailabilityRules:
+    """Reglas leídas de BD (sin caché), solo con el bloqueo del propio día."""
+    availability = ExperienceAvailability.objects.filter(experience=experience).first()
+    if availability is None:
+        # MVP: si no hay reglas, permitimos reservar
+        return compile_rules(None)
+
+    is_blocked = AvailabilityBlock.objects.filter(availability=availability, date=date).exists()
+    return compile_rules(availability, [date] if is_blocked else [])
 
 
 def is_date_available(
@@ -13,6 +153,7 @@ def is_date_available(
     people: int,
     *,
     exclude_booking_id: int | None = None,
+    use_cache: bool = True,
 ) -> tuple[bool, str]:
     """
     Valida:
@@ -30,59 +171,300 @@ def is_date_available(
     IMPORTANT:
     - Solo las reservas ACCEPTED consumen capacidad real.
     - exclude_booking_id sirve para revalidar al aceptar sin contarte a ti mismo.
+    - use_cache=False lee las reglas de BD (decisiones definitivas, p.ej. aceptar);
+      por defecto se usan las reglas compiladas en caché (formularios, calendario).
     """
-    if not experience.is_active:
-        return False, "Esta experiencia no está activa."
+    ok, msg = _check_people(experience, people)
+    if not ok:
+        return ok, msg
 
-    if people <= 0:
-        return False, "El número de personas no es válido."
+    if use_cache:
+        rules = get_rules(experience.pk)
+    else:
+        rules = _load_rules_for_day(experience, date)
 
-    if people > experience.max_people:
-        return False, f"Máximo permitido por reserva: {experience.max_people} personas."
+    # Ocupación real (solo ACCEPTED) desde el ledger: una lectura por clave única
+    used_bookings, used_people = 0, 0
+    if rules.has_capacity_limits:
+        occupancy = DailyOccupancy.objects.filter(experience=experience, date=date).first()
+        if occupancy is not None:
+            used_bookings, used_people = occupancy.bookings, occupancy.people
 
-    try:
-        availability = ExperienceAvailability.objects.get(experience=experience)
-    except ExperienceAvailability.DoesNotExist:
-        # MVP: si no hay reglas, permitimos reservar
-        return True, "OK"
+        # No contarte a ti mismo si ya estabas ACCEPTED ese día
+        if exclude_booking_id is not None:
+            own_people = (
+                Booking.objects.filter(
+                    pk=exclude_booking_id,
+                    experience=experience,
+                    date=date,
+                    status=Booking.Status.ACCEPTED,
+                )
+                .values_list("people", flat=True)
+                .first()
+            )
+            if own_people is not None:
+                used_bookings = max(used_bookings - 1, 0)
+                used_people = max(used_people - own_people, 0)
 
-    if not availability.is_enabled:
-        return False, "Esta experiencia no acepta reservas ahora mismo."
+    return _check_day(
+        rules,
+        date,
+        people,
+        used_bookings=used_bookings,
+        used_people=used_people,
+    )
 
-    if availability.start_date and date < availability.start_date:
-        return False, "Fecha no disponible (antes del rango permitido)."
 
-    if availability.end_date and date > availability.end_date:
-        return False, "Fecha no disponible (después del rango permitido)."
+def get_range_availability(
+    experience: Experience,
+    start: date_type,
+    end: date_type,
+    people: int,
+) -> dict[date_type, tuple[bool, str]]:
+    """
+    Igual que is_date_available pero para todos los días de [start, end].
 
-    # weekday(): Lunes=0, Domingo=6
-    if availability.weekdays and date.weekday() not in availability.weekdays:
-        return False, "Fecha no disponible (día de la semana no permitido)."
+    Reglas compiladas desde caché + ocupación del rango (ledger DailyOccupancy) en
+    una sola query, y cada día se evalúa en memoria. Devuelve {fecha: (ok, msg)}.
+    """
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
 
-    # Bloqueo por fecha
-    if AvailabilityBlock.objects.filter(availability=availability, date=date).exists():
-        return False, "Fecha bloqueada por el guía."
+    ok, msg = _check_people(experience, people)
+    if not ok:
+        return {day: (ok, msg) for day in days}
+
+    rules = get_rules(experience.pk)
+
+    occupancy = {}
+    if rules.has_capacity_limits:
+        occupancy = {
+            row.date: row
+            for row in DailyOccupancy.objects.filter(
+                experience=experience,
+                date__range=(start, end),
+            )
+        }
+
+    result = {}
+    for day in days:
+        row = occupancy.get(day)
+        result[day] = _check_day(
+            rules,
+            day,
+            people,
+            used_bookings=row.bookings if row else 0,
+            used_people=row.people if row else 0,
+        )
+    return result
+
+
+def get_month_calendar(experience: Experience, year: int, month: int, people: int) -> dict:
+    """
+    Calendario público de un mes: por día, plazas y excursiones restantes
+    (None = sin límite) y el motivo si el día no está disponible.
+
+    Una sola query (ledger del mes) + reglas compiladas de caché. Devuelve también
+    `version` y `last_modified` (updated_at de la availability + último cambio de
+    ocupación del mes) para ETag / Last-Modified.
+    """
+    start = date_type(year, month, 1)
+    end = date_type(year, month, calendar.monthrange(year, month)[1])
+
+    rules = get_rules(experience.pk)
+    occupancy = {
+        row.date: row
+        for row in DailyOccupancy.objects.filter(
+            experience=experience,
+            date__range=(start, end),
+        )
+    }
+
+    people_ok, people_msg = _check_people(experience, people)
+
+    days = []
+    for i in range((end - start).days + 1):
+        day = start + timedelta(days=i)
+        row = occupancy.get(day)
+        used_bookings = row.bookings if row else 0
+        used_people = row.people if row else 0
+
+        if people_ok:
+            ok, msg = _check_day(
+                rules,
+                day,
+                people,
+                used_bookings=used_bookings,
+                used_people=used_people,
+            )
+        else:
+            ok, msg = people_ok, people_msg
+
+        remaining_people = None
+        if rules.daily_capacity_people is not None:
+            remaining_people = max(rules.daily_capacity_people - used_people, 0)
+
+        remaining_bookings = None
+        if rules.daily_capacity_bookings is not None:
+            remaining_bookings = max(rules.daily_capacity_bookings - used_bookings, 0)
+
+        days.append({
+            "date": day.isoformat(),
+            "available": ok,
+            "remaining_people": remaining_people,
+            "remaining_bookings": remaining_bookings,
+            "reason": None if ok else msg,
+        })
 
-    # Base queryset: solo ACCEPTED cuenta como ocupación real
-    qs = Booking.objects.filter(
-        experience=experience,
-        date=date,
-        status=Booking.Status.ACCEPTED,
+    changes = [row.updated_at for row in occupancy.values()]
+    if rules.version:
+        changes.append(datetime.fromisoformat(rules.version))
+    last_modified = max(changes) if changes else None
+
+    version = ":".join([
+        str(experience.pk),
+        str(experience.max_people),
+        start.isoformat(),
+        str(people),
+        rules.version,
+        last_modified.isoformat() if last_modified else "",
+    ])
+
+    return {
+        "days": days,
+        "version": version,
+        "last_modified": last_modified,
+    }
+
+
+def filter_available_on(queryset: QuerySet, date: date_type, people: int) -> QuerySet:
+    """
+    Filtra un queryset de Experience a las que admiten `people` personas el día `date`.
+
+    Mismas reglas que is_date_available pero resueltas en conjunto (JOIN con
+    availability + subqueries de bloqueos y del ledger DailyOccupancy), así que
+    el coste no depende del número de experiencias. Se puede combinar con
+    cualquier otro filtro u ordenación del queryset.
+    """
+    if people <= 0:
+        return queryset.none()
+
+    occupancy = DailyOccupancy.objects.filter(experience=OuterRef("pk"), date=date)
+    used_bookings = Coalesce(Subquery(occupancy.values("bookings")[:1]), Value(0))
+    used_people = Coalesce(Subquery(occupancy.values("people")[:1]), Value(0))
+
+    rules = (
+        Q(availability__is_enabled=True)
+        & (Q(availability__start_date__isnull=True) | Q(availability__start_date__lte=date))
+        & (Q(availability__end_date__isnull=True) | Q(availability__end_date__gte=date))
+        & ~Exists(
+            AvailabilityBlock.objects.filter(
+                availability__experience=OuterRef("pk"),
+                date=date,
+            )
+        )
+        & (
+            Q(availability__daily_capacity_bookings__isnull=True)
+            | Q(availability__daily_capacity_bookings__gte=used_bookings + 1)
+        )
+        & (
+            Q(availability__daily_capacity_people__isnull=True)
+            | Q(availability__daily_capacity_people__gte=used_people + people)
+        )
     )
 
-    if exclude_booking_id is not None:
-        qs = qs.exclude(id=exclude_booking_id)
+    # MVP: sin availability configurada se permite reservar
+    queryset = queryset.filter(
+        Q(is_active=True, max_people__gte=people)
+        & (Q(availability__isnull=True) | rules)
+    )
 
-    # Cupo diario de excursiones (reservas) (solo ACCEPTED cuentan)
-    if availability.daily_capacity_bookings is not None:
-        used_bookings = qs.count()
-        if used_bookings + 1 > availability.daily_capacity_bookings:
-            return False, "No hay más cupo de excursiones para ese día."
+    # weekday(): Lunes=0, Domingo=6. Lista vacía = cualquier día.
+    weekday = date.weekday()
+    if connection.features.supports_json_field_contains:
+        return queryset.filter(
+            Q(availability__isnull=True)
+            | Q(availability__weekdays=[])
+            | Q(availability__weekdays__contains=[weekday])
+        )
 
-    # Capacidad diaria total por personas (solo ACCEPTED consume cupo real)
-    if availability.daily_capacity_people is not None:
-        used_people = qs.aggregate(total=Sum("people"))["total"] or 0
-        if used_people + people > availability.daily_capacity_people:
-            return False, "No hay capacidad disponible para ese día."
+    # SQLite no soporta __contains en JSONField: una sola query extra con las
+    # reglas que restringen días y descartamos en memoria.
+    restricted = [
+        experience_id
+        for experience_id, weekdays in ExperienceAvailability.objects.filter(
+            experience__in=queryset.values("pk"),
+        )
+        .exclude(weekdays=[])
+        .values_list("experience_id", "weekdays")
+        if weekdays and weekday not in weekdays
+    ]
+    return queryset.exclude(pk__in=restricted)
+
+
+@contextmanager
+def _begin_immediate():
+    """
+    transaction.atomic() cuyo BEGIN es IMMEDIATE en SQLite: toma el lock de
+    escritura al empezar. Solo afecta a esta transacción; el resto de la app
+    sigue con BEGIN DEFERRED. Dentro de otra transacción no hay BEGIN nuevo.
+    """
+    # Conectar antes: al abrir la conexión Django relee transaction_mode de OPTIONS
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    connection.transaction_mode = "IMMEDIATE"
+    try:
+        with transaction.atomic():
+            connection.transaction_mode = previous
+            yield
+    finally:
+        connection.transaction_mode = previous
+
+
+@contextmanager
+def capacity_lock(experience_id: int, date: date_type):
+    """
+    Transacción con la fila DailyOccupancy de (experiencia, día) bloqueada.
+
+    - Backends con SELECT ... FOR UPDATE (Postgres, MySQL): bloqueo de fila, así
+      dos aceptaciones del mismo día esperan su turno y no se pisan.
+    - SQLite: no hay bloqueo de fila; un lock de proceso serializa los hilos y
+      BEGIN IMMEDIATE los procesos: la transacción toma el lock de escritura al
+      empezar, así la revalidación del cupo y el guardado no se intercalan con
+      otro proceso (con DEFERRED una de las dos aceptaciones fallaría con
+      "database is locked" en vez de esperar).
+    """
+    if connection.features.has_select_for_update:
+        with transaction.atomic():
+            DailyOccupancy.objects.select_for_update().get_or_create(
+                experience_id=experience_id,
+                date=date,
+            )
+            yield
+    else:
+        with _sqlite_capacity_lock, _begin_immediate():
+            yield
+
+
+def save_with_capacity(booking: Booking) -> tuple[bool, str]:
+    """
+    Reserva atómica de cupo: revalida disponibilidad y guarda la reserva dentro
+    de capacity_lock, de modo que dos aceptaciones concurrentes no puedan
+    sobrevender el mismo día. Devuelve (ok, msg) como is_date_available.
+    """
+    with capacity_lock(booking.experience_id, booking.date):
+        # Estado real en BD: otra pestaña puede haberla aceptado ya
+        booking.refresh_saved_keys()
+
+        ok, msg = is_date_available(
+            booking.experience,
+            booking.date,
+            booking.total_people,
+            exclude_booking_id=booking.pk,
+            use_cache=False,
+        )
+        if not ok:
+            return ok, msg
+
+        booking.save()
 
     return True, "OK"
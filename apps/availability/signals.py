@@ -0,0 +1,42 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from .models import ExperienceAvailability, AvailabilityBlock
+from .rules import invalidate_rules
+from .services import apply_occupancy_change
+
+
+# La foto previa (_saved_keys) la toma el pre_save de bookings.signals
+@receiver(post_save, sender=Booking)
+def update_occupancy_on_save(sender, instance: Booking, **kwargs):
+    new = instance.occupancy_key
+    apply_occupancy_change(instance._saved_keys["occupancy_key"], new)
+    instance._saved_keys["occupancy_key"] = new
+
+
+@receiver(post_delete, sender=Booking)
+def update_occupancy_on_delete(sender, instance: Booking, **kwargs):
+    apply_occupancy_change(instance.saved_key("occupancy_key"), None)
+
+
+@receiver(post_save, sender=ExperienceAvailability)
+@receiver(post_delete, sender=ExperienceAvailability)
+def invalidate_rules_on_availability_change(sender, instance: ExperienceAvailability, **kwargs):
+    # Tras el commit, para no volver a cachear las reglas viejas mientras tanto
+    transaction.on_commit(partial(invalidate_rules, instance.experience_id))
+
+
+@receiver(post_save, sender=AvailabilityBlock)
+@receiver(post_delete, sender=AvailabilityBlock)
+def invalidate_rules_on_block_change(sender, instance: AvailabilityBlock, **kwargs):
+    # Los bloqueos también cambian la versión (updated_at) de la availability
+    availability = ExperienceAvailability.objects.filter(pk=instance.availability_id)
+    availability.update(updated_at=timezone.now())
+    experience_id = availability.values_list("experience_id", flat=True).first()
+    if experience_id is not None:
+        transaction.on_commit(partial(invalidate_rules, experience_id))
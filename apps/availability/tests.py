@@ -1,3 +1,326 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from apps.experiences.models import Experience
+from core.testing import create_booking, create_experience, create_guide, create_traveler
+from .models import AvailabilityBlock, DailyOccupancy, ExperienceAvailability
+from .rules import _cache_key, get_rules, load_rules
+from .services import filter_available_on, get_range_availability, is_date_available, rebuild_occupancy
+
+
+class RulesCacheTests(TestCase):
+    """Reglas compiladas en cache, versionadas por generación de la experiencia."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.experience = create_experience(create_guide())
+        cls.availability = ExperienceAvailability.objects.create(experience=cls.experience, weekdays=[0, 1])
+
+    def setUp(self):
+        cache.clear()
+
+    def _save_availability(self, **fields):
+        availability = ExperienceAvailability.objects.get(pk=self.availability.pk)
+        for name, value in fields.items():
+            setattr(availability, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            availability.save()
+
+    def test_hit_costs_no_queries(self):
+        get_rules(self.experience.pk)
+        with self.assertNumQueries(0):
+            rules = get_rules(self.experience.pk)
+        self.assertEqual(rules.weekday_mask, 0b11)
+
+    def test_availability_and_block_changes_invalidate(self):
+        get_rules(self.experience.pk)
+        self._save_availability(weekdays=[4])
+        self.assertEqual(get_rules(self.experience.pk).weekday_mask, 0b10000)
+
+        blocked = timezone.localdate() + timedelta(days=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            AvailabilityBlock.objects.create(availability=self.availability, date=blocked)
+        self.assertTrue(get_rules(self.experience.pk).is_blocked(blocked))
+
+    def test_past_blocks_stay_blocked(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self._save_availability(weekdays=[])
+        with self.captureOnCommitCallbacks(execute=True):
+            AvailabilityBlock.objects.create(availability=self.availability, date=yesterday)
+
+        self.assertTrue(get_rules(self.experience.pk).is_blocked(yesterday))
+        ok, _msg = get_range_availability(self.experience, yesterday, yesterday, 1)[yesterday]
+        self.assertFalse(ok)
+
+    def test_late_write_of_old_rules_is_not_served(self):
+        # Una petición lenta compila las reglas antes del cambio y las guarda después
+        stale_key = _cache_key(self.experience.pk)
+        stale = load_rules(self.experience.pk)
+        self._save_availability(weekdays=[4])
+        cache.set(stale_key, stale)
+
+        self.assertEqual(get_rules(self.experience.pk).weekday_mask, 0b10000)
+
+    def test_lost_generation_does_not_reuse_old_keys(self):
+        stale_key = _cache_key(self.experience.pk)
+        cache.set(stale_key, load_rules(self.experience.pk))
+        cache.delete(f"availability:rules:{self.experience.pk}:generation")
+
+        self.assertNotEqual(_cache_key(self.experience.pk), stale_key)
+
+
+class DisabledDatesQueryTests(TestCase):
+    """El endpoint de fechas deshabilitadas cuesta lo mismo con 30 que con 365 días."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.experience = create_experience(create_guide())
+        availability = ExperienceAvailability.objects.create(
+            experience=cls.experience,
+            daily_capacity_bookings=1,
+        )
+        cls.start = timezone.localdate() + timedelta(days=1)
+        traveler = create_traveler()
+        # Un día lleno y un bloqueo cada dos semanas a lo largo de todo el año
+        for offset in range(0, 365, 14):
+            create_booking(
+                cls.experience, traveler, date=cls.start + timedelta(days=offset), status=Booking.Status.ACCEPTED,
+            )
+            AvailabilityBlock.objects.create(availability=availability, date=cls.start + timedelta(days=offset + 1))
+
+    def setUp(self):
+        cache.clear()
+
+    def _disabled(self, days):
+        end = self.start + timedelta(days=days - 1)
+        response = self.client.get(
+            reverse("availability:experience_disabled_dates", args=[self.experience.pk]),
+            {"start": self.start.isoformat(), "end": end.isoformat(), "people": 2},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["disabled"]
+
+    def test_query_count_does_not_depend_on_the_range(self):
+        for days in (30, 365):
+            with self.subTest(days=days):
+                cache.clear()
+                # experiencia + reglas (availability + bloqueos) + ocupación del rango
+                with self.assertNumQueries(4):
+                    disabled = self._disabled(days)
+                # Con las reglas en cache: experiencia + ocupación
+                with self.assertNumQueries(2):
+                    self.assertEqual(self._disabled(days), disabled)
+
+                expected = len(range(0, days, 14)) + len(range(1, days, 14))
+                self.assertEqual(len(disabled), expected)
+
+
+class OccupancyLedgerTests(TestCase):
+    """DailyOccupancy sigue a las reservas que entran y salen de ACCEPTED."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.experience = create_experience(create_guide())
+        cls.other = create_experience(create_guide("other"), title="Famara")
+        cls.traveler = create_traveler()
+        cls.date = timezone.localdate() + timedelta(days=10)
+
+    def _ledger(self, experience=None, date=None):
+        row = DailyOccupancy.objects.filter(experience=experience or self.experience, date=date or self.date).first()
+        return (row.bookings, row.people) if row else (0, 0)
+
+    def _set_status(self, booking, status):
+        booking.status = status
+        booking.save(update_fields=["status"])
+
+    def test_transitions(self):
+        booking = create_booking(self.experience, self.traveler, date=self.date, adults=2, children=1)
+        create_booking(self.experience, self.traveler, date=self.date, status=Booking.Status.ACCEPTED)
+        self.assertEqual(self._ledger(), (1, 1))
+
+        self._set_status(booking, Booking.Status.ACCEPTED)
+        self.assertEqual(self._ledger(), (2, 4))
+
+        # Solo ACCEPTED ocupa plaza: cualquier otro estado la libera
+        self._set_status(booking, Booking.Status.CANCEL_REQUESTED)
+        self.assertEqual(self._ledger(), (1, 1))
+        self._set_status(booking, Booking.Status.CANCELED)
+        self.assertEqual(self._ledger(), (1, 1))
+
+        self._set_status(booking, Booking.Status.ACCEPTED)
+        self.assertEqual(self._ledger(), (2, 4))
+
+        # Cambio de fecha de una aceptada: la ocupación se mueve de día
+        new_date = self.date + timedelta(days=1)
+        booking.date = new_date
+        booking.save()
+        self.assertEqual(self._ledger(), (1, 1))
+        self.assertEqual(self._ledger(date=new_date), (1, 3))
+
+        booking.delete()
+        self.assertEqual(self._ledger(date=new_date), (0, 0))
+
+    def test_rebuild(self):
+        create_booking(self.experience, self.traveler, date=self.date, adults=3, status=Booking.Status.ACCEPTED)
+        create_booking(self.other, self.traveler, date=self.date, status=Booking.Status.ACCEPTED)
+        create_booking(self.other, self.traveler, date=self.date)
+        DailyOccupancy.objects.update(bookings=7, people=9)
+
+        self.assertEqual(rebuild_occupancy([self.experience.pk]), 1)
+        self.assertEqual(self._ledger(), (1, 3))
+        self.assertEqual(self._ledger(self.other), (7, 9))
+
+        out = StringIO()
+        call_command("rebuild_occupancy", stdout=out)
+        self.assertIn("Wrote 2 occupancy rows", out.getvalue())
+        self.assertEqual(self._ledger(self.other), (1, 1))
+
+
+class AvailableOnFilterTests(TestCase):
+    """filter_available_on decide igual que is_date_available, en un número fijo de queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.date = timezone.localdate() + timedelta(days=14)
+        weekday = cls.date.weekday()
+        other_weekday = (weekday + 1) % 7
+        guide = create_guide()
+        traveler = create_traveler()
+
+        def experience(title, max_people=10, **rules):
+            created = create_experience(guide, title=title, max_people=max_people)
+            if rules:
+                ExperienceAvailability.objects.create(experience=created, **rules)
+            return created
+
+        experience("Sin reglas")
+        experience("Su día", weekdays=[weekday])
+        experience("Otro día", weekdays=[other_weekday])
+        experience("Desactivada", is_enabled=False)
+        experience("Fuera de temporada", end_date=cls.date - timedelta(days=1))
+        blocked = experience("Bloqueada", is_enabled=True)
+        AvailabilityBlock.objects.create(availability=blocked.availability, date=cls.date)
+        experience("Grupo pequeño", max_people=2)
+
+        full = experience("Sin excursiones libres", daily_capacity_bookings=1)
+        seats = experience("Cuatro plazas", daily_capacity_people=4)
+        for booked in (full, seats):
+            create_booking(booked, traveler, date=cls.date, adults=2, status=Booking.Status.ACCEPTED)
+
+    def setUp(self):
+        cache.clear()
+
+    def _titles(self, people, queryset=None):
+        available = filter_available_on(queryset or Experience.objects.all(), self.date, people)
+        return sorted(available.values_list("title", flat=True))
+
+    def test_rules_weekday_and_capacity(self):
+        self.assertEqual(self._titles(2), ["Cuatro plazas", "Grupo pequeño", "Sin reglas", "Su día"])
+        self.assertEqual(self._titles(3), ["Sin reglas", "Su día"])
+        self.assertEqual(self._titles(0), [])
+
+    def test_matches_is_date_available(self):
+        for people in (1, 2, 3):
+            with self.subTest(people=people):
+                expected = sorted(
+                    experience.title
+                    for experience in Experience.objects.all()
+                    if is_date_available(experience, self.date, people)[0]
+                )
+                self.assertEqual(self._titles(people), expected)
+
+    def test_composes_with_other_filters(self):
+        cheap = Experience.objects.filter(title__startswith="S")
+        self.assertEqual(self._titles(2, cheap), ["Sin reglas", "Su día"])
+
+    def test_query_count_does_not_grow_with_experiences(self):
+        # Una query, y en SQLite antes la de reglas con días restringidos
+        queries = 1 if connection.features.supports_json_field_contains else 2
+        with self.assertNumQueries(queries):
+            self.assertEqual(len(self._titles(2)), 4)
+
+        for i in range(5):
+            create_experience(Experience.objects.first().guide, title=f"Extra {i}")
+        with self.assertNumQueries(queries):
+            self.assertEqual(len(self._titles(2)), 9)
+
+
+    def test_list_view_query_count_is_bounded(self):
+        params = {"date": self.date.isoformat(), "people": 2, "sort": "price_asc"}
+        # tarjetas + categorías + facetas (sin cache con fecha), y en SQLite las
+        # reglas con días restringidos (una vez para las tarjetas y otra para las facetas)
+        queries = 3 if connection.features.supports_json_field_contains else 5
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse("experiences:list"), params)
+        self.assertEqual(len(response.context["experiences"]), 4)
+
+        for i in range(5):
+            create_experience(Experience.objects.first().guide, title=f"Extra {i}")
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse("experiences:list"), params)
+        self.assertEqual(len(response.context["experiences"]), 9)
+
+class CalendarConditionalTests(TestCase):
+    """El calendario mensual revalida con ETag y solo cambia si cambian reglas u ocupación."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.experience = create_experience(create_guide())
+        cls.availability = ExperienceAvailability.objects.create(
+            experience=cls.experience,
+            daily_capacity_people=6,
+        )
+        cls.date = timezone.localdate() + timedelta(days=40)
+        cls.url = reverse("availability:experience_calendar", args=[cls.experience.pk])
+        cls.month = cls.date.strftime("%Y-%m")
+
+    def setUp(self):
+        cache.clear()
+
+    def _get(self, etag=None, **params):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(self.url, {"month": self.month, "people": 2, **params}, **headers)
+
+    def _day(self, response):
+        return next(day for day in response.json()["days"] if day["date"] == self.date.isoformat())
+
+    def test_revalidation_returns_304(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age", response["Cache-Control"])
+        self.assertEqual(self._day(response)["remaining_people"], 6)
+
+        revalidated = self._get(etag=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated["ETag"], response["ETag"])
+        self.assertEqual(revalidated.content, b"")
+
+    def test_etag_changes_with_occupancy_rules_and_people(self):
+        etag = self._get()["ETag"]
+        self.assertNotEqual(self._get(people=3)["ETag"], etag)
+
+        create_booking(self.experience, create_traveler(), date=self.date, adults=2, status=Booking.Status.ACCEPTED)
+        response = self._get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._day(response)["remaining_people"], 4)
+
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            AvailabilityBlock.objects.create(availability=self.availability, date=self.date)
+        response = self._get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self._day(response)["available"])
 
-# Create your tests here.
+    def test_invalid_month_is_400(self):
+        for month in ("abc", "2026-13", "2026"):
+            with self.subTest(month=month):
+                self.assertEqual(self._get(month=month).status_code, 400)
+        self.assertEqual(self._get(people="x").status_code, 400)
@@ -8,5 +8,6 @@ urlpatterns = [
     path("manage/<int:experience_id>/block/", views.add_block, name="add_block"),
     path("block/<int:block_id>/delete/", views.delete_block, name="delete_block"),
     path("experience/<int:experience_id>/disabled-dates/", views.experience_disabled_dates, name="experience_disabled_dates"),
+    path("experience/<int:experience_id>/calendar/", views.experience_calendar, name="experience_calendar"),
 
 ]
@@ -5,10 +5,19 @@ from core.decorators import guide_required
 from apps.experiences.models import Experience
 from .forms import ExperienceAvailabilityForm, AvailabilityBlockForm
 from .models import ExperienceAvailability, AvailabilityBlock
+import hashlib
+
+from django.conf import settings
 from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.views.decorators.http import require_GET
 from django.utils.dateparse import parse_date  
-from apps.availability.services import is_date_available
+from apps.availability.services import get_month_calendar, get_range_availability
+
+
+CALENDAR_MAX_AGE = getattr(settings, "AVAILABILITY_CALENDAR_MAX_AGE", 60)
 
 
 @guide_required
@@ -87,12 +96,43 @@ def experience_disabled_dates(request, experience_id):
     if not start or not end or start > end:
         return JsonResponse({"error": "Invalid range"}, status=400)
 
-    disabled = []
-    cursor = start
-    while cursor <= end:
-        ok, _msg = is_date_available(experience, cursor, people)
-        if not ok:
-            disabled.append(cursor.isoformat())
-        cursor = cursor.fromordinal(cursor.toordinal() + 1)
+    # Todo el rango en un número fijo de queries (no una validación por día)
+    days = get_range_availability(experience, start, end, people)
+    disabled = [day.isoformat() for day, (ok, _msg) in days.items() if not ok]
 
     return JsonResponse({"disabled": disabled})
+
+
+@require_GET
+def experience_calendar(request, experience_id):
+    """
+    Calendario mensual en JSON (?month=YYYY-MM&people=N) con ETag fuerte y
+    Last-Modified: el date picker revalida y recibe 304 si nada cambió.
+    """
+    experience = get_object_or_404(Experience, pk=experience_id, is_active=True)
+
+    try:
+        month_param = request.GET.get("month") or timezone.localdate().strftime("%Y-%m")
+        year, month = (int(part) for part in month_param.split("-"))
+        people = int(request.GET.get("people", "1"))
+        data = get_month_calendar(experience, year, month, people)
+    except ValueError:
+        return JsonResponse({"error": "Invalid month"}, status=400)
+
+    etag = '"%s"' % hashlib.sha256(data["version"].encode()).hexdigest()
+    last_modified = data["last_modified"]
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+    if response is None:
+        response = JsonResponse({
+            "month": f"{year:04d}-{month:02d}",
+            "people": people,
+            "days": data["days"],
+        })
+
+    response["ETag"] = etag
+    if last_modified_ts is not None:
+        response["Last-Modified"] = http_date(last_modified_ts)
+    patch_cache_control(response, public=True, max_age=CALENDAR_MAX_AGE)
+    return response
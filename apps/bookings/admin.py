@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking
+from .models import Booking, BookingDailyStat, EmailOutbox
 
 
 @admin.register(Booking)
@@ -9,3 +9,19 @@ class BookingAdmin(admin.ModelAdmin):
     search_fields = ("experience__title", "traveler__username")
     readonly_fields = ("people", "unit_price", "total_price", "created_at", "updated_at", "responded_at")
 
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("to_email", "subject", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("to_email", "subject")
+    readonly_fields = ("attempts", "last_error", "created_at", "sent_at")
+
+
+@admin.register(BookingDailyStat)
+class BookingDailyStatAdmin(admin.ModelAdmin):
+    list_display = ("day", "guide", "experience", "traveler", "status", "bookings", "revenue")
+    list_filter = ("status", "day")
+    search_fields = ("experience__title", "guide__username", "traveler__username")
+    readonly_fields = ("day", "guide", "experience", "traveler", "status", "bookings", "revenue")
@@ -4,3 +4,6 @@ class BookingsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.bookings"
     label = "bookings"
+
+    def ready(self):
+        import apps.bookings.signals  # noqa
@@ -0,0 +1,105 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from apps.experiences.models import Experience
+from .models import Booking
+
+
+# Las entradas se invalidan al cambiar las reservas; el TTL es solo una red de seguridad
+BADGES_CACHE_TIMEOUT = getattr(settings, "BOOKING_BADGES_CACHE_TIMEOUT", 600)
+
+TRAVELER = "traveler"
+GUIDE = "guide"
+
+
+def _cache_key(role: str, user_id: int) -> str:
+    return f"bookings:unseen:{role}:{user_id}"
+
+
+def _count_unseen(role: str, user_id: int) -> int:
+    if role == GUIDE:
+        return Booking.objects.filter(experience__guide_id=user_id, seen_by_guide=False).count()
+    return Booking.objects.filter(traveler_id=user_id, seen_by_traveler=False).count()
+
+
+def get_unseen_count(role: str, user_id: int) -> int:
+    """Reservas no vistas del usuario. Cache hit = 0 queries."""
+    key = _cache_key(role, user_id)
+    count = cache.get(key)
+    if count is None:
+        count = _count_unseen(role, user_id)
+        cache.set(key, count, BADGES_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_badges(*, traveler_id: int | None = None, guide_id: int | None = None) -> None:
+    keys = []
+    if traveler_id is not None:
+        keys.append(_cache_key(TRAVELER, traveler_id))
+    if guide_id is not None:
+        keys.append(_cache_key(GUIDE, guide_id))
+    cache.delete_many(keys)
+
+
+def booking_guide_id(booking: Booking) -> int | None:
+    if Booking.experience.is_cached(booking):
+        return booking.experience.guide_id
+    return (
+        Experience.objects.filter(pk=booking.experience_id)
+        .values_list("guide_id", flat=True)
+        .first()
+    )
+
+
+def invalidate_booking_badges(booking: Booking) -> None:
+    """
+    Invalida los contadores del viajero y del guía de la reserva tras el commit:
+    invalidando antes, una petición concurrente volvería a cachear el recuento
+    viejo. El guía se resuelve ya (tras un borrado en cascada la experiencia no
+    existiría).
+    """
+    guide_id = booking_guide_id(booking)
+    transaction.on_commit(partial(invalidate_badges, traveler_id=booking.traveler_id, guide_id=guide_id))
+
+
+def reconcile_badges() -> int:
+    """
+    Recalcula los contadores de todos los usuarios con dos queries agrupadas y
+    sobrescribe la cache (repara desvíos por updates masivos que saltan señales).
+    Devuelve cuántas entradas se escribieron.
+    """
+    User = get_user_model()
+
+    by_traveler = dict(
+        Booking.objects.filter(seen_by_traveler=False)
+        .values_list("traveler_id")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    by_guide = dict(
+        Booking.objects.filter(seen_by_guide=False)
+        .values_list("experience__guide_id")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+
+    written = 0
+    entries = {}
+    for user_id, role in User.objects.values_list("id", "role").iterator():
+        if role == User.Role.GUIDE:
+            entries[_cache_key(GUIDE, user_id)] = by_guide.get(user_id, 0)
+        else:
+            entries[_cache_key(TRAVELER, user_id)] = by_traveler.get(user_id, 0)
+
+        if len(entries) >= 1000:
+            cache.set_many(entries, BADGES_CACHE_TIMEOUT)
+            written += len(entries)
+            entries = {}
+
+    cache.set_many(entries, BADGES_CACHE_TIMEOUT)
+    return written + len(entries)
@@ -1,17 +1,255 @@
+from datetime import timedelta
+
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from apps.profiles.models import GuideProfile
+from .models import Booking, EmailOutbox
+
+
+OUTBOX_MAX_ATTEMPTS = getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+OUTBOX_BACKOFF_SECONDS = getattr(settings, "EMAIL_OUTBOX_BACKOFF_SECONDS", 60)
+# Timeout de cada operación SMTP y plazo durante el que un lote reclamado es del
+# worker (si muere a mitad, sus emails vuelven a la cola al vencer)
+OUTBOX_SMTP_TIMEOUT = getattr(settings, "EMAIL_OUTBOX_SMTP_TIMEOUT", 10)
+OUTBOX_CLAIM_SECONDS = getattr(settings, "EMAIL_OUTBOX_CLAIM_SECONDS", 600)
+
+
+def _from_email() -> str:
+    return getattr(settings, "DEFAULT_FROM_EMAIL", None) or "no-reply@lanzaxperience.com"
 
 
 def send_booking_status_email(*, to_email: str, subject: str, message: str) -> None:
+    """
+    Encola el email en EmailOutbox (no hay SMTP dentro de la request).
+    Lo envía run_outbox_worker.
+    """
     if not to_email:
         return
 
-    fail_silently = not getattr(settings, "DEBUG", False)
-
-    send_mail(
+    EmailOutbox.objects.create(
+        to_email=to_email,
         subject=subject,
         message=message,
-        from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None) or "no-reply@lanzaxperience.com",
-        recipient_list=[to_email],
-        fail_silently=fail_silently,
     )
+
+
+# Evento -> (destinatario, asunto, plantilla). Las plantillas se compilan una vez
+# y el loader cacheado de Django las reutiliza en cada render.
+BOOKING_EMAILS = {
+    "created": ("traveler", "Solicitud de reserva enviada - LanzaXperience", "emails/bookings/created.txt"),
+    "accepted": ("traveler", "Reserva aceptada - LanzaXperience", "emails/bookings/accepted.txt"),
+    "rejected": ("traveler", "Reserva rechazada - LanzaXperience", "emails/bookings/rejected.txt"),
+    "change_rejected": ("traveler", "Cambio de fecha rechazado - LanzaXperience", "emails/bookings/change_rejected.txt"),
+    "cancel_accepted": ("traveler", "Solicitud de cancelación aceptada - LanzaXperience", "emails/bookings/cancel_accepted.txt"),
+    "cancel_rejected": ("traveler", "Solicitud de cancelación rechazada - LanzaXperience", "emails/bookings/cancel_rejected.txt"),
+    "cancel_free": ("traveler", "Reserva cancelada - LanzaXperience", "emails/bookings/cancel_free.txt"),
+    "cancel_free_guide": ("guide", "Reserva cancelada por el viajero - LanzaXperience", "emails/bookings/cancel_free_guide.txt"),
+}
+
+# Eventos que entran en el resumen periódico del guía (reservas no vistas)
+DIGEST_EVENTS = {
+    Booking.Status.PENDING: "Nuevas reservas pendientes",
+    Booking.Status.CHANGE_REQUESTED: "Solicitudes de cambio",
+    Booking.Status.CANCEL_REQUESTED: "Solicitudes de cancelación",
+    Booking.Status.CANCELED: "Cancelaciones del viajero",
+}
+
+
+def with_email_relations(queryset):
+    """Lo que leen las plantillas de email, en la misma query."""
+    return queryset.select_related(
+        "experience",
+        "experience__guide",
+        "experience__guide__guide_profile",
+        "traveler",
+    )
+
+
+def guide_wants_digest(guide) -> bool:
+    profile = getattr(guide, "guide_profile", None)
+    return bool(profile and profile.digest_notifications)
+
+
+def render_booking_email(event: str, booking: Booking, **context) -> tuple[str, str, str]:
+    """
+    Renderiza el email de un evento de reserva. Devuelve (to_email, subject, body).
+    `booking` debe venir con select_related (ver with_email_relations) para no
+    disparar queries al renderizar.
+    """
+    recipient, subject, template_name = BOOKING_EMAILS[event]
+    to_email = booking.traveler.email if recipient == "traveler" else booking.experience.guide.email
+    body = get_template(template_name).render({"booking": booking, **context}).strip()
+    return to_email, subject, body
+
+
+def render_booking_emails(event: str, bookings, **context) -> list[tuple[str, str, str]]:
+    """Render en bloque (digests, operaciones masivas): misma plantilla compilada."""
+    return [render_booking_email(event, booking, **context) for booking in bookings]
+
+
+def queue_booking_email(event: str, booking: Booking, **context) -> None:
+    to_email, subject, message = render_booking_email(event, booking, **context)
+    send_booking_status_email(to_email=to_email, subject=subject, message=message)
+
+
+def queue_booking_emails(event: str, bookings, **context) -> int:
+    """Encola un email por reserva con un solo INSERT. Devuelve cuántos se encolaron."""
+    rows = [
+        EmailOutbox(to_email=to_email, subject=subject, message=message)
+        for to_email, subject, message in render_booking_emails(event, bookings, **context)
+        if to_email
+    ]
+    EmailOutbox.objects.bulk_create(rows)
+    return len(rows)
+
+
+def send_guide_digests() -> int:
+    """
+    Un email resumen por guía con digest activado: reservas no vistas por estado
+    desde su último resumen. Todas las reservas de todos los guías se agregan en
+    una única query agrupada. Devuelve cuántos resúmenes se encolaron.
+    """
+    now = timezone.now()
+    profile = "experience__guide__guide_profile"
+
+    rows = (
+        Booking.objects.filter(
+            **{f"{profile}__digest_notifications": True},
+            seen_by_guide=False,
+            status__in=list(DIGEST_EVENTS),
+        )
+        .filter(
+            Q(**{f"{profile}__digest_last_sent_at__isnull": True})
+            | Q(updated_at__gt=F(f"{profile}__digest_last_sent_at"))
+        )
+        .values("experience__guide", "status")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+
+    counts: dict[int, dict[str, int]] = {}
+    for row in rows:
+        counts.setdefault(row["experience__guide"], {})[row["status"]] = row["total"]
+    if not counts:
+        return 0
+
+    guides = get_user_model().objects.in_bulk(list(counts))
+    template = get_template("emails/bookings/guide_digest.txt")
+
+    outbox = []
+    for guide_id, by_status in counts.items():
+        guide = guides.get(guide_id)
+        if guide is None or not guide.email:
+            continue
+        events = [(label, by_status[status]) for status, label in DIGEST_EVENTS.items() if status in by_status]
+        outbox.append(EmailOutbox(
+            to_email=guide.email,
+            subject="Resumen de tus reservas - LanzaXperience",
+            message=template.render({"guide": guide, "events": events}).strip(),
+        ))
+
+    with transaction.atomic():
+        EmailOutbox.objects.bulk_create(outbox)
+        GuideProfile.objects.filter(user_id__in=list(counts)).update(digest_last_sent_at=now)
+
+    return len(outbox)
+
+
+def _backoff(attempts: int) -> timedelta:
+    # 1, 2, 4, 8... minutos (con la config por defecto)
+    return timedelta(seconds=OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0)))
+
+
+def _claim_batch(now, batch_size: int) -> list[EmailOutbox]:
+    """
+    Reclama un lote en una transacción corta: adelanta next_attempt_at de las
+    filas vencidas para que otro worker no las coja mientras se envían.
+    """
+    with transaction.atomic():
+        qs = EmailOutbox.objects.filter(
+            status=EmailOutbox.Status.PENDING,
+            next_attempt_at__lte=now,
+        ).order_by("next_attempt_at", "id")
+
+        # Varios workers en paralelo no se pisan (Postgres/MySQL)
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+
+        batch = list(qs[:batch_size])
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[item.pk for item in batch]).update(
+                next_attempt_at=now + timedelta(seconds=OUTBOX_CLAIM_SECONDS),
+            )
+    return batch
+
+
+def drain_outbox(*, batch_size: int = 50) -> tuple[int, int]:
+    """
+    Envía un lote de emails pendientes reutilizando una sola conexión SMTP.
+
+    - El lote se reclama en una transacción corta y se envía fuera de ella:
+      ninguna transacción (ni el lock de escritura de SQLite) queda abierta
+      mientras se espera al servidor de correo
+    - Fallo => reintento con backoff exponencial
+    - Tras OUTBOX_MAX_ATTEMPTS fallos => DEAD (dead letter, revisar en el admin)
+
+    Devuelve (enviados, fallidos).
+    """
+    now = timezone.now()
+    sent, failed = 0, 0
+
+    batch = _claim_batch(now, batch_size)
+    if not batch:
+        return 0, 0
+
+    mail_connection = get_connection(fail_silently=False, timeout=OUTBOX_SMTP_TIMEOUT)
+    try:
+        mail_connection.open()
+    except Exception as exc:
+        # Servidor caído: todo el lote se reintenta más tarde
+        mail_connection = None
+        open_error = repr(exc)
+
+    for item in batch:
+        item.attempts += 1
+        try:
+            if mail_connection is None:
+                raise ConnectionError(open_error)
+
+            mail_connection.send_messages([
+                EmailMessage(
+                    subject=item.subject,
+                    body=item.message,
+                    from_email=_from_email(),
+                    to=[item.to_email],
+                )
+            ])
+        except Exception as exc:
+            failed += 1
+            item.last_error = repr(exc)
+            if item.attempts >= OUTBOX_MAX_ATTEMPTS:
+                item.status = EmailOutbox.Status.DEAD
+            else:
+                item.next_attempt_at = now + _backoff(item.attempts)
+        else:
+            sent += 1
+            item.status = EmailOutbox.Status.SENT
+            item.sent_at = timezone.now()
+            item.last_error = ""
+
+    if mail_connection is not None:
+        mail_connection.close()
+
+    # Resultado del lote en otra escritura corta
+    EmailOutbox.objects.bulk_update(
+        batch,
+        ["status", "attempts", "last_error", "next_attempt_at", "sent_at"],
+    )
+
+    return sent, failed
@@ -0,0 +1,96 @@
+"""
+Bandeja de reservas del guía: pestañas por estado, filtro por fecha de la
+experiencia y paginación por cursor.
+
+Los contadores de todas las pestañas salen de una sola query agrupada por
+estado (con COUNT condicionales por fecha), servida por el índice
+(experience, status, date) de Booking.
+"""
+from datetime import date as date_type
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_date
+
+from apps.experiences.models import Experience
+from core.pagination import KeysetPage, paginate_keyset
+from .models import Booking
+
+
+INBOX_PAGE_SIZE = getattr(settings, "BOOKING_INBOX_PAGE_SIZE", 20)
+
+CLOSED_STATUSES = (Booking.Status.REJECTED, Booking.Status.CANCELED)
+
+# pestaña -> (título, orden). Las solicitudes, por fecha de la experiencia más próxima
+INBOX_TABS = {
+    "pending": ("Pendientes", ("date", "id")),
+    "change_requested": ("Cambios solicitados", ("date", "id")),
+    "cancel_requested": ("Cancelaciones solicitadas", ("date", "id")),
+    "upcoming": ("Próximas aceptadas", ("date", "id")),
+    "past": ("Pasadas y cerradas", ("-date", "-id")),
+}
+DEFAULT_TAB = "pending"
+
+
+def tab_condition(tab: str, today: date_type) -> Q:
+    if tab == "upcoming":
+        return Q(status=Booking.Status.ACCEPTED, date__gte=today)
+    if tab == "past":
+        # Aceptadas ya disfrutadas + rechazadas/canceladas (las solicitudes vencidas siguen en su pestaña)
+        return Q(status=Booking.Status.ACCEPTED, date__lt=today) | Q(status__in=CLOSED_STATUSES)
+    return Q(status=tab)
+
+
+def inbox_filters(params) -> dict:
+    """Pestaña y rango de fechas de la querystring; valores inválidos se ignoran."""
+    tab = params.get("tab", DEFAULT_TAB)
+    date_from = parse_date(params.get("date_from") or "")
+    date_to = parse_date(params.get("date_to") or "")
+    if date_from and date_to and date_from > date_to:
+        date_from, date_to = date_to, date_from
+    return {
+        "tab": tab if tab in INBOX_TABS else DEFAULT_TAB,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+
+
+def guide_inbox_queryset(guide, filters: dict):
+    # IN (subquery) en vez de JOIN: el planner recorre el índice
+    # (experience, status, date) por cada experiencia en vez del de status
+    bookings = Booking.objects.filter(experience__in=Experience.objects.filter(guide=guide).values("id"))
+    if filters["date_from"]:
+        bookings = bookings.filter(date__gte=filters["date_from"])
+    if filters["date_to"]:
+        bookings = bookings.filter(date__lte=filters["date_to"])
+    return bookings
+
+
+def inbox_counts(bookings, today: date_type) -> dict[str, int]:
+    """{pestaña: nº de reservas} en una query agrupada por estado."""
+    rows = (
+        bookings.values("status")
+        .annotate(
+            total=Count("id"),
+            upcoming=Count("id", filter=Q(date__gte=today)),
+        )
+        .order_by()
+    )
+
+    counts = dict.fromkeys(INBOX_TABS, 0)
+    for row in rows:
+        status = row["status"]
+        if status == Booking.Status.ACCEPTED:
+            counts["upcoming"] += row["upcoming"]
+            counts["past"] += row["total"] - row["upcoming"]
+        elif status in CLOSED_STATUSES:
+            counts["past"] += row["total"]
+        elif status in counts:
+            counts[status] += row["total"]
+    return counts
+
+
+def inbox_page(bookings, filters: dict, today: date_type, cursor: str | None) -> KeysetPage:
+    _, ordering = INBOX_TABS[filters["tab"]]
+    queryset = bookings.filter(tab_condition(filters["tab"], today)).select_related("experience", "traveler")
+    return paginate_keyset(queryset, ordering, cursor, INBOX_PAGE_SIZE)
@@ -0,0 +1,119 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+
+from apps.bookings.models import Booking
+from apps.experiences.models import Experience
+
+
+# Índices de las formas de query calientes (Booking.Meta.indexes)
+QUERY_INDEXES = (
+    "booking_traveler_status_idx",
+    "booking_trav_exp_status_idx",
+    "booking_exp_status_date_idx",
+    "booking_accepted_exp_date_idx",
+    "booking_unseen_guide_idx",
+    "booking_unseen_traveler_idx",
+)
+
+
+def query_shapes(sample: Booking) -> dict:
+    """Las queries reales (views, KPIs, badges, ocupación) con los valores de una reserva."""
+    guide_id = sample.experience.guide_id
+    guide_experiences = Experience.objects.filter(guide_id=guide_id).values("id")
+    return {
+        "create_booking duplicate check": Booking.objects.filter(
+            traveler_id=sample.traveler_id,
+            experience_id=sample.experience_id,
+            date=sample.date,
+            status=Booking.Status.PENDING,
+        ).order_by().values("id")[:1],
+        "review eligibility (latest accepted)": Booking.objects.filter(
+            traveler_id=sample.traveler_id,
+            experience_id=sample.experience_id,
+            status=Booking.Status.ACCEPTED,
+        ).order_by("-date", "-created_at").values("id")[:1],
+        "traveler KPIs by status": Booking.objects.filter(traveler_id=sample.traveler_id)
+        .values("status").annotate(total=Count("id")).order_by(),
+        "guide KPIs by status": Booking.objects.filter(experience__guide_id=guide_id)
+        .values("status").annotate(total=Count("id")).order_by(),
+        "guide inbox tab counts": Booking.objects.filter(experience__in=guide_experiences)
+        .values("status").annotate(total=Count("id")).order_by(),
+        "guide inbox pending page": Booking.objects.filter(
+            experience__in=guide_experiences,
+            status=Booking.Status.PENDING,
+        ).order_by("date", "id").values("id")[:21],
+        "accepted occupancy per day": Booking.objects.filter(
+            experience_id=sample.experience_id,
+            status=Booking.Status.ACCEPTED,
+        ).values("experience_id", "date").annotate(total=Count("id"), people=Sum("people")).order_by(),
+        "guide unseen badge": Booking.objects.filter(experience__guide_id=guide_id, seen_by_guide=False)
+        .values("experience__guide_id").annotate(total=Count("id")).order_by(),
+        "traveler unseen badge": Booking.objects.filter(traveler_id=sample.traveler_id, seen_by_traveler=False)
+        .values("traveler_id").annotate(total=Count("id")).order_by(),
+    }
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Print EXPLAIN plans and timings of the hot Booking queries with and without the "
+        "composite/partial indexes. The 'before' pass drops the indexes inside a transaction "
+        "that is rolled back: run it on a benchmark copy of the database, not production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Executions per query for the timing (default: 20).")
+        parser.add_argument("--after-only", action="store_true", help="Skip the pass without indexes.")
+
+    def handle(self, *args, **options):
+        sample = (
+            Booking.objects.select_related("experience")
+            .filter(status=Booking.Status.ACCEPTED)
+            .order_by("?")
+            .first()
+        )
+        if sample is None:
+            raise CommandError("No accepted bookings to sample from. Seed a dataset first.")
+
+        total = Booking.objects.count()
+        self.stdout.write(f"{total} bookings on {connection.vendor}; sample booking #{sample.pk}\n")
+
+        if not options["after_only"]:
+            if not connection.features.can_rollback_ddl:
+                raise CommandError(f"{connection.vendor} cannot roll back DROP INDEX; use --after-only.")
+            self._explain_without_indexes(sample, options["repeat"])
+
+        self.stdout.write(self.style.MIGRATE_HEADING("== With indexes =="))
+        self._explain(sample, options["repeat"])
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def _explain_without_indexes(self, sample, repeat):
+        indexes = [index for index in Booking._meta.indexes if index.name in QUERY_INDEXES]
+        try:
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Booking, index)
+                self.stdout.write(self.style.MIGRATE_HEADING("== Without indexes =="))
+                self._explain(sample, repeat)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _explain(self, sample, repeat):
+        for name, queryset in query_shapes(sample).items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+
+            self.stdout.write(self.style.MIGRATE_LABEL(f"{name}: median {statistics.median(timings):.2f} ms"))
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"    {line}")
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.bookings.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute BookingDailyStat rollups from bookings (nightly backfill)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Only rebuild bookings created in the last N days (default: everything).",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["days"] is not None:
+            since = timezone.localdate() - timedelta(days=options["days"])
+
+        rows = rebuild_rollups(since)
+        self.stdout.write(self.style.SUCCESS(f"Done. Wrote {rows} rollup rows."))
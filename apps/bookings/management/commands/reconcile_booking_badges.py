@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.bookings.badges import reconcile_badges
+
+
+class Command(BaseCommand):
+    help = "Recount unseen booking badges for every user and overwrite the cached counters"
+
+    def handle(self, *args, **options):
+        written = reconcile_badges()
+        self.stdout.write(self.style.SUCCESS(f"Done. Reconciled {written} badge counters."))
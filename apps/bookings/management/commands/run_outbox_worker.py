@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.bookings.emails import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Send pending EmailOutbox messages in batches over one SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting when it is drained.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep between polls when --loop is set.",
+        )
+
+    def handle(self, *args, **options):
+        total_sent, total_failed = 0, 0
+
+        while True:
+            sent, failed = drain_outbox(batch_size=options["batch_size"])
+            total_sent += sent
+            total_failed += failed
+
+            if sent or failed:
+                self.stdout.write(f"Batch: {sent} sent, {failed} failed.")
+                continue
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Done. Sent {total_sent}, failed {total_failed}."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.bookings.emails import send_guide_digests
+
+
+class Command(BaseCommand):
+    help = "Queue one summary email per guide with digest notifications enabled (run every N minutes)"
+
+    def handle(self, *args, **options):
+        queued = send_guide_digests()
+        self.stdout.write(self.style.SUCCESS(f"Done. Queued {queued} digests."))
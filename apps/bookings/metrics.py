@@ -0,0 +1,127 @@
+from datetime import date as date_type, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Booking, BookingDailyStat
+
+
+# Ventanas de tendencia del dashboard del guía: (días, tamaño del tramo)
+TREND_WINDOWS = ((90, "week"), (365, "month"))
+
+
+def _since(days: int) -> date_type:
+    return timezone.localdate() - timedelta(days=days)
+
+
+def _daily_totals(stats, since: date_type) -> dict[date_type, tuple[int, Decimal]]:
+    """
+    {día: (reservas, ingresos)} desde los rollups. Ingresos = solo ACCEPTED,
+    igual que revenue_30d/spent_30d. Una fila por día como mucho.
+    """
+    rows = (
+        stats.filter(day__gte=since)
+        .values("day")
+        .annotate(
+            total_bookings=Sum("bookings"),
+            total_revenue=Sum("revenue", filter=Q(status=Booking.Status.ACCEPTED)),
+        )
+        .order_by()
+    )
+    return {
+        row["day"]: (row["total_bookings"] or 0, row["total_revenue"] or Decimal("0.00"))
+        for row in rows
+    }
+
+
+def _window_totals(daily: dict, since: date_type) -> tuple[int, Decimal]:
+    bookings, revenue = 0, Decimal("0.00")
+    for day, (day_bookings, day_revenue) in daily.items():
+        if day >= since:
+            bookings += day_bookings
+            revenue += day_revenue
+    return bookings, revenue
+
+
+def _bucket_starts(today: date_type, days: int, bucket: str) -> list[date_type]:
+    if bucket == "week":
+        weeks = -(-days // 7)
+        return [today - timedelta(days=7 * (weeks - i) - 1) for i in range(weeks)]
+
+    # Meses naturales: el actual y los anteriores (12 para 365 días)
+    months = days // 30
+    starts = []
+    year, month = today.year, today.month
+    for _ in range(months):
+        starts.append(date_type(year, month, 1))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return starts[::-1]
+
+
+def _trend(daily: dict, today: date_type, days: int, bucket: str) -> dict:
+    starts = _bucket_starts(today, days, bucket)
+    series = [{"start": start, "bookings": 0, "revenue": Decimal("0.00")} for start in starts]
+
+    for day, (day_bookings, day_revenue) in daily.items():
+        if day < starts[0]:
+            continue
+        # Último tramo cuyo inicio es <= día
+        i = len(starts) - 1
+        while starts[i] > day:
+            i -= 1
+        series[i]["bookings"] += day_bookings
+        series[i]["revenue"] += day_revenue
+
+    peak = max(point["bookings"] for point in series) or 1
+    for point in series:
+        point["pct"] = round(100 * point["bookings"] / peak)
+
+    # Totales desde el primer tramo: con meses naturales empieza después de
+    # today - days, y el titular debe coincidir con la suma de las barras
+    bookings, revenue = _window_totals(daily, starts[0])
+    return {"days": days, "bookings": bookings, "revenue": revenue, "series": series}
+
+
+def guide_booking_kpis(guide, *, days: int = 30) -> dict:
+    """
+    KPIs de reservas del guía en dos queries:
+    - estados de acción y no vistas: agregación condicional sobre Booking
+    - volumen/ingresos y tendencias 90/365 días: filas diarias de BookingDailyStat
+
+    Claves: bookings_30d, pending_new, pending_change, pending_cancel, pending,
+    revenue_30d, unseen, trends.
+    """
+    data = Booking.objects.filter(experience__guide=guide).aggregate(
+        pending_new=Count("id", filter=Q(status=Booking.Status.PENDING)),
+        pending_change=Count("id", filter=Q(status=Booking.Status.CHANGE_REQUESTED)),
+        pending_cancel=Count("id", filter=Q(status=Booking.Status.CANCEL_REQUESTED)),
+        unseen=Count("id", filter=Q(seen_by_guide=False)),
+    )
+    data["pending"] = data["pending_new"] + data["pending_change"] + data["pending_cancel"]
+
+    today = timezone.localdate()
+    longest = max(window for window, _ in TREND_WINDOWS)
+    daily = _daily_totals(BookingDailyStat.objects.filter(guide=guide), _since(longest))
+
+    data["bookings_30d"], data["revenue_30d"] = _window_totals(daily, _since(days))
+    data["trends"] = [_trend(daily, today, window, bucket) for window, bucket in TREND_WINDOWS]
+    return data
+
+
+def traveler_booking_kpis(traveler, *, days: int = 30) -> dict:
+    """
+    KPIs de reservas del viajero en dos queries (estados sobre Booking,
+    volumen/gasto desde los rollups diarios).
+    Claves: bookings_30d, accepted, rejected, pending, spent_30d, unseen.
+    """
+    data = Booking.objects.filter(traveler=traveler).aggregate(
+        accepted=Count("id", filter=Q(status=Booking.Status.ACCEPTED)),
+        rejected=Count("id", filter=Q(status=Booking.Status.REJECTED)),
+        pending=Count("id", filter=Q(status=Booking.Status.PENDING)),
+        unseen=Count("id", filter=Q(seen_by_traveler=False)),
+    )
+
+    daily = _daily_totals(BookingDailyStat.objects.filter(traveler=traveler), _since(days))
+    data["bookings_30d"], data["spent_30d"] = _window_totals(daily, _since(days))
+    return data
@@ -0,0 +1,65 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_rollups(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    BookingDailyStat = apps.get_model("bookings", "BookingDailyStat")
+
+    rows = (
+        Booking.objects.annotate(day=TruncDate("created_at"))
+        .values("day", "experience_id", "experience__guide_id", "traveler_id", "status")
+        .annotate(total_bookings=Count("id"), total_revenue=Sum("total_price"))
+        .order_by()
+    )
+    BookingDailyStat.objects.bulk_create(
+        [
+            BookingDailyStat(
+                day=row["day"],
+                guide_id=row["experience__guide_id"],
+                experience_id=row["experience_id"],
+                traveler_id=row["traveler_id"],
+                status=row["status"],
+                bookings=row["total_bookings"],
+                revenue=row["total_revenue"] or 0,
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_emailoutbox'),
+        ('experiences', '0004_experience_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('canceled', 'Canceled'), ('change_requested', 'Change requested'), ('cancel_requested', 'Cancel requested')], max_length=20)),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('experience', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_stats', to='experiences.experience')),
+                ('guide', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='guide_booking_stats', to=settings.AUTH_USER_MODEL)),
+                ('traveler', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['guide', 'day'], name='bookings_bo_guide_i_5c59af_idx'), models.Index(fields=['traveler', 'day'], name='bookings_bo_travele_1a9cb5_idx')],
+                'unique_together': {('day', 'experience', 'traveler', 'status')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
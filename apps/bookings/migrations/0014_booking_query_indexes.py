@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_bookingdailystat'),
+        ('experiences', '0008_experience_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['traveler', 'status'], name='booking_traveler_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['traveler', 'experience', 'status', 'date'], name='booking_trav_exp_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['experience', 'status'], name='booking_exp_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'accepted')), fields=['experience', 'date'], name='booking_accepted_exp_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('seen_by_guide', False)), fields=['experience'], name='booking_unseen_guide_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('seen_by_traveler', False)), fields=['traveler'], name='booking_unseen_traveler_idx'),
+        ),
+    ]
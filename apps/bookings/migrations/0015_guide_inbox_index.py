@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0014_booking_query_indexes'),
+        ('experiences', '0008_experience_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_exp_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['experience', 'status', 'date'], name='booking_exp_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+def populate_popularity_weight(apps, schema_editor):
+    # Sin vida media cada reserva activa pesa 1; con vida media, refresh_popularity
+    # recalcula los pesos y la popularidad juntos
+    Booking = apps.get_model("bookings", "Booking")
+    Booking.objects.filter(status__in=["pending", "accepted"]).update(popularity_weight=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0015_guide_inbox_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='popularity_weight',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_popularity_weight, migrations.RunPython.noop),
+    ]
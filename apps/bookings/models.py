@@ -1,5 +1,6 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from apps.experiences.models import Experience
 
@@ -35,6 +36,17 @@ class Booking(models.Model):
         CHANGE_REQUESTED = "change_requested", "Change requested"
         CANCEL_REQUESTED = "cancel_requested", "Cancel requested"
 
+    # Estados que cuentan para la popularidad de la experiencia
+    POPULAR_STATUSES = (Status.PENDING, Status.ACCEPTED)
+
+    # Claves de los datos derivados (DailyOccupancy, Experience.popularity,
+    # BookingDailyStat) -> campos de los que dependen
+    DERIVED_KEYS = {
+        "occupancy_key": {"experience_id", "date", "people", "status"},
+        "popularity_key": {"experience_id", "status", "created_at"},
+        "rollup_key": {"created_at", "experience_id", "traveler_id", "status", "total_price"},
+    }
+
     experience = models.ForeignKey(
         Experience,
         on_delete=models.CASCADE,
@@ -75,6 +87,10 @@ class Booking(models.Model):
         default=Status.PENDING,
     )
 
+    # Peso que la reserva suma ahora a Experience.popularity (0 si no cuenta).
+    # Al salir de PENDING/ACCEPTED se resta este valor, no el peso recalculado
+    popularity_weight = models.FloatField(default=0, editable=False)
+
     # Tracking de notificaciones “no vistas”
     seen_by_traveler = models.BooleanField(default=True)
     seen_by_guide = models.BooleanField(default=True)
@@ -97,17 +113,182 @@ class Booking(models.Model):
     def total_people(self) -> int:
         return (self.adults or 0) + (self.children or 0) + (self.infants or 0)
 
+    @property
+    def occupancy_key(self) -> tuple | None:
+        """
+        (experience_id, date, people) si la reserva consume cupo real.
+        Solo ACCEPTED ocupa plaza; el resto devuelve None.
+        """
+        if self.status != self.Status.ACCEPTED:
+            return None
+        return (self.experience_id, self.date, self.people)
+
+    @property
+    def popularity_key(self) -> tuple | None:
+        """(experience_id, created_at) si la reserva suma popularidad (PENDING/ACCEPTED)."""
+        if self.status not in self.POPULAR_STATUSES or self.created_at is None:
+            return None
+        return (self.experience_id, self.created_at)
+
+    @property
+    def rollup_key(self) -> tuple | None:
+        """
+        (día de creación, experience_id, traveler_id, status, total_price) para
+        BookingDailyStat. None mientras la reserva no esté guardada.
+        """
+        if self.created_at is None:
+            return None
+        return (
+            timezone.localdate(self.created_at),
+            self.experience_id,
+            self.traveler_id,
+            self.status,
+            self.total_price,
+        )
+
+    def derived_keys(self) -> dict:
+        return {name: getattr(self, name) for name in self.DERIVED_KEYS}
+
+    def refresh_saved_keys(self) -> None:
+        """
+        Relee de BD la foto de las claves derivadas (_saved_keys). Sin fila en
+        BD todas son None.
+        """
+        saved = type(self).objects.filter(pk=self.pk).first() if self.pk else None
+        self._saved_keys = saved.derived_keys() if saved else dict.fromkeys(self.DERIVED_KEYS)
+
+    def saved_key(self, name: str):
+        """Clave derivada `name` tal como está en BD (sin foto, la actual)."""
+        saved_keys = getattr(self, "_saved_keys", None)
+        return saved_keys[name] if saved_keys is not None else getattr(self, name)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Foto de las claves derivadas tal como están en BD. Cargada con
+        # only()/defer() no hay foto: el pre_save la lee (bookings.signals)
+        if set().union(*cls.DERIVED_KEYS.values()).issubset(field_names):
+            instance._saved_keys = instance.derived_keys()
+        return instance
+
     def save(self, *args, **kwargs):
         # Mantener people siempre coherente
         self.people = self.total_people
-        super().save(*args, **kwargs)
+        # Atomic: las señales actualizan DailyOccupancy en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["status"]),
             models.Index(fields=["date"]),
+            # KPIs del viajero (agregado por estado) y sus listados
+            models.Index(fields=["traveler", "status"], name="booking_traveler_status_idx"),
+            # Duplicado PENDING en create_booking y reserva ACCEPTED para reseñar (ordenada por fecha)
+            models.Index(
+                fields=["traveler", "experience", "status", "date"],
+                name="booking_trav_exp_status_idx",
+            ),
+            # KPIs del guía (estados de las reservas de sus experiencias) y su
+            # bandeja: pestaña por estado, rango de fechas y orden por fecha
+            models.Index(fields=["experience", "status", "date"], name="booking_exp_status_date_idx"),
+            # Parciales (SQLite/Postgres; en MySQL Django no las crea):
+            # cupo ocupado = solo ACCEPTED, por experiencia y día
+            models.Index(
+                fields=["experience", "date"],
+                condition=models.Q(status="accepted"),
+                name="booking_accepted_exp_date_idx",
+            ),
+            # Badges y resumen del guía: reservas no vistas (pocas frente al total)
+            models.Index(
+                fields=["experience"],
+                condition=models.Q(seen_by_guide=False),
+                name="booking_unseen_guide_idx",
+            ),
+            models.Index(
+                fields=["traveler"],
+                condition=models.Q(seen_by_traveler=False),
+                name="booking_unseen_traveler_idx",
+            ),
         ]
 
     def __str__(self):
         return f"Booking({self.experience.title}) - {self.traveler.username} - {self.status}"
+
+
+class BookingDailyStat(models.Model):
+    """
+    Rollup diario de reservas por (día de creación, experiencia, viajero, estado).
+    - bookings / revenue: nº de reservas y suma de total_price en ese estado
+    - guide se desnormaliza para leer el dashboard del guía sin joins
+    - Se mantiene desde las señales de Booking (ver bookings/signals.py)
+    - rebuild_booking_rollups lo recalcula (backfill nocturno)
+    """
+    day = models.DateField()
+    guide = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="guide_booking_stats",
+    )
+    experience = models.ForeignKey(
+        Experience,
+        on_delete=models.CASCADE,
+        related_name="booking_stats",
+    )
+    traveler = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="booking_stats",
+    )
+    status = models.CharField(max_length=20, choices=Booking.Status.choices)
+
+    bookings = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["day"]
+        unique_together = ("day", "experience", "traveler", "status")
+        indexes = [
+            models.Index(fields=["guide", "day"]),
+            models.Index(fields=["traveler", "day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - exp {self.experience_id} - {self.status}: {self.bookings}"
+
+
+class EmailOutbox(models.Model):
+    """
+    Cola de emails transaccionales. Las vistas solo escriben aquí y
+    run_outbox_worker los envía fuera de la request (reintentos + dead letter).
+    """
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENT = "sent", "Sent"
+        DEAD = "dead", "Dead"
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"EmailOutbox({self.to_email} - {self.subject} - {self.status})"
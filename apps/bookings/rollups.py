@@ -0,0 +1,89 @@
+from datetime import date as date_type
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest, TruncDate
+
+from apps.experiences.models import Experience
+from .models import Booking, BookingDailyStat
+
+
+def _stat_filter(key: tuple) -> dict:
+    day, experience_id, traveler_id, status, _ = key
+    return {"day": day, "experience_id": experience_id, "traveler_id": traveler_id, "status": status}
+
+
+def apply_rollup_change(old: tuple | None, new: tuple | None) -> None:
+    """
+    Mueve una reserva entre filas de BookingDailyStat.
+    old / new son Booking.rollup_key o None. Se llama dentro de la transacción
+    de Booking.save()/delete().
+    """
+    if old == new:
+        return
+
+    if old is not None:
+        # Solo filas con reservas y sin bajar de cero: reservas e ingresos se
+        # mueven juntos aunque llegue una foto desfasada
+        BookingDailyStat.objects.filter(**_stat_filter(old), bookings__gt=0).update(
+            bookings=F("bookings") - 1,
+            revenue=Greatest(F("revenue") - old[4], Value(Decimal("0"))),
+        )
+
+    if new is not None:
+        lookup = _stat_filter(new)
+        increment = {"bookings": F("bookings") + 1, "revenue": F("revenue") + new[4]}
+        if BookingDailyStat.objects.filter(**lookup).update(**increment):
+            return
+
+        guide_id = (
+            Experience.objects.filter(pk=new[1])
+            .values_list("guide_id", flat=True)
+            .first()
+        )
+        try:
+            with transaction.atomic():
+                BookingDailyStat.objects.create(
+                    **lookup, guide_id=guide_id, bookings=1, revenue=new[4],
+                )
+        except IntegrityError:
+            # Otra transacción creó la fila a la vez
+            BookingDailyStat.objects.filter(**lookup).update(**increment)
+
+
+def rebuild_rollups(since: date_type | None = None) -> int:
+    """
+    Recalcula BookingDailyStat desde Booking (todo o desde `since`, por día de
+    creación). Devuelve el número de filas escritas.
+    """
+    stats = BookingDailyStat.objects.all()
+    bookings = Booking.objects.annotate(day=TruncDate("created_at"))
+    if since is not None:
+        stats = stats.filter(day__gte=since)
+        bookings = bookings.filter(day__gte=since)
+
+    rows = (
+        bookings.values("day", "experience_id", "experience__guide_id", "traveler_id", "status")
+        .annotate(total_bookings=Count("id"), total_revenue=Sum("total_price"))
+        .order_by()
+    )
+
+    with transaction.atomic():
+        stats.delete()
+        created = BookingDailyStat.objects.bulk_create(
+            [
+                BookingDailyStat(
+                    day=row["day"],
+                    guide_id=row["experience__guide_id"],
+                    experience_id=row["experience_id"],
+                    traveler_id=row["traveler_id"],
+                    status=row["status"],
+                    bookings=row["total_bookings"],
+                    revenue=row["total_revenue"] or 0,
+                )
+                for row in rows.iterator()
+            ],
+            batch_size=1000,
+        )
+    return len(created)
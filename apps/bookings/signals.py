@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .badges import invalidate_booking_badges
+from .models import Booking
+from .rollups import apply_rollup_change
+
+
+BADGE_FIELDS = {"seen_by_guide", "seen_by_traveler", "experience", "traveler"}
+
+
+@receiver(pre_save, sender=Booking)
+def snapshot_booking_keys(sender, instance: Booking, **kwargs):
+    """
+    Foto única de las claves derivadas antes de guardar, compartida por los
+    post_save de ocupación, popularidad y rollups (cada uno actualiza la suya).
+    """
+    if instance._state.adding:
+        instance._saved_keys = dict.fromkeys(Booking.DERIVED_KEYS)
+    elif not hasattr(instance, "_saved_keys"):
+        instance.refresh_saved_keys()
+
+
+@receiver(post_save, sender=Booking)
+def update_rollup_on_save(sender, instance: Booking, **kwargs):
+    new = instance.rollup_key
+    apply_rollup_change(instance._saved_keys["rollup_key"], new)
+    instance._saved_keys["rollup_key"] = new
+
+
+@receiver(post_delete, sender=Booking)
+def update_rollup_on_delete(sender, instance: Booking, **kwargs):
+    apply_rollup_change(instance.saved_key("rollup_key"), None)
+
+
+@receiver(post_save, sender=Booking)
+def invalidate_badges_on_save(sender, instance: Booking, created, update_fields=None, **kwargs):
+    # Guardados parciales que no tocan los flags "visto" no cambian los contadores
+    if not created and update_fields is not None and not BADGE_FIELDS & set(update_fields):
+        return
+    invalidate_booking_badges(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def invalidate_badges_on_delete(sender, instance: Booking, **kwargs):
+    invalidate_booking_badges(instance)
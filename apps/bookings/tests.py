@@ -1,3 +1,576 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.availability.models import DailyOccupancy, ExperienceAvailability
+from apps.availability.services import capacity_lock, save_with_capacity
+from apps.profiles.models import GuideProfile
+from core.context_processors import booking_badges
+from core.instrumentation import query_budget
+from core.testing import create_booking, create_experience, create_guide, create_traveler
+from .emails import (
+    BOOKING_EMAILS,
+    OUTBOX_BACKOFF_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_SMTP_TIMEOUT,
+    drain_outbox,
+    queue_booking_emails,
+    render_booking_email,
+    send_guide_digests,
+    with_email_relations,
+)
+from .models import Booking, BookingDailyStat, EmailOutbox
+from .rollups import apply_rollup_change
+
+
+class ConcurrentAcceptTests(TransactionTestCase):
+    """
+    Varias pestañas del guía aceptando a la vez reservas del mismo día con cupo
+    limitado: solo deben entrar las que caben.
+    """
+
+    parallel_accepts = 8
+    capacity_bookings = 3
+
+    def setUp(self):
+        self.guide = create_guide()
+        self.experience = create_experience(self.guide)
+        ExperienceAvailability.objects.create(
+            experience=self.experience,
+            daily_capacity_bookings=self.capacity_bookings,
+        )
+        self.date = timezone.localdate() + timedelta(days=10)
+
+        self.bookings = []
+        for i in range(self.parallel_accepts):
+            traveler = create_traveler(f"traveler{i}")
+            self.bookings.append(create_booking(self.experience, traveler, date=self.date))
+
+    def _accept(self, booking, barrier, results):
+        try:
+            barrier.wait()
+            # Lo mismo que hace accept_booking tras validar el formulario
+            booking.status = Booking.Status.ACCEPTED
+            ok, _msg = save_with_capacity(booking)
+            results.append(ok)
+        finally:
+            connection.close()
+
+    def test_parallel_accepts_do_not_overbook(self):
+        # Instancias cargadas antes: cada hilo solo toca BD dentro del lock de cupo
+        bookings = [
+            Booking.objects.select_related("experience").get(pk=b.pk) for b in self.bookings
+        ]
+        barrier = threading.Barrier(len(bookings))
+        results = []
+        threads = [
+            threading.Thread(target=self._accept, args=(booking, barrier, results))
+            for booking in bookings
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(True), self.capacity_bookings)
+        self._assert_capacity_respected()
+
+    def _assert_capacity_respected(self):
+        accepted = Booking.objects.filter(experience=self.experience, status=Booking.Status.ACCEPTED)
+        self.assertEqual(accepted.count(), self.capacity_bookings)
+        occupancy = DailyOccupancy.objects.get(experience=self.experience, date=self.date)
+        self.assertEqual(occupancy.bookings, self.capacity_bookings)
+
+    @skipUnless(connection.vendor == "sqlite", "BEGIN IMMEDIATE solo existe en SQLite")
+    def test_only_the_capacity_path_begins_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Booking.objects.count()
+            with capacity_lock(self.experience.pk, self.date):
+                Booking.objects.count()
+            with transaction.atomic():
+                Booking.objects.count()
+        begins = [query["sql"] for query in queries.captured_queries if query["sql"].startswith("BEGIN")]
+        self.assertEqual(begins, ["BEGIN", "BEGIN IMMEDIATE", "BEGIN"])
+
+    def _post_accept(self, client, booking, barrier, statuses):
+        try:
+            barrier.wait()
+            response = client.post(
+                reverse("bookings:accept", args=[booking.pk]),
+                {"pickup_time": "09:00", "meeting_point": "Parking de Yaiza"},
+            )
+            statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _read_uncommitted(sender, connection, **kwargs):
+        # La BD de tests en memoria usa shared cache: una lectura fuera del lock de
+        # cupo falla con "table is locked" en vez de esperar como en un fichero
+        if connection.vendor == "sqlite":
+            connection.cursor().execute("PRAGMA read_uncommitted = 1")
+
+    def test_parallel_accepts_through_the_view(self):
+        connection_created.connect(self._read_uncommitted)
+        self.addCleanup(connection_created.disconnect, self._read_uncommitted)
+
+        # Un cliente (pestaña) por reserva; el login se hace antes de arrancar los hilos
+        clients = []
+        for _ in self.bookings:
+            client = Client()
+            client.force_login(self.guide)
+            clients.append(client)
+
+        barrier = threading.Barrier(len(self.bookings))
+        statuses = []
+        threads = [
+            threading.Thread(target=self._post_accept, args=(client, booking, barrier, statuses))
+            for client, booking in zip(clients, self.bookings)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses, [302] * len(self.bookings))
+        self._assert_capacity_respected()
+
+        accepted = Booking.objects.filter(
+            experience=self.experience,
+            date=self.date,
+            status=Booking.Status.ACCEPTED,
+        ).count()
+        self.assertEqual(accepted, self.capacity_bookings)
+
+        occupancy = DailyOccupancy.objects.get(experience=self.experience, date=self.date)
+        self.assertEqual(occupancy.bookings, accepted)
+
+
+class BookingBadgeTests(TestCase):
+    """Contadores de no vistas cacheados por usuario en el context processor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide(verified=False)
+        cls.traveler = create_traveler()
+        cls.experience = create_experience(cls.guide)
+
+    def setUp(self):
+        cache.clear()
+        self.booking = create_booking(self.experience, self.traveler, seen_by_guide=False)
+
+    def _badges(self, user):
+        request = RequestFactory().get("/")
+        request.user = user
+        return booking_badges(request)
+
+    def test_cache_hit_costs_no_queries(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self._badges(self.guide)["unseen_guide_bookings"], 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._badges(self.guide)["unseen_guide_bookings"], 1)
+
+    def test_seen_flag_flip_invalidates(self):
+        self._badges(self.guide)
+        self._badges(self.traveler)
+
+        self.booking.seen_by_guide = True
+        self.booking.seen_by_traveler = False
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.booking.save(update_fields=["seen_by_guide", "seen_by_traveler"])
+        # Hasta el commit se siguen sirviendo los contadores confirmados
+        self.assertEqual(self._badges(self.guide)["unseen_guide_bookings"], 1)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self._badges(self.guide)["unseen_guide_bookings"], 0)
+        self.assertEqual(self._badges(self.traveler)["unseen_traveler_bookings"], 1)
+
+    def test_reconcile_repairs_drift(self):
+        self._badges(self.guide)
+
+        # update() no dispara señales: la cache queda desviada
+        Booking.objects.filter(pk=self.booking.pk).update(seen_by_guide=True)
+        self.assertEqual(self._badges(self.guide)["unseen_guide_bookings"], 1)
+
+        call_command("reconcile_booking_badges", stdout=StringIO())
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._badges(self.guide)["unseen_guide_bookings"], 0)
+
+
+class BookingQueryIndexTests(TestCase):
+    """Las formas de query calientes usan los índices compuestos/parciales."""
+
+    @classmethod
+    def setUpTestData(cls):
+        experience = create_experience(create_guide(verified=False))
+        create_booking(experience, create_traveler(), status=Booking.Status.ACCEPTED)
+
+    def test_explain_uses_the_indexes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Plans checked on SQLite")
+
+        out = StringIO()
+        call_command("explain_booking_queries", "--after-only", "--repeat", "1", stdout=out)
+        output = out.getvalue()
+        for index in (
+            "booking_trav_exp_status_idx",
+            "booking_traveler_status_idx",
+            "booking_exp_status_date_idx",
+            "booking_unseen_guide_idx",
+            "booking_unseen_traveler_idx",
+        ):
+            self.assertIn(index, output)
+        # La ocupación puede usar la parcial de ACCEPTED o (experience, status, date)
+        occupancy = output.split("accepted occupancy per day")[1].split("\n")[1]
+        self.assertRegex(occupancy, "booking_accepted_exp_date_idx|booking_exp_status_date_idx")
+
+
+class GuideInboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide()
+        traveler = create_traveler()
+        experience = create_experience(cls.guide)
+        other_experience = create_experience(
+            create_guide("other", verified=False), title="Famara", description="Surf", price=40,
+        )
+
+        cls.today = timezone.localdate()
+        cls.bookings = {}
+        for name, status, days in [
+            ("pending_soon", Booking.Status.PENDING, 3),
+            ("pending_later", Booking.Status.PENDING, 30),
+            ("change", Booking.Status.CHANGE_REQUESTED, 5),
+            ("cancel", Booking.Status.CANCEL_REQUESTED, 6),
+            ("upcoming", Booking.Status.ACCEPTED, 7),
+            ("enjoyed", Booking.Status.ACCEPTED, -7),
+            ("rejected", Booking.Status.REJECTED, 10),
+        ]:
+            cls.bookings[name] = create_booking(
+                experience, traveler, date=cls.today + timedelta(days=days), status=status,
+            )
+        create_booking(other_experience, traveler, date=cls.today + timedelta(days=3))
+
+    def setUp(self):
+        self.client.force_login(self.guide)
+
+    def _get(self, **params):
+        return self.client.get(reverse("bookings:guide_list"), params)
+
+    def _counts(self, response):
+        return {tab["key"]: tab["count"] for tab in response.context["tabs"]}
+
+    def test_tabs_and_counts(self):
+        response = self._get()
+        self.assertEqual(
+            self._counts(response),
+            {"pending": 2, "change_requested": 1, "cancel_requested": 1, "upcoming": 1, "past": 2},
+        )
+        # Pendientes por fecha de la experiencia, la más próxima primero; nada de otros guías
+        self.assertEqual(
+            list(response.context["bookings"]),
+            [self.bookings["pending_soon"], self.bookings["pending_later"]],
+        )
+        self.assertEqual(list(self._get(tab="upcoming").context["bookings"]), [self.bookings["upcoming"]])
+        self.assertEqual(
+            list(self._get(tab="past").context["bookings"]),
+            [self.bookings["rejected"], self.bookings["enjoyed"]],
+        )
+        self.assertEqual(self._get(tab="nope").context["filters"]["tab"], "pending")
+
+    def test_date_range_filters_tabs_and_counts(self):
+        response = self._get(date_from=self.today.isoformat(), date_to=(self.today + timedelta(days=5)).isoformat())
+        self.assertEqual(
+            self._counts(response),
+            {"pending": 1, "change_requested": 1, "cancel_requested": 0, "upcoming": 0, "past": 0},
+        )
+        self.assertEqual(list(response.context["bookings"]), [self.bookings["pending_soon"]])
+        self.assertIn("date_from=", response.context["tabs"][1]["url"])
+
+    def test_keyset_pagination(self):
+        with mock.patch("apps.bookings.inbox.INBOX_PAGE_SIZE", 1):
+            first = self._get()
+            self.assertEqual(list(first.context["bookings"]), [self.bookings["pending_soon"]])
+            second = self.client.get(first.context["next_page_url"])
+
+        self.assertEqual(list(second.context["bookings"]), [self.bookings["pending_later"]])
+        self.assertIsNone(second.context["next_page_url"])
+
+    def test_query_count_does_not_grow_with_bookings(self):
+        # sesión + usuario + perfil (guide_required) + contadores + página + badge
+        with query_budget(6):
+            self._get()
+
+
+class BookingSnapshotTests(TestCase):
+    """Una sola foto (_saved_keys) alimenta ocupación, popularidad y rollups."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.experience = create_experience(create_guide())
+        cls.traveler = create_traveler()
+
+    def setUp(self):
+        self.booking = create_booking(self.experience, self.traveler, adults=2, total_price=100)
+
+    def _accept(self, booking):
+        booking.status = Booking.Status.ACCEPTED
+        with mock.patch.object(
+            Booking, "refresh_saved_keys", autospec=True, side_effect=Booking.refresh_saved_keys,
+        ) as refresh:
+            booking.save(update_fields=["status"])
+        return refresh.call_count
+
+    def _derived(self):
+        self.experience.refresh_from_db(fields=["popularity"])
+        occupancy = DailyOccupancy.objects.filter(experience=self.experience, date=self.booking.date).first()
+        return (
+            occupancy.people if occupancy else 0,
+            self.experience.popularity,
+            dict(BookingDailyStat.objects.filter(bookings__gt=0).values_list("status", "revenue")),
+        )
+
+    def test_loaded_instance_needs_no_extra_read(self):
+        self.assertEqual(self._accept(Booking.objects.get(pk=self.booking.pk)), 0)
+        self.assertEqual(self._derived(), (2, 1, {Booking.Status.ACCEPTED: 100}))
+
+    def test_deferred_instance_reads_the_row_once(self):
+        booking = Booking.objects.only("id", "status").get(pk=self.booking.pk)
+        self.assertFalse(hasattr(booking, "_saved_keys"))
+
+        self.assertEqual(self._accept(booking), 1)
+        self.assertEqual(self._derived(), (2, 1, {Booking.Status.ACCEPTED: 100}))
+
+        booking.delete()
+        self.assertEqual(self._derived(), (0, 0, {}))
+
+    def test_stale_instances_accepting_twice(self):
+        # Dos pestañas con la reserva cargada como PENDING aceptan una tras otra
+        first = Booking.objects.get(pk=self.booking.pk)
+        second = Booking.objects.get(pk=self.booking.pk)
+        for stale in (first, second):
+            stale.status = Booking.Status.ACCEPTED
+            self.assertEqual(save_with_capacity(stale), (True, "OK"))
+
+        self.assertEqual(self._derived(), (2, 1, {Booking.Status.ACCEPTED: 100}))
+        pending = BookingDailyStat.objects.get(status=Booking.Status.PENDING)
+        self.assertEqual((pending.bookings, pending.revenue), (0, 0))
+
+    def test_rollup_never_goes_negative(self):
+        key = self.booking.rollup_key
+        BookingDailyStat.objects.filter(status=Booking.Status.PENDING).update(revenue=40)
+        apply_rollup_change(key, None)
+        apply_rollup_change(key, None)
+
+        pending = BookingDailyStat.objects.get(status=Booking.Status.PENDING)
+        self.assertEqual((pending.bookings, pending.revenue), (0, 0))
+
+
+class OutboxWorkerTests(TestCase):
+    """drain_outbox envía lo vencido, reintenta con backoff y acaba en DEAD."""
+
+    def _queue(self, count=1, **fields):
+        return [
+            EmailOutbox.objects.create(to_email=f"user{i}@example.com", subject="Asunto", message="Cuerpo", **fields)
+            for i in range(count)
+        ]
+
+    def _failing_connection(self, *, on_open=False):
+        connection = mock.Mock()
+        error = ConnectionRefusedError("smtp caído")
+        if on_open:
+            connection.open.side_effect = error
+        else:
+            connection.send_messages.side_effect = error
+        return mock.patch("apps.bookings.emails.get_connection", return_value=connection)
+
+    def test_sends_due_messages(self):
+        self._queue(2)
+        later = self._queue(next_attempt_at=timezone.now() + timedelta(hours=1))[0]
+        self._queue(status=EmailOutbox.Status.SENT)
+
+        out = StringIO()
+        call_command("run_outbox_worker", stdout=out)
+        self.assertIn("Done. Sent 2, failed 0.", out.getvalue())
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ["user0@example.com", "user1@example.com"])
+
+        later.refresh_from_db()
+        self.assertEqual((later.status, later.attempts), (EmailOutbox.Status.PENDING, 0))
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.Status.SENT, sent_at__isnull=False).count(), 2)
+
+    def test_failures_back_off_until_dead_letter(self):
+        item = self._queue()[0]
+
+        before = timezone.now()
+        with self._failing_connection():
+            self.assertEqual(drain_outbox(), (0, 1))
+            # Aún no toca reintentar
+            self.assertEqual(drain_outbox(), (0, 0))
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.attempts), (EmailOutbox.Status.PENDING, 1))
+        self.assertIn("smtp caído", item.last_error)
+        self.assertGreaterEqual(item.next_attempt_at, before + timedelta(seconds=OUTBOX_BACKOFF_SECONDS))
+
+        # El siguiente fallo espera el doble
+        EmailOutbox.objects.filter(pk=item.pk).update(next_attempt_at=timezone.now())
+        before = timezone.now()
+        with self._failing_connection():
+            drain_outbox()
+        item.refresh_from_db()
+        self.assertGreaterEqual(item.next_attempt_at, before + timedelta(seconds=2 * OUTBOX_BACKOFF_SECONDS))
+
+        EmailOutbox.objects.filter(pk=item.pk).update(
+            attempts=OUTBOX_MAX_ATTEMPTS - 1,
+            next_attempt_at=timezone.now(),
+        )
+        with self._failing_connection():
+            self.assertEqual(drain_outbox(), (0, 1))
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.attempts), (EmailOutbox.Status.DEAD, OUTBOX_MAX_ATTEMPTS))
+
+        # Un DEAD no se vuelve a intentar aunque el servidor vuelva
+        self.assertEqual(drain_outbox(), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_batch_is_claimed_before_sending(self):
+        self._queue(2)
+        during_send = []
+
+        def send_messages(messages):
+            # Otro worker a mitad del envío no encuentra nada que enviar
+            during_send.append(drain_outbox())
+            return len(messages)
+
+        mail_connection = mock.Mock()
+        mail_connection.send_messages.side_effect = send_messages
+        with mock.patch("apps.bookings.emails.get_connection", return_value=mail_connection) as get_connection:
+            self.assertEqual(drain_outbox(), (2, 0))
+
+        self.assertEqual(during_send, [(0, 0), (0, 0)])
+        get_connection.assert_called_once_with(fail_silently=False, timeout=OUTBOX_SMTP_TIMEOUT)
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.Status.SENT).count(), 2)
+
+    def test_server_down_retries_the_whole_batch(self):
+        self._queue(3)
+        with self._failing_connection(on_open=True):
+            self.assertEqual(drain_outbox(), (0, 3))
+        self.assertEqual(set(EmailOutbox.objects.values_list("status", "attempts")), {(EmailOutbox.Status.PENDING, 1)})
+
+
+class BookingEmailRenderingTests(TestCase):
+    """Las plantillas de email se renderizan sin queries si la reserva trae sus relaciones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        guide = create_guide(email="guide@example.com")
+        traveler = create_traveler(email="traveler@example.com")
+        experience = create_experience(guide, title="Cueva de los Verdes")
+        cls.bookings = [
+            create_booking(experience, traveler, adults=2, pickup_notes="Hotel Fariones"),
+            create_booking(experience, create_traveler("other", email="other@example.com")),
+        ]
+        cls.booking = cls.bookings[0]
+
+    def _loaded(self):
+        return list(with_email_relations(Booking.objects.filter(pk__in=[b.pk for b in self.bookings]).order_by("pk")))
+
+    def test_every_event_renders_without_queries(self):
+        booking = self._loaded()[0]
+        context = {"cancel_url": "/cancel/", "detail_url": "/detail/", "reason": "Lluvia"}
+        for event, (recipient, subject, _template) in BOOKING_EMAILS.items():
+            with self.subTest(event=event), self.assertNumQueries(0):
+                to_email, rendered_subject, body = render_booking_email(event, booking, **context)
+            self.assertEqual(to_email, f"{recipient}@example.com")
+            self.assertEqual(rendered_subject, subject)
+            self.assertIn("Cueva de los Verdes", body)
+            self.assertIn(self.booking.date.strftime("%Y-%m-%d"), body)
+
+    def test_body_content(self):
+        booking = self._loaded()[0]
+        _, _, body = render_booking_email("accepted", booking)
+        self.assertIn("- Adultos: 2", body)
+        self.assertIn("Recogida: Hotel Fariones", body)
+        self.assertIn(f"Total: {booking.total_price}€", body)
+
+        _, _, body = render_booking_email("change_rejected", booking, cancel_url="/cancel/1/", detail_url="/detail/1/")
+        self.assertIn("Cancelar gratis: /cancel/1/", body)
+
+        # Sin contexto opcional la línea desaparece
+        _, _, body = render_booking_email("cancel_free", booking)
+        self.assertNotIn("Motivo", body)
+
+    def test_bulk_queue_is_one_insert(self):
+        bookings = self._loaded()
+        with self.assertNumQueries(1):
+            self.assertEqual(queue_booking_emails("rejected", bookings), 2)
+        self.assertEqual(
+            sorted(EmailOutbox.objects.values_list("to_email", flat=True)),
+            ["other@example.com", "traveler@example.com"],
+        )
+
+
+class GuideDigestTests(TestCase):
+    """Un resumen por guía con digest activado, agregado en una query y sin reenvíos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.traveler = create_traveler()
+        cls.guide = create_guide(email="guide@example.com")
+        cls.other_guide = create_guide("other", email="other@example.com")
+        cls.no_digest = create_guide("instant", email="instant@example.com")
+        GuideProfile.objects.filter(user__in=[cls.guide, cls.other_guide]).update(digest_notifications=True)
+
+        cls.experience = create_experience(cls.guide)
+        second = create_experience(cls.guide, title="Famara")
+        for experience in (cls.experience, second):
+            cls._unseen(experience)
+        cls._unseen(cls.experience, status=Booking.Status.CANCEL_REQUESTED)
+        cls._unseen(cls.experience, status=Booking.Status.ACCEPTED)
+        create_booking(cls.experience, cls.traveler, seen_by_guide=True)
+        cls._unseen(create_experience(cls.other_guide), status=Booking.Status.CHANGE_REQUESTED)
+        cls._unseen(create_experience(cls.no_digest))
+
+    @classmethod
+    def _unseen(cls, experience, **fields):
+        return create_booking(experience, cls.traveler, seen_by_guide=False, **fields)
+
+    def _digests(self):
+        return {item.to_email: item.message for item in EmailOutbox.objects.all()}
+
+    def test_one_grouped_digest_per_guide(self):
+        out = StringIO()
+        # agregado + guías + INSERT y UPDATE (entre SAVEPOINT/RELEASE)
+        with self.assertNumQueries(6):
+            call_command("send_guide_digests", stdout=out)
+        self.assertIn("Queued 2 digests", out.getvalue())
+
+        digests = self._digests()
+        self.assertEqual(sorted(digests), ["guide@example.com", "other@example.com"])
+        self.assertIn("- Nuevas reservas pendientes: 2", digests["guide@example.com"])
+        self.assertIn("- Solicitudes de cancelación: 1", digests["guide@example.com"])
+        self.assertNotIn("Solicitudes de cambio", digests["guide@example.com"])
+        self.assertIn("- Solicitudes de cambio: 1", digests["other@example.com"])
+
+    def test_rerun_only_sends_new_activity(self):
+        send_guide_digests()
+        EmailOutbox.objects.all().delete()
+        self.assertEqual(send_guide_digests(), 0)
+
+        self._unseen(self.experience)
+        self.assertEqual(send_guide_digests(), 1)
+        self.assertIn("- Nuevas reservas pendientes: 1", self._digests()["guide@example.com"])
@@ -1,6 +1,7 @@
 from decimal import Decimal
 from urllib import request
 from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
 from django.urls import reverse
 
 from django.contrib import messages
@@ -8,11 +9,12 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 
-from apps.availability.services import is_date_available
+from apps.availability.services import save_with_capacity
 from apps.experiences.models import Experience
 from core.decorators import guide_required
-from .emails import send_booking_status_email
+from .emails import guide_wants_digest, queue_booking_email, with_email_relations
 from .forms import BookingForm, BookingDecisionForm
+from .inbox import INBOX_TABS, guide_inbox_queryset, inbox_counts, inbox_filters, inbox_page
 from .models import Booking
 from .forms import BookingChangeRequestForm
 
@@ -107,25 +109,7 @@ def create_booking(request, experience_id):
         booking.save()
 
         # Email al viajero
-        message = (
-            f"¡Solicitud de reserva enviada!\n\n"
-            f"Tu solicitud está pendiente de confirmación por el guía.\n\n"
-            f"Experiencia: {booking.experience.title}\n"
-            f"Fecha solicitada: {booking.date}\n\n"
-            f"Grupo:\n"
-            f"- Adultos: {booking.adults}\n"
-            f"- Niños: {booking.children}\n"
-            f"- Bebés: {booking.infants}\n\n"
-            f"Transporte: {booking.get_transport_mode_display()}\n"
-            f"{'Zona/Hotel del viajero: ' + booking.pickup_notes + chr(10) if booking.pickup_notes else ''}"
-            f"\nTotal estimado: {booking.total_price}€\n\n"
-            f"Cuando el guía responda, te avisaremos.\n"
-        )
-        send_booking_status_email(
-            to_email=booking.traveler.email,
-            subject="Solicitud de reserva enviada - LanzaXperience",
-            message=message,
-        )
+        queue_booking_email("created", booking)
 
         messages.success(request, "Reserva enviada al guía.")
         return redirect("bookings:traveler_list")
@@ -145,11 +129,41 @@ def traveler_bookings(request):
 
 @guide_required
 def guide_bookings(request):
-    bookings = (
-        Booking.objects.filter(experience__guide=request.user)
-        .select_related("experience", "traveler")
-    )
-    return render(request, "bookings/guide_list.html", {"bookings": bookings})
+    filters = inbox_filters(request.GET)
+    today = timezone.localdate()
+    bookings = guide_inbox_queryset(request.user, filters)
+
+    counts = inbox_counts(bookings, today)
+    page = inbox_page(bookings, filters, today, request.GET.get("cursor"))
+
+    base_params = {
+        key: value.isoformat()
+        for key, value in (("date_from", filters["date_from"]), ("date_to", filters["date_to"]))
+        if value
+    }
+    list_url = reverse("bookings:guide_list")
+    tabs = [
+        {
+            "key": key,
+            "label": label,
+            "count": counts[key],
+            "selected": key == filters["tab"],
+            "url": f"{list_url}?{urlencode({**base_params, 'tab': key})}",
+        }
+        for key, (label, _) in INBOX_TABS.items()
+    ]
+    next_page_url = None
+    if page.has_next:
+        next_page_url = f"{list_url}?{urlencode({**base_params, 'tab': filters['tab'], 'cursor': page.next_cursor})}"
+
+    return render(request, "bookings/guide_list.html", {
+        "bookings": page.items,
+        "tabs": tabs,
+        "filters": filters,
+        "next_page_url": next_page_url,
+        "is_first_page": not request.GET.get("cursor"),
+        "first_page_url": f"{list_url}?{urlencode({**base_params, 'tab': filters['tab']})}",
+    })
 
 
 @login_required
@@ -181,7 +195,7 @@ def booking_detail(request, pk):
 
 @guide_required
 def accept_booking(request, pk):
-    booking = get_object_or_404(Booking, pk=pk, experience__guide=request.user)
+    booking = get_object_or_404(with_email_relations(Booking.objects), pk=pk, experience__guide=request.user)
     if booking.status not in [Booking.Status.PENDING, Booking.Status.ACCEPTED]:
         messages.warning(request, "Esta reserva no se puede gestionar desde aquí.")
         return redirect("bookings:detail", pk=booking.pk)
@@ -196,43 +210,19 @@ def accept_booking(request, pk):
         if form.is_valid():
             booking = form.save(commit=False)
 
-            people = booking.people
-            ok, msg = is_date_available(
-                booking.experience,
-                booking.date,
-                people,
-                exclude_booking_id=booking.id,
-            )
-
-            if not ok:
-                messages.error(request, msg or "Ya no hay disponibilidad para esa fecha.")
-                return redirect("bookings:detail", pk=booking.pk)
-
             booking.status = Booking.Status.ACCEPTED
             booking.seen_by_traveler = False
             booking.seen_by_guide = True
             if booking.responded_at is None:
                 booking.responded_at = timezone.now()
 
-            booking.save()
+            # Revalidar y guardar como reserva atómica de cupo (sin overbooking)
+            ok, msg = save_with_capacity(booking)
+            if not ok:
+                messages.error(request, msg or "Ya no hay disponibilidad para esa fecha.")
+                return redirect("bookings:detail", pk=booking.pk)
 
-            send_booking_status_email(
-                to_email=booking.traveler.email,
-                subject="Reserva aceptada - LanzaXperience",
-                message=(
-                    f"¡Tu reserva ha sido CONFIRMADA!\n\n"
-                    f"Experiencia: {booking.experience.title}\n"
-                    f"Fecha: {booking.date}\n\n"
-                    f"Grupo:\n"
-                    f"- Adultos: {booking.adults}\n"
-                    f"- Niños: {booking.children}\n"
-                    f"- Bebés: {booking.infants}\n\n"
-                    f"Transporte: {booking.get_transport_mode_display()}\n"
-                    f"Recogida: {booking.pickup_notes or 'Por concretar con el guía'}\n\n"
-                    f"Total: {booking.total_price}€\n\n"
-                    f"Mensaje del guía:\n{booking.guide_response or '-'}\n"
-                ),
-            )
+            queue_booking_email("accepted", booking)
 
             messages.success(request, "Reserva aceptada.")
             return redirect("bookings:guide_list")
@@ -244,7 +234,7 @@ def accept_booking(request, pk):
 
 @guide_required
 def reject_booking(request, pk):
-    booking = get_object_or_404(Booking, pk=pk, experience__guide=request.user)
+    booking = get_object_or_404(with_email_relations(Booking.objects), pk=pk, experience__guide=request.user)
     if booking.status != Booking.Status.PENDING:
         messages.warning(request, "Esta reserva ya fue gestionada y no se puede rechazar.")
         return redirect("bookings:detail", pk=booking.pk)
@@ -267,24 +257,7 @@ def reject_booking(request, pk):
 
             booking.save()
 
-            send_booking_status_email(
-                to_email=booking.traveler.email,
-                subject="Reserva rechazada - LanzaXperience",
-                message=(
-                    f"Tu solicitud de reserva ha sido RECHAZADA.\n\n"
-                    f"Experiencia: {booking.experience.title}\n"
-                    f"Fecha solicitada: {booking.date}\n\n"
-                    f"Grupo:\n"
-                    f"- Adultos: {booking.adults}\n"
-                    f"- Niños: {booking.children}\n"
-                    f"- Bebés: {booking.infants}\n\n"
-                    f"Transporte: {booking.get_transport_mode_display()}\n"
-                    f"Punto de recogida: {booking.pickup_notes or 'No especificado'}\n\n"
-                    f"Precio por adulto: {booking.unit_price}€\n"
-                    f"Total estimado: {booking.total_price}€\n\n"
-                    f"Mensaje del guía:\n{booking.guide_response or '-'}\n"
-                ),
-            )
+            queue_booking_email("rejected", booking)
 
             messages.success(request, "Reserva rechazada.")
             return redirect("bookings:guide_list")
@@ -350,7 +323,7 @@ def request_booking_change(request, pk):
 
 @guide_required
 def decide_change_request(request, pk, decision):
-    booking = get_object_or_404(Booking, pk=pk, experience__guide=request.user)
+    booking = get_object_or_404(with_email_relations(Booking.objects), pk=pk, experience__guide=request.user)
 
     if booking.status != Booking.Status.CHANGE_REQUESTED:
         messages.warning(request, "No hay solicitud de cambio pendiente.")
@@ -395,21 +368,7 @@ def decide_change_request(request, pk, decision):
             reverse("bookings:detail", kwargs={"pk": booking.pk})
         )
 
-        send_booking_status_email(
-            to_email=booking.traveler.email,
-            subject="Cambio de fecha rechazado - LanzaXperience",
-            message=(
-                f"El guía ha rechazado tu solicitud de cambio.\n\n"
-                f"Experiencia: {booking.experience.title}\n"
-                f"Fecha actual: {booking.date}\n\n"
-                f"Puedes elegir:\n"
-                f"1) Mantener la fecha original (no tienes que hacer nada).\n"
-                f"2) Cancelar sin penalización (aunque falten menos de 48h).\n\n"
-                f"👉 Cancelar gratis: {cancel_url}\n"
-                f"👉 Ver reserva: {detail_url}\n\n"
-                f"Si necesitas ayuda, contacta con soporte."
-            ),
-        )
+        queue_booking_email("change_rejected", booking, cancel_url=cancel_url, detail_url=detail_url)
 
         messages.success(request, "Cambio rechazado.")
         return redirect("bookings:guide_list")
@@ -437,17 +396,6 @@ def decide_change_request(request, pk, decision):
     children_unit = unit_price * Decimal("0.5")
     booking.total_price = (unit_price * Decimal(booking.adults or 0)) + (children_unit * Decimal(booking.children or 0))
 
-    # Validar disponibilidad final (por seguridad)
-    ok, msg = is_date_available(
-        booking.experience,
-        booking.date,
-        booking.people,          # people se recalcula en save() por tu modelo
-        exclude_booking_id=booking.pk,
-    )
-    if not ok:
-        messages.error(request, msg or "Ya no hay disponibilidad para esa fecha.")
-        return redirect("bookings:detail", pk=booking.pk)
-
     # Limpiar solicitud y registrar actualización
     booking.extras.pop("change_request", None)
     booking.extras.pop("pre_change_status", None)
@@ -464,7 +412,12 @@ def decide_change_request(request, pk, decision):
     booking.responded_at = timezone.now()
     booking.seen_by_traveler = False
     booking.seen_by_guide = True
-    booking.save()
+
+    # Validar disponibilidad final y guardar como reserva atómica de cupo
+    ok, msg = save_with_capacity(booking)
+    if not ok:
+        messages.error(request, msg or "Ya no hay disponibilidad para esa fecha.")
+        return redirect("bookings:detail", pk=booking.pk)
 
     messages.success(request, "Cambio aceptado. Confirma la hora y el punto de encuentro.")
     return redirect("bookings:accept", pk=booking.pk)
@@ -472,7 +425,7 @@ def decide_change_request(request, pk, decision):
 
 @guide_required
 def decide_cancel_request(request, pk, decision):
-    booking = get_object_or_404(Booking, pk=pk, experience__guide=request.user)
+    booking = get_object_or_404(with_email_relations(Booking.objects), pk=pk, experience__guide=request.user)
 
     # Debe existir una solicitud pendiente
     if booking.status != Booking.Status.CANCEL_REQUESTED:
@@ -513,16 +466,7 @@ def decide_cancel_request(request, pk, decision):
             "seen_by_traveler", "seen_by_guide", "updated_at"
         ])
 
-        send_booking_status_email(
-            to_email=booking.traveler.email,
-            subject="Solicitud de cancelación rechazada - LanzaXperience",
-            message=(
-                f"El guía ha rechazado tu solicitud de cancelación.\n\n"
-                f"Experiencia: {booking.experience.title}\n"
-                f"Fecha: {booking.date}\n\n"
-                f"Si necesitas ayuda, contacta con soporte."
-            ),
-        )
+        queue_booking_email("cancel_rejected", booking)
 
         messages.success(request, "Cancelación rechazada.")
         return redirect("bookings:guide_list")
@@ -545,15 +489,7 @@ def decide_cancel_request(request, pk, decision):
         "seen_by_traveler", "seen_by_guide", "updated_at"
     ])
 
-    send_booking_status_email(
-        to_email=booking.traveler.email,
-        subject="Solicitud de cancelación aceptada - LanzaXperience",
-        message=(
-            f"Tu solicitud de cancelación para {booking.experience.title} el {booking.date} "
-            f"ha sido aceptada.\n\n"
-            f"Si corresponde algún reembolso, se procesará según la política aplicable."
-        ),
-    )
+    queue_booking_email("cancel_accepted", booking)
 
     messages.success(request, "Reserva cancelada correctamente.")
     return redirect("bookings:guide_list")
@@ -561,7 +497,7 @@ def decide_cancel_request(request, pk, decision):
 
 @login_required
 def request_booking_cancel(request, pk):
-    booking = get_object_or_404(Booking, pk=pk, traveler=request.user)
+    booking = get_object_or_404(with_email_relations(Booking.objects), pk=pk, traveler=request.user)
 
     # No se puede cancelar si ya está cerrada
     if booking.status in [Booking.Status.REJECTED, Booking.Status.CANCELED]:
@@ -612,28 +548,11 @@ def request_booking_cancel(request, pk):
             ])
 
             # Email al viajero confirmando su cancelación
-            send_booking_status_email(
-                to_email=booking.traveler.email,
-                subject="Reserva cancelada - LanzaXperience",
-                message=(
-                    f"Tu reserva para {booking.experience.title} el {booking.date} "
-                    f"ha sido cancelada correctamente.\n\n"
-                    f"{'Motivo: ' + reason if reason else ''}"
-                ),
-            )
+            queue_booking_email("cancel_free", booking, reason=reason)
 
-            # Email al guía informando
-            send_booking_status_email(
-                to_email=booking.experience.guide.email,
-                subject="Reserva cancelada por el viajero - LanzaXperience",
-                message=(
-                    f"El viajero ha cancelado una reserva.\n\n"
-                    f"Experiencia: {booking.experience.title}\n"
-                    f"Fecha: {booking.date}\n"
-                    f"Viajero: {booking.traveler.username}\n\n"
-                    f"{'Motivo: ' + reason if reason else ''}"
-                ),
-            )
+            # Email al guía informando (si usa resumen periódico, va en el digest)
+            if not guide_wants_digest(booking.experience.guide):
+                queue_booking_email("cancel_free_guide", booking, reason=reason)
 
             messages.success(request, "Reserva cancelada correctamente.")
             return redirect("bookings:traveler_list")
@@ -4,3 +4,6 @@ class ExperiencesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.experiences"
     label = "experiences"
+
+    def ready(self):
+        import apps.experiences.signals  # noqa
@@ -0,0 +1,75 @@
+"""
+Cache de resultados del catálogo público.
+
+Se guarda la lista ordenada de IDs de cada página (no las tarjetas): con cache
+hit la página cuesta una query por PK (for_cards) en vez de los joins y filtros
+del catálogo, y las tarjetas siempre salen con datos frescos.
+
+Las claves llevan un contador de generación que se incrementa al cambiar
+Experience, Category, la verificación o el avatar de GuideProfile o el nombre
+de un guía (ver signals.py): las entradas viejas dejan de leerse y caducan
+solas por TTL.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.pagination import KeysetPage
+from .models import Experience
+
+
+CATALOGUE_CACHE_TIMEOUT = getattr(settings, "EXPERIENCE_CATALOGUE_CACHE_TIMEOUT", 300)
+
+GENERATION_KEY = "experiences:catalogue:generation"
+
+
+def catalogue_generation() -> int:
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Si la cache pierde el contador no debe volver a un valor ya usado
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_catalogue_generation() -> None:
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+
+
+def catalogue_key(prefix: str, *parts) -> str:
+    """Clave versionada con la generación actual; `parts` deben ser serializables a JSON."""
+    digest = hashlib.md5(json.dumps(parts, separators=(",", ":")).encode()).hexdigest()
+    return f"experiences:{prefix}:{catalogue_generation()}:{digest}"
+
+
+def hydrate_cards(ids: list[int]) -> list[Experience]:
+    """Tarjetas de `ids` en ese orden, en una query (las que ya no existan se omiten)."""
+    by_id = Experience.objects.for_cards().in_bulk(ids)
+    return [by_id[pk] for pk in ids if pk in by_id]
+
+
+def cached_ids(key: str, compute) -> list[Experience]:
+    """`compute()` devuelve las experiencias; se cachean sus IDs en orden."""
+    ids = cache.get(key)
+    if ids is None:
+        experiences = list(compute())
+        cache.set(key, [experience.pk for experience in experiences], CATALOGUE_CACHE_TIMEOUT)
+        return experiences
+    return hydrate_cards(ids)
+
+
+def cached_page(key: str, paginate) -> KeysetPage:
+    """Como cached_ids() para una página por cursor: guarda IDs + siguiente cursor."""
+    entry = cache.get(key)
+    if entry is None:
+        page = paginate()
+        cache.set(key, ([item.pk for item in page.items], page.next_cursor), CATALOGUE_CACHE_TIMEOUT)
+        return page
+    ids, next_cursor = entry
+    return KeysetPage(items=hydrate_cards(ids), next_cursor=next_cursor)
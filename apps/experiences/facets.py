@@ -0,0 +1,141 @@
+"""
+Facetas del catálogo: cuántos resultados hay por categoría, franja de precio y
+duración con los filtros actuales.
+
+Cada faceta se cuenta con el resto de filtros aplicados pero no el suyo (así se
+ven las alternativas a la categoría elegida), todo en una sola query agrupada
+por categoría con COUNT condicionales. El resultado se cachea por firma de
+filtros normalizada (sin orden ni cursor) y se invalida con la generación del
+catálogo (ver caching.py). Con fecha o nº de personas no se cachea: la
+disponibilidad depende de la ocupación, que cambia con cada reserva aceptada
+sin mover la generación.
+"""
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .caching import catalogue_key
+from .search import tokenize
+
+
+FACETS_CACHE_TIMEOUT = getattr(settings, "EXPERIENCE_FACETS_CACHE_TIMEOUT", 300)
+
+# Franjas de precio [desde, hasta) en euros; None = sin límite
+PRICE_BANDS = ((0, 30), (30, 60), (60, 100), (100, None))
+# Duración máxima en minutos (acumulativas, igual que el filtro max_duration)
+DURATION_LIMITS = (60, 120, 240, 480)
+
+
+def _decimal(value: str):
+    try:
+        number = Decimal(value) if value else None
+    except InvalidOperation:
+        return None
+    return number if number is None or number.is_finite() else None
+
+
+def _int(value: str):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def facet_conditions(filters: dict) -> dict[str, Q]:
+    """Q de cada filtro facetado (categoría, precio, duración). Valores inválidos se ignoran."""
+    conditions = {"category": Q(), "price": Q(), "duration": Q()}
+
+    if filters.get("category"):
+        conditions["category"] = Q(category__slug=filters["category"])
+
+    min_price = _decimal(filters.get("min_price"))
+    if min_price is not None:
+        conditions["price"] &= Q(price__gte=min_price)
+    max_price = _decimal(filters.get("max_price"))
+    if max_price is not None:
+        conditions["price"] &= Q(price__lte=max_price)
+
+    max_duration = _int(filters.get("max_duration"))
+    if max_duration is not None:
+        conditions["duration"] = Q(duration_minutes__lte=max_duration)
+
+    return conditions
+
+
+def facet_signature(filters: dict) -> str:
+    """Clave estable para la misma búsqueda escrita de distintas formas ("Volcán" == "volcan ")."""
+    min_price = _decimal(filters.get("min_price"))
+    max_price = _decimal(filters.get("max_price"))
+    normalized = {
+        "q": tokenize(filters.get("q", "")),
+        "category": filters.get("category", ""),
+        "min_price": str(min_price.normalize()) if min_price is not None else None,
+        "max_price": str(max_price.normalize()) if max_price is not None else None,
+        "max_duration": _int(filters.get("max_duration")),
+    }
+    raw = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _count(condition: Q) -> Count:
+    return Count("id", filter=condition) if condition else Count("id")
+
+
+def _price_band(low, high) -> Q:
+    condition = Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def count_facets(queryset, filters: dict) -> dict:
+    """
+    Una query agrupada por categoría sobre `queryset` (catálogo con búsqueda y
+    disponibilidad, sin filtros facetados). Devuelve
+    {"categories": {slug: n}, "price": [n por franja], "duration": [n por límite]}.
+    """
+    conditions = facet_conditions(filters)
+
+    aggregates = {"category_total": _count(conditions["price"] & conditions["duration"])}
+    for i, (low, high) in enumerate(PRICE_BANDS):
+        aggregates[f"price_{i}"] = _count(_price_band(low, high) & conditions["duration"])
+    for i, limit in enumerate(DURATION_LIMITS):
+        aggregates[f"duration_{i}"] = _count(Q(duration_minutes__lte=limit) & conditions["price"])
+
+    rows = queryset.values("category__slug").annotate(**aggregates).order_by()
+
+    selected = filters.get("category")
+    facets = {
+        "categories": {},
+        "price": [0] * len(PRICE_BANDS),
+        "duration": [0] * len(DURATION_LIMITS),
+    }
+    for row in rows:
+        slug = row["category__slug"]
+        if slug:
+            facets["categories"][slug] = row["category_total"]
+        # Precio y duración: solo las filas de la categoría elegida
+        if selected and slug != selected:
+            continue
+        for i in range(len(PRICE_BANDS)):
+            facets["price"][i] += row[f"price_{i}"]
+        for i in range(len(DURATION_LIMITS)):
+            facets["duration"][i] += row[f"duration_{i}"]
+    return facets
+
+
+def catalogue_facets(queryset, filters: dict) -> dict:
+    """count_facets() cacheado por firma de filtros (y generación del catálogo). Cache hit = 0 queries."""
+    if filters.get("date") or filters.get("people"):
+        return count_facets(queryset, filters)
+
+    key = catalogue_key("facets", facet_signature(filters))
+    facets = cache.get(key)
+    if facets is None:
+        facets = count_facets(queryset, filters)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.images import backfill_variants
+
+
+class Command(BaseCommand):
+    help = "Build responsive WebP/JPEG variants and dimensions for existing experience images and guide avatars"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Worker processes (default: one per CPU, 1 = no process pool).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild variants that already exist.",
+        )
+
+    def handle(self, *args, **options):
+        done, failed = backfill_variants(workers=options["workers"], force=options["force"])
+        self.stdout.write(self.style.SUCCESS(f"Done. Built variants for {done} images ({failed} unreadable)."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.experiences.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the experience full-text search documents and backend index"
+
+    def handle(self, *args, **options):
+        total = rebuild_index()
+        backend = type(get_backend()).__name__
+        self.stdout.write(self.style.SUCCESS(f"Done. Indexed {total} experiences ({backend})."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.experiences.popularity import HALF_LIFE_DAYS, refresh_popularity
+
+
+class Command(BaseCommand):
+    help = "Recompute Experience.popularity from PENDING/ACCEPTED bookings (with time decay if configured)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--half-life-days",
+            type=float,
+            default=HALF_LIFE_DAYS,
+            help="Half-life of a booking's weight in days (default: EXPERIENCE_POPULARITY_HALF_LIFE_DAYS, none = plain count).",
+        )
+
+    def handle(self, *args, **options):
+        changed = refresh_popularity(options["half_life_days"])
+        self.stdout.write(self.style.SUCCESS(f"Done. Updated {changed} experiences."))
@@ -0,0 +1,346 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as time_type, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from apps.accounts.models import User
+from apps.availability.models import AvailabilityBlock, ExperienceAvailability
+from apps.availability.services import rebuild_occupancy
+from apps.bookings.badges import reconcile_badges
+from apps.bookings.models import Booking
+from apps.bookings.rollups import rebuild_rollups
+from apps.experiences.caching import bump_catalogue_generation
+from apps.experiences.models import Category, Experience
+from apps.experiences.popularity import refresh_popularity
+from apps.experiences.search import rebuild_index
+from apps.profiles.models import GuideProfile, TravelerProfile
+from apps.reviews.models import Review
+from .seed_categories import DEFAULT_CATEGORIES
+
+
+PLACES = ["Timanfaya", "Famara", "La Graciosa", "Papagayo", "Teguise", "La Geria", "Haría", "El Golfo", "Órzola"]
+ACTIVITIES = ["Ruta", "Paseo", "Excursión", "Tour", "Cata", "Kayak", "Snorkel", "Atardecer", "Bici"]
+TAGS = ["volcanes", "lava", "playa", "vino", "senderismo", "fotografía", "familia", "surf", "mirador"]
+
+# Peso de cada estado en las reservas generadas (todos aparecen)
+STATUS_WEIGHTS = {
+    Booking.Status.ACCEPTED: 45,
+    Booking.Status.PENDING: 20,
+    Booking.Status.REJECTED: 10,
+    Booking.Status.CANCELED: 12,
+    Booking.Status.CHANGE_REQUESTED: 7,
+    Booking.Status.CANCEL_REQUESTED: 6,
+}
+LANGUAGES = [code for code, _ in Booking.Language.choices if code]
+TRANSPORT_MODES = [code for code, _ in Booking.TransportMode.choices]
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """Desactiva auto_now/auto_now_add para escribir fechas históricas con bulk_create."""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible load-testing dataset: verified guides, travelers, experiences, "
+        "availability rules and blocks, bookings in every status and reviews (bulk_create in batches)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--guides", type=int, default=200)
+        parser.add_argument("--travelers", type=int, default=5000)
+        parser.add_argument("--experiences-per-guide", type=int, default=5)
+        parser.add_argument("--bookings", type=int, default=100_000)
+        parser.add_argument(
+            "--review-rate",
+            type=float,
+            default=0.3,
+            help="Share of past accepted bookings that get a review (default: 0.3).",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed = same dataset).")
+        parser.add_argument(
+            "--anchor-date",
+            default=None,
+            help="Date the dataset is built around, YYYY-MM-DD (default: today).",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix",
+            default="load",
+            help="Username prefix for the generated users (must not exist yet).",
+        )
+        parser.add_argument(
+            "--skip-derived",
+            action="store_true",
+            help="Do not rebuild occupancy, rollups, popularity, search index and badges afterwards.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.prefix = options["prefix"]
+        self.anchor = (
+            datetime.strptime(options["anchor_date"], "%Y-%m-%d").date()
+            if options["anchor_date"]
+            else timezone.localdate()
+        )
+
+        if User.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise CommandError(f"Users with prefix '{self.prefix}_' already exist. Use another --prefix or a fresh database.")
+
+        started = time.monotonic()
+        with manual_timestamps(Experience, Booking, Review):
+            guide_ids = self._create_users(User.Role.GUIDE, options["guides"])
+            traveler_ids = self._create_users(User.Role.TRAVELER, options["travelers"])
+            experiences = self._create_experiences(guide_ids, options["experiences_per_guide"])
+            self._create_availability(experiences)
+            bookings = self._create_bookings(experiences, traveler_ids, options["bookings"])
+            reviews = self._create_reviews(options["review_rate"])
+
+        if not options["skip_derived"]:
+            self._rebuild_derived()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {len(guide_ids)} guides, {len(traveler_ids)} travelers, {len(experiences)} experiences, "
+            f"{bookings} bookings, {reviews} reviews in {time.monotonic() - started:.0f}s."
+        ))
+
+    def _log(self, message):
+        self.stdout.write(f"  {message}")
+
+    def _bulk_create(self, model, rows) -> int:
+        """Inserta un iterable de instancias en lotes (una transacción por lote)."""
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                with transaction.atomic():
+                    model.objects.bulk_create(batch, batch_size=self.batch_size)
+                total += len(batch)
+                batch = []
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            total += len(batch)
+        return total
+
+    def _aware(self, day, hour=None):
+        moment = time_type(hour if hour is not None else self.rng.randrange(8, 22), self.rng.randrange(60))
+        return timezone.make_aware(datetime.combine(day, moment))
+
+    def _create_users(self, role, count) -> list[int]:
+        # Contraseña inutilizable: ningún usuario de carga puede iniciar sesión
+        password = make_password(None)
+        now = timezone.now()
+        self._bulk_create(User, (
+            User(
+                username=f"{self.prefix}_{role}_{i}",
+                email=f"{self.prefix}_{role}_{i}@example.com",
+                first_name=self.rng.choice(["Ana", "Luis", "Marta", "Pedro", "Lucía", "Jorge", "Elena"]),
+                last_name=self.rng.choice(["García", "Pérez", "Cabrera", "Betancort", "Martín", "Hernández"]),
+                role=role,
+                password=password,
+                date_joined=now,
+            )
+            for i in range(count)
+        ))
+        ids = list(
+            User.objects.filter(username__startswith=f"{self.prefix}_{role}_")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+        # bulk_create no dispara la señal que crea los perfiles
+        if role == User.Role.GUIDE:
+            self._bulk_create(GuideProfile, (
+                GuideProfile(
+                    user_id=user_id,
+                    display_name=f"Guía {i}",
+                    bio="Guía local en Lanzarote.",
+                    languages="ES, EN",
+                    verification_status=GuideProfile.VerificationStatus.VERIFIED,
+                    verified_at=now,
+                )
+                for i, user_id in enumerate(ids)
+            ))
+        else:
+            self._bulk_create(TravelerProfile, (
+                TravelerProfile(user_id=user_id, display_name=f"Viajero {i}")
+                for i, user_id in enumerate(ids)
+            ))
+
+        self._log(f"{len(ids)} {role}s")
+        return ids
+
+    def _create_experiences(self, guide_ids, per_guide) -> list[tuple[int, Decimal, int]]:
+        Category.objects.bulk_create(
+            [Category(name=name, slug=slugify(name)) for name in DEFAULT_CATEGORIES],
+            ignore_conflicts=True,
+        )
+        category_ids = list(Category.objects.order_by("id").values_list("id", flat=True))
+
+        def rows():
+            for guide_id in guide_ids:
+                for _ in range(per_guide):
+                    place = self.rng.choice(PLACES)
+                    created = self._aware(self.anchor - timedelta(days=self.rng.randrange(30, 730)))
+                    yield Experience(
+                        guide_id=guide_id,
+                        category_id=self.rng.choice(category_ids) if self.rng.random() < 0.9 else None,
+                        title=f"{self.rng.choice(ACTIVITIES)} por {place}",
+                        description=f"Experiencia guiada por {place}. " * 5,
+                        price=Decimal(self.rng.randrange(15, 180)),
+                        duration_minutes=self.rng.choice([60, 90, 120, 180, 240, 360, 480]),
+                        max_people=self.rng.choice([4, 6, 8, 12, 20]),
+                        location=f"{place}, Lanzarote",
+                        tags=", ".join(self.rng.sample(TAGS, 3)),
+                        is_active=self.rng.random() < 0.95,
+                        created_at=created,
+                        updated_at=created,
+                    )
+
+        self._bulk_create(Experience, rows())
+        experiences = list(
+            Experience.objects.filter(guide_id__in=guide_ids)
+            .order_by("id")
+            .values_list("id", "price", "max_people")
+        )
+        self._log(f"{len(experiences)} experiences")
+        return experiences
+
+    def _create_availability(self, experiences):
+        self._bulk_create(ExperienceAvailability, (
+            ExperienceAvailability(
+                experience_id=experience_id,
+                weekdays=sorted(self.rng.sample(range(7), self.rng.randrange(3, 8))),
+                start_date=self.anchor - timedelta(days=365),
+                end_date=self.anchor + timedelta(days=365) if self.rng.random() < 0.5 else None,
+                daily_capacity_people=max_people * 2 if self.rng.random() < 0.7 else None,
+                daily_capacity_bookings=self.rng.choice([None, 2, 4]),
+            )
+            for experience_id, _, max_people in experiences
+        ))
+
+        availability_ids = ExperienceAvailability.objects.filter(
+            experience_id__in=[experience_id for experience_id, _, _ in experiences],
+        ).values_list("id", flat=True)
+
+        def blocks():
+            for availability_id in availability_ids.iterator():
+                for offset in self.rng.sample(range(-90, 180), self.rng.randrange(0, 6)):
+                    yield AvailabilityBlock(
+                        availability_id=availability_id,
+                        date=self.anchor + timedelta(days=offset),
+                        reason=self.rng.choice(["Vacaciones", "Mantenimiento", "Alerta meteorológica", ""]),
+                    )
+
+        self._log(f"{self._bulk_create(AvailabilityBlock, blocks())} availability blocks")
+
+    def _create_bookings(self, experiences, traveler_ids, count) -> int:
+        statuses = list(STATUS_WEIGHTS)
+        status_weights = list(accumulate(STATUS_WEIGHTS.values()))
+        # Unas experiencias mucho más populares que otras (cola larga). Pesos
+        # acumulados precalculados: choices() no los recalcula en cada reserva
+        experience_weights = list(accumulate(1 / (rank + 1) ** 0.6 for rank in range(len(experiences))))
+        half = Decimal("0.5")
+
+        def rows():
+            for i in range(count):
+                # Garantiza todos los estados aunque el volumen sea pequeño
+                status = statuses[i] if i < len(statuses) else self.rng.choices(statuses, cum_weights=status_weights)[0]
+                experience_id, price, _ = self.rng.choices(experiences, cum_weights=experience_weights)[0]
+                date = self.anchor + timedelta(days=self.rng.randrange(-365, 180))
+                created_day = min(date, self.anchor) - timedelta(days=self.rng.randrange(1, 60))
+                created = self._aware(created_day)
+                adults = self.rng.randrange(1, 5)
+                children = self.rng.choice([0, 0, 0, 1, 2])
+                infants = self.rng.choice([0, 0, 0, 0, 1])
+                responded = status != Booking.Status.PENDING
+                yield Booking(
+                    experience_id=experience_id,
+                    traveler_id=self.rng.choice(traveler_ids),
+                    date=date,
+                    adults=adults,
+                    children=children,
+                    infants=infants,
+                    people=adults + children + infants,
+                    transport_mode=self.rng.choice(TRANSPORT_MODES),
+                    preferred_language=self.rng.choice(LANGUAGES),
+                    unit_price=price,
+                    total_price=price * adults + price * half * children,
+                    status=status,
+                    seen_by_traveler=self.rng.random() < 0.9,
+                    seen_by_guide=self.rng.random() < (0.7 if status == Booking.Status.PENDING else 0.97),
+                    created_at=created,
+                    updated_at=created + timedelta(hours=self.rng.randrange(1, 72)) if responded else created,
+                    responded_at=created + timedelta(hours=self.rng.randrange(1, 72)) if responded else None,
+                )
+
+        total = self._bulk_create(Booking, rows())
+        self._log(f"{total} bookings")
+        return total
+
+    def _create_reviews(self, rate) -> int:
+        past_accepted = (
+            Booking.objects.filter(
+                traveler__username__startswith=f"{self.prefix}_",
+                status=Booking.Status.ACCEPTED,
+                date__lt=self.anchor,
+            )
+            .order_by("id")
+            .values_list("id", "experience_id", "traveler_id", "date")
+        )
+
+        def rows():
+            # Una reseña por (experiencia, viajero)
+            reviewed = set()
+            for booking_id, experience_id, traveler_id, date in past_accepted.iterator(chunk_size=self.batch_size):
+                if (experience_id, traveler_id) in reviewed or self.rng.random() >= rate:
+                    continue
+                reviewed.add((experience_id, traveler_id))
+                created = self._aware(date + timedelta(days=self.rng.randrange(1, 14)))
+                flagged = self.rng.random() < 0.03
+                yield Review(
+                    experience_id=experience_id,
+                    traveler_id=traveler_id,
+                    booking_id=booking_id,
+                    rating=self.rng.choices([1, 2, 3, 4, 5], [2, 3, 10, 35, 50])[0],
+                    comment=self.rng.choice(["Increíble.", "Muy recomendable.", "Bien organizado.", "Mejorable.", ""]),
+                    status=Review.Status.FLAGGED if flagged else Review.Status.PUBLISHED,
+                    flagged_reason="Posible spam" if flagged else "",
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        total = self._bulk_create(Review, rows())
+        self._log(f"{total} reviews")
+        return total
+
+    def _rebuild_derived(self):
+        # bulk_create salta las señales: ledgers, rollups, índices y caches se recalculan de golpe
+        self._log(f"{rebuild_occupancy()} occupancy rows")
+        self._log(f"{rebuild_rollups()} rollup rows")
+        self._log(f"{refresh_popularity()} popularity scores")
+        self._log(f"{rebuild_index()} search documents")
+        self._log(f"{reconcile_badges()} badge counters")
+        bump_catalogue_generation()
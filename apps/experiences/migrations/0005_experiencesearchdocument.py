@@ -0,0 +1,127 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:09
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FTS_TABLE = "experiences_search_fts"
+DOC_TABLE = "experiences_experiencesearchdocument"
+GIN_INDEX = "experiences_search_gin"
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, keywords, body,
+        content='{DOC_TABLE}',
+        content_rowid='experience_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOC_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, keywords, body)
+        VALUES (new.experience_id, new.title, new.keywords, new.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOC_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, keywords, body)
+        VALUES ('delete', old.experience_id, old.title, old.keywords, old.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOC_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, keywords, body)
+        VALUES ('delete', old.experience_id, old.title, old.keywords, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, keywords, body)
+        VALUES (new.experience_id, new.title, new.keywords, new.body);
+    END
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _postgres_index():
+    # Misma expresión que PostgresBackend.vector() para que el planner use el índice
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    vector = (
+        SearchVector("title", weight="A", config="simple")
+        + SearchVector("keywords", weight="B", config="simple")
+        + SearchVector("body", weight="C", config="simple")
+    )
+    return GinIndex(vector, name=GIN_INDEX)
+
+
+def install_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for sql in SQLITE_INSTALL:
+            schema_editor.execute(sql)
+    elif vendor == "postgresql":
+        schema_editor.add_index(apps.get_model("experiences", "ExperienceSearchDocument"), _postgres_index())
+
+
+def uninstall_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for sql in SQLITE_UNINSTALL:
+            schema_editor.execute(sql)
+    elif vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("experiences", "ExperienceSearchDocument"), _postgres_index())
+
+
+def _normalize(text):
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def populate_documents(apps, schema_editor):
+    Experience = apps.get_model("experiences", "Experience")
+    ExperienceSearchDocument = apps.get_model("experiences", "ExperienceSearchDocument")
+
+    rows = Experience.objects.values(
+        "id", "title", "tags", "category__name", "location", "guide__username", "description",
+    )
+    ExperienceSearchDocument.objects.bulk_create(
+        [
+            ExperienceSearchDocument(
+                experience_id=row["id"],
+                title=_normalize(row["title"]),
+                keywords=_normalize(f"{row['tags']} {row['category__name'] or ''}"),
+                body=_normalize(f"{row['location']} {row['guide__username']} {row['description']}"),
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0004_experience_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExperienceSearchDocument',
+            fields=[
+                ('experience', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='experiences.experience')),
+                ('title', models.TextField(blank=True)),
+                ('keywords', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
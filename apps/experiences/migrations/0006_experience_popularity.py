@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:13
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_popularity(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    Experience = apps.get_model("experiences", "Experience")
+
+    counts = (
+        Booking.objects.filter(status__in=["pending", "accepted"])
+        .values_list("experience_id")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    for experience_id, total in counts:
+        Experience.objects.filter(pk=experience_id).update(popularity=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0005_experiencesearchdocument'),
+        ('bookings', '0013_bookingdailystat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experience',
+            name='popularity',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='experience',
+            index=models.Index(fields=['-popularity', '-created_at', '-id'], name='experience_popularity_idx'),
+        ),
+        migrations.RunPython(populate_popularity, migrations.RunPython.noop),
+    ]
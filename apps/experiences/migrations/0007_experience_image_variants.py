@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0006_experience_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experience',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='experience',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='experience',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
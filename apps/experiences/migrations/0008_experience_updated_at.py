@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:31
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    Experience = apps.get_model("experiences", "Experience")
+    Experience.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0007_experience_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experience',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
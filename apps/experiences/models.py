@@ -13,6 +13,23 @@ class Category(models.Model):
         return self.name
 
 
+class ExperienceQuerySet(models.QuerySet):
+    # Columnas que pinta components/experience_card.html (+ claves de orden del catálogo)
+    CARD_FIELDS = (
+        "id", "title", "image", "image_width", "image_height", "image_variants", "location", "duration_minutes", "price",
+        "created_at", "updated_at", "popularity", "guide_id",
+        "guide__id", "guide__username", "guide__first_name", "guide__last_name", "guide__role",
+        "guide__guide_profile__id", "guide__guide_profile__avatar",
+        "guide__guide_profile__avatar_width", "guide__guide_profile__avatar_height",
+        "guide__guide_profile__avatar_variants",
+        "guide__guide_profile__verification_status",
+    )
+
+    def for_cards(self):
+        """Todo lo que necesita la tarjeta de experiencia en una sola query (sin N+1)."""
+        return self.select_related("guide", "guide__guide_profile").only(*self.CARD_FIELDS)
+
+
 class Experience(models.Model):
     guide = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -36,6 +53,10 @@ class Experience(models.Model):
     max_people = models.PositiveIntegerField(default=1)
     location = models.CharField(max_length=255)
     image = models.ImageField( upload_to="experiences/", blank=True, null=True,)
+    # Dimensiones y derivados responsive de `image` (ver core/images.py)
+    image_width = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    image_height = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    image_variants = models.JSONField(default=list, blank=True, editable=False)
 
 
     # NUEVO: keywords/tags para búsquedas
@@ -47,6 +68,14 @@ class Experience(models.Model):
 
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Versión de la tarjeta en el fragment cache (components/experience_card.html)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Reservas PENDING/ACCEPTED (ponderadas por antigüedad si hay decay).
+    # Se mantiene desde las señales de Booking (ver experiences/popularity.py)
+    popularity = models.FloatField(default=0, editable=False)
+
+    objects = ExperienceQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
@@ -54,7 +83,38 @@ class Experience(models.Model):
             models.Index(fields=["is_active"]),
             models.Index(fields=["price"]),
             models.Index(fields=["duration_minutes"]),
+            models.Index(fields=["-popularity", "-created_at", "-id"], name="experience_popularity_idx"),
         ]
 
     def __str__(self):
         return f"{self.title} - {self.guide.username}"
+
+    def save(self, *args, **kwargs):
+        # popularity la mantienen las señales con UPDATE atómicos: un save()
+        # normal (p. ej. editar la experiencia) no debe pisarla con un valor viejo
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != "popularity"
+            ]
+        super().save(*args, **kwargs)
+
+
+class ExperienceSearchDocument(models.Model):
+    """
+    Texto de búsqueda normalizado (minúsculas, sin acentos) de una experiencia.
+    Lo indexa el backend de búsqueda (FTS5 en SQLite, GIN en Postgres).
+    Se mantiene desde las señales de Experience/Category (ver search.py).
+    """
+    experience = models.OneToOneField(
+        Experience,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    title = models.TextField(blank=True)
+    keywords = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"Search document - {self.experience_id}"
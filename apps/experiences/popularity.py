@@ -0,0 +1,105 @@
+"""
+Experience.popularity: reservas PENDING/ACCEPTED de cada experiencia.
+
+- Se actualiza de forma incremental desde las señales de Booking (+peso al
+  entrar en PENDING/ACCEPTED, -peso al salir). El peso sumado se guarda en
+  Booking.popularity_weight y es el que se resta: con decay, el peso de hoy
+  es menor que el que se sumó y restarlo dejaría la popularidad inflada.
+- Con settings.EXPERIENCE_POPULARITY_HALF_LIFE_DAYS cada reserva pesa
+  0.5 ** (antigüedad / vida media): las recientes cuentan más. El comando
+  refresh_popularity recalcula los pesos periódicamente (y repara desvíos).
+  Sin vida media cada reserva pesa 1 (= el antiguo Count).
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from .models import Experience
+
+
+HALF_LIFE_DAYS = getattr(settings, "EXPERIENCE_POPULARITY_HALF_LIFE_DAYS", None)
+
+
+def booking_weight(created_at: datetime, now: datetime, half_life_days: float | None) -> float:
+    if not half_life_days:
+        return 1.0
+    age_days = max((now - created_at).total_seconds(), 0) / 86400
+    return 0.5 ** (age_days / half_life_days)
+
+
+def apply_popularity_change(booking: Booking, old: tuple | None, new: tuple | None) -> None:
+    """
+    old / new son Booking.popularity_key: (experience_id, created_at) o None.
+    Se llama dentro de la transacción de Booking.save()/delete(), con la fila
+    de la reserva todavía en BD (post_save / pre_delete).
+    """
+    if old == new:
+        return
+
+    rows = Booking.objects.filter(pk=booking.pk)
+    weight = 0.0
+
+    if old is not None:
+        # El peso guardado en BD: la instancia puede venir desfasada o sin el campo (only())
+        added = Coalesce(Subquery(rows.values("popularity_weight")[:1]), Value(0.0))
+        Experience.objects.filter(pk=old[0]).update(
+            popularity=Greatest(F("popularity") - added, Value(0.0)),
+        )
+
+    if new is not None:
+        experience_id, created_at = new
+        weight = booking_weight(created_at, timezone.now(), HALF_LIFE_DAYS)
+        Experience.objects.filter(pk=experience_id).update(popularity=F("popularity") + weight)
+
+    # UPDATE directo: no vuelve a disparar las señales de guardado
+    rows.update(popularity_weight=weight)
+    booking.popularity_weight = weight
+
+
+def refresh_popularity(half_life_days: float | None = HALF_LIFE_DAYS) -> int:
+    """
+    Recalcula la popularidad de todas las experiencias (con decay si hay vida
+    media) y el peso guardado de cada reserva. Devuelve cuántas experiencias
+    cambiaron.
+    """
+    active = Booking.objects.filter(status__in=Booking.POPULAR_STATUSES)
+    weights: list[Booking] = []
+
+    if half_life_days:
+        now = timezone.now()
+        scores: dict[int, float] = {}
+        rows = active.values_list("pk", "experience_id", "created_at", "popularity_weight")
+        for pk, experience_id, created_at, stored in rows.iterator():
+            weight = booking_weight(created_at, now, half_life_days)
+            scores[experience_id] = scores.get(experience_id, 0.0) + weight
+            if abs(stored - weight) > 1e-9:
+                weights.append(Booking(pk=pk, popularity_weight=weight))
+    else:
+        scores = dict(
+            active.values_list("experience_id")
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+
+    changed = []
+    for experience in Experience.objects.only("id", "popularity").iterator():
+        score = float(scores.get(experience.pk, 0.0))
+        if abs(experience.popularity - score) > 1e-9:
+            experience.popularity = score
+            changed.append(experience)
+
+    with transaction.atomic():
+        Experience.objects.bulk_update(changed, ["popularity"], batch_size=500)
+        if half_life_days:
+            Booking.objects.bulk_update(weights, ["popularity_weight"], batch_size=500)
+        else:
+            active.exclude(popularity_weight=1).update(popularity_weight=1)
+        Booking.objects.exclude(status__in=Booking.POPULAR_STATUSES).exclude(popularity_weight=0).update(
+            popularity_weight=0,
+        )
+    return len(changed)
@@ -0,0 +1,181 @@
+"""
+Búsqueda de texto completo del catálogo.
+
+Cada experiencia tiene un ExperienceSearchDocument con el texto ya normalizado
+(minúsculas, sin acentos) en tres secciones con distinto peso:
+- title:    título
+- keywords: tags + categoría
+- body:     ubicación + guía + descripción
+
+El backend decide cómo se indexa y se consulta ese documento:
+- "sqlite": tabla virtual FTS5 (external content + triggers), ranking bm25
+- "postgres": SearchVector + índice GIN, ranking SearchRank
+- "basic": icontains sobre el documento (sin ranking), siempre disponible
+
+settings.EXPERIENCE_SEARCH_BACKEND = "auto" | "sqlite" | "postgres" | "basic"
+("auto" elige según el motor de la base de datos).
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Experience, ExperienceSearchDocument
+
+
+FTS_TABLE = "experiences_search_fts"
+GIN_INDEX = "experiences_search_gin"
+
+# Pesos por sección (title, keywords, body)
+SQLITE_WEIGHTS = (10.0, 5.0, 1.0)
+POSTGRES_WEIGHTS = ("A", "B", "C")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas y sin diacríticos: "Gastronomía" -> "gastronomia"."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(query: str) -> list[str]:
+    return re.findall(r"\w+", normalize(query))
+
+
+def build_document(experience: Experience) -> ExperienceSearchDocument:
+    """`experience` debe traer guide y category (select_related)."""
+    category = experience.category.name if experience.category_id else ""
+    return ExperienceSearchDocument(
+        experience_id=experience.pk,
+        title=normalize(experience.title),
+        keywords=normalize(f"{experience.tags} {category}"),
+        body=normalize(f"{experience.location} {experience.guide.username} {experience.description}"),
+    )
+
+
+def index_experiences(experience_ids) -> int:
+    """(Re)escribe los documentos de esas experiencias. Devuelve cuántos."""
+    experiences = Experience.objects.filter(pk__in=list(experience_ids)).select_related("guide", "category")
+    documents = [build_document(experience) for experience in experiences]
+    ExperienceSearchDocument.objects.bulk_create(
+        documents,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["experience"],
+        update_fields=["title", "keywords", "body"],
+    )
+    return len(documents)
+
+
+def rebuild_index() -> int:
+    """Regenera todos los documentos (y el índice del backend)."""
+    ExperienceSearchDocument.objects.all().delete()
+    total = 0
+    ids = list(Experience.objects.values_list("pk", flat=True))
+    for start in range(0, len(ids), 500):
+        total += index_experiences(ids[start:start + 500])
+    get_backend().optimize()
+    return total
+
+
+class BasicBackend:
+    """Sin índice: icontains sobre el texto normalizado. Sin ranking."""
+
+    def search(self, queryset: QuerySet, tokens: list[str]) -> QuerySet:
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(search_document__title__contains=token)
+                | Q(search_document__keywords__contains=token)
+                | Q(search_document__body__contains=token)
+            )
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def optimize(self) -> None:
+        pass
+
+
+class SQLiteFTS5Backend:
+    """
+    FTS5 sobre ExperienceSearchDocument (content=..., sincronizado por triggers).
+    unicode61 + remove_diacritics: "timanfaya" encuentra "Timanfaya".
+    """
+
+    def _match_expression(self, tokens: list[str]) -> str:
+        # Prefijo por término y AND implícito: "volcan" encuentra "volcanes"
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def search(self, queryset: QuerySet, tokens: list[str]) -> QuerySet:
+        match = self._match_expression(tokens)
+        weights = ", ".join(str(w) for w in SQLITE_WEIGHTS)
+        table = Experience._meta.db_table
+
+        matching = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        # bm25: más negativo = más relevante -> lo invertimos para ordenar desc
+        rank = RawSQL(
+            f"(SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id)",
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matching).annotate(search_rank=rank)
+
+    def optimize(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+class PostgresBackend:
+    """SearchVector ponderado + índice GIN sobre la misma expresión (ver migración)."""
+
+    @staticmethod
+    def vector(prefix: str = "search_document__"):
+        from django.contrib.postgres.search import SearchVector
+
+        title_weight, keywords_weight, body_weight = POSTGRES_WEIGHTS
+        return (
+            SearchVector(f"{prefix}title", weight=title_weight, config="simple")
+            + SearchVector(f"{prefix}keywords", weight=keywords_weight, config="simple")
+            + SearchVector(f"{prefix}body", weight=body_weight, config="simple")
+        )
+
+    def search(self, queryset: QuerySet, tokens: list[str]) -> QuerySet:
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        # Prefijo por término: "volcan:* & timanfaya:*"
+        query = SearchQuery(" & ".join(f"{token}:*" for token in tokens), config="simple", search_type="raw")
+        vector = self.vector()
+        return (
+            queryset.annotate(search_vector=vector)
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F("search_vector"), query))
+        )
+
+    def optimize(self) -> None:
+        pass
+
+
+BACKENDS = {
+    "basic": BasicBackend,
+    "sqlite": SQLiteFTS5Backend,
+    "postgres": PostgresBackend,
+}
+
+
+def get_backend():
+    name = getattr(settings, "EXPERIENCE_SEARCH_BACKEND", "auto")
+    if name == "auto":
+        name = {"sqlite": "sqlite", "postgresql": "postgres"}.get(connection.vendor, "basic")
+    return BACKENDS[name]()
+
+
+def search_experiences(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Filtra `queryset` (de Experience) por `query` y anota `search_rank`
+    (mayor = más relevante). Sin términos útiles devuelve el queryset tal cual.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+    return get_backend().search(queryset, tokens)
@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.accounts.models import User
+from apps.bookings.models import Booking
+from apps.profiles.models import GuideProfile
+from core.images import build_variants, prepare_upload
+from .caching import bump_catalogue_generation
+from .models import Category, Experience
+from .popularity import apply_popularity_change
+from .search import index_experiences
+
+
+@receiver(pre_save, sender=Experience)
+def prepare_experience_image(sender, instance: Experience, **kwargs):
+    prepare_upload(instance, "image")
+
+
+@receiver(post_save, sender=Experience)
+def build_experience_image_variants(sender, instance: Experience, **kwargs):
+    build_variants(instance, "image")
+
+
+@receiver(post_save, sender=Experience)
+def index_experience_on_save(sender, instance: Experience, **kwargs):
+    index_experiences([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def index_category_experiences_on_save(sender, instance: Category, created, **kwargs):
+    # El nombre de la categoría forma parte del documento de sus experiencias
+    if not created:
+        index_experiences(instance.experiences.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_experiences(sender, instance: Category, **kwargs):
+    instance._experience_ids = list(instance.experiences.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def index_category_experiences_on_delete(sender, instance: Category, **kwargs):
+    # SET_NULL no dispara señales de Experience
+    index_experiences(getattr(instance, "_experience_ids", []))
+
+
+@receiver(post_save, sender=Experience)
+@receiver(post_delete, sender=Experience)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=GuideProfile)
+def invalidate_catalogue(sender, **kwargs):
+    # Tras el commit: antes, otra petición podría cachear datos aún sin confirmar
+    # con la generación nueva (o los viejos si hay rollback)
+    transaction.on_commit(bump_catalogue_generation)
+
+
+@receiver(post_save, sender=GuideProfile)
+def invalidate_catalogue_on_guide_profile_change(sender, instance: GuideProfile, created, **kwargs):
+    # Verificación y avatar se ven en el catálogo; el resto del perfil no le afecta.
+    # Sin foto (instancia nueva o cargada con only()) se invalida por si acaso
+    current = instance.catalogue_fields()
+    if created or getattr(instance, "_saved_catalogue_fields", None) != current:
+        transaction.on_commit(bump_catalogue_generation)
+    instance._saved_catalogue_fields = current
+
+
+@receiver(post_save, sender=User)
+def invalidate_catalogue_on_guide_name_change(sender, instance: User, created, **kwargs):
+    # Las tarjetas muestran el nombre del guía (los fragmentos de la home van por generación).
+    # Un guía recién creado aún no tiene experiencias
+    if created or not instance.is_guide():
+        return
+    saved = getattr(instance, "_saved_catalogue_fields", None)
+    current = instance.catalogue_fields()
+    if saved != current:
+        transaction.on_commit(bump_catalogue_generation)
+    # El username va en el documento de búsqueda de sus experiencias
+    if saved is None or saved[0] != current[0]:
+        index_experiences(instance.experiences.values_list("pk", flat=True))
+    instance._saved_catalogue_fields = current
+
+
+# La foto previa (_saved_keys) la toma el pre_save de bookings.signals
+@receiver(post_save, sender=Booking)
+def update_popularity_on_save(sender, instance: Booking, **kwargs):
+    new = instance.popularity_key
+    apply_popularity_change(instance, instance._saved_keys["popularity_key"], new)
+    instance._saved_keys["popularity_key"] = new
+
+
+@receiver(pre_delete, sender=Booking)
+def update_popularity_on_delete(sender, instance: Booking, **kwargs):
+    # pre_delete (ya dentro de la transacción del delete): el peso guardado sigue en BD
+    apply_popularity_change(instance, instance.saved_key("popularity_key"), None)
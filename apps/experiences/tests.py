@@ -1,3 +1,747 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from core.images import variant_name
+from core.testing import create_booking, create_experience, create_guide, create_traveler
+
+from apps.accounts.models import User
+from apps.availability.models import ExperienceAvailability
+from apps.bookings.models import Booking
+from apps.profiles.models import GuideProfile
+from apps.reviews.models import Review
+from .caching import catalogue_generation
+from .facets import count_facets, facet_signature
+from .models import Category, Experience
+from .popularity import refresh_popularity
+from .search import search_experiences
+from .views import SORT_ORDERINGS
+
+
+class ExperienceSearchTests(TestCase):
+    """Búsqueda de texto completo: sin acentos, por prefijo y ordenada por relevancia."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide()
+        cls.food = Category.objects.create(name="Gastronomía", slug="gastronomia")
+
+        cls.volcano = create_experience(cls.guide, title="Ruta por Timanfaya", description="Volcanes y lava.")
+        cls.mention = create_experience(
+            cls.guide, title="Paseo por la costa", description="Vistas lejanas de Timanfaya.",
+        )
+        cls.tasting = create_experience(
+            cls.guide, title="Cata de vinos", description="Bodegas de La Geria.", category=cls.food,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _search(self, query):
+        return list(search_experiences(Experience.objects.all(), query).order_by("-search_rank"))
+
+    def test_accent_insensitive(self):
+        self.assertEqual(self._search("gastronomia"), [self.tasting])
+        self.assertEqual(self._search("GASTRONOMÍA"), [self.tasting])
+
+    def test_prefix_match(self):
+        self.assertEqual(self._search("volcan"), [self.volcano])
+
+    def test_title_ranks_above_description(self):
+        self.assertEqual(self._search("timanfaya"), [self.volcano, self.mention])
+
+    def test_category_rename_reindexes(self):
+        self.food.name = "Enoturismo"
+        self.food.save()
+
+        self.assertEqual(self._search("enoturismo"), [self.tasting])
+        self.assertEqual(self._search("gastronomia"), [])
+
+    def test_experience_update_reindexes(self):
+        self.mention.title = "Paseo por Famara"
+        self.mention.save()
+
+        self.assertEqual(self._search("famara"), [self.mention])
+
+    def test_guide_username_change_reindexes(self):
+        self.guide.username = "lanzarote_trails"
+        self.guide.save()
+
+        self.assertEqual(len(self._search("lanzarote_trails")), 3)
+        self.assertEqual(self._search("guide"), [])
+
+    def test_list_view_orders_by_relevance(self):
+        response = self.client.get(reverse("experiences:list"), {"q": "timanfaya"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["experiences"]), [self.volcano, self.mention])
+
+    def test_relevance_without_terms_falls_back_to_recent(self):
+        # Solo signos: no hay términos, ni filtro ni search_rank
+        for url_name in ("experiences:list", "experiences:list_page"):
+            with self.subTest(url_name=url_name):
+                response = self.client.get(reverse(url_name), {"q": "!!!", "sort": "relevance"})
+                self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse("experiences:list"), {"q": "!!!"})
+        self.assertEqual(list(response.context["experiences"]), [self.tasting, self.mention, self.volcano])
+
+        self.client.force_login(self.guide)
+        response = self.client.get(reverse("experiences:mine"), {"q": "¿?", "sort": "relevance"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["experiences"]), 3)
+
+
+@mock.patch("apps.experiences.views.CATALOGUE_PAGE_SIZE", 3)
+class CataloguePaginationTests(TestCase):
+    """Paginación por cursor: recorrer todas las páginas da el listado completo, sin huecos ni repetidos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide()
+        # Empates a propósito en precio, duración y fecha de creación
+        for i in range(8):
+            create_experience(
+                cls.guide,
+                title=f"Ruta volcanes {i}",
+                description="Lava",
+                price=[30, 50][i % 2],
+                duration_minutes=[60, 120, 180][i % 3],
+            )
+        Experience.objects.filter(pk__lte=Experience.objects.order_by("pk")[3].pk).update(created_at=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_sort_walks_the_whole_catalogue(self):
+        from core.pagination import paginate_keyset
+        from .views import _sort_experiences
+
+        for sort in SORT_ORDERINGS:
+            with self.subTest(sort=sort):
+                q = "volcanes" if sort == "relevance" else ""
+                base = Experience.objects.all()
+                if q:
+                    base = search_experiences(base, q)
+                experiences, ordering = _sort_experiences(base, sort, q)
+                expected = list(experiences.order_by(*ordering).values_list("pk", flat=True))
+
+                seen, cursor = [], None
+                while True:
+                    page = paginate_keyset(experiences, ordering, cursor, page_size=3)
+                    seen.extend(e.pk for e in page.items)
+                    if not page.has_next:
+                        break
+                    cursor = page.next_cursor
+
+                self.assertEqual(seen, expected)
+                self.assertEqual(len(seen), 8)
+
+    def test_fragment_endpoint(self):
+        response = self.client.get(reverse("experiences:list"), {"sort": "price_asc"})
+        self.assertEqual(len(response.context["experiences"]), 3)
+
+        total = 3
+        next_url = response.context["next_fragment_url"]
+        while next_url:
+            data = self.client.get(next_url).json()
+            total += data["html"].count('data-animate="fade-up"')
+            next_url = data["next_fragment_url"]
+        self.assertEqual(total, 8)
+
+    def test_invalid_cursor_serves_first_page(self):
+        response = self.client.get(reverse("experiences:list"), {"cursor": "not-a-cursor"})
+        self.assertEqual(len(response.context["experiences"]), 3)
+
+        response = self.client.get(reverse("experiences:list"), {"cursor": "WyJ4IiwieSJd"})
+        self.assertEqual(response.status_code, 200)
+
+
+class PopularityTests(TestCase):
+    """Experience.popularity sigue a las reservas PENDING/ACCEPTED sin recontar."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide(verified=False)
+        cls.traveler = create_traveler()
+
+    def setUp(self):
+        self.experience = create_experience(self.guide)
+
+    def _book(self, status=Booking.Status.PENDING):
+        return create_booking(self.experience, self.traveler, date=timezone.localdate(), status=status)
+
+    def _popularity(self):
+        self.experience.refresh_from_db(fields=["popularity"])
+        return self.experience.popularity
+
+    def test_status_transitions(self):
+        booking = self._book()
+        self._book(Booking.Status.ACCEPTED)
+        self._book(Booking.Status.REJECTED)
+        self.assertEqual(self._popularity(), 2)
+
+        booking.status = Booking.Status.ACCEPTED
+        booking.save(update_fields=["status"])
+        self.assertEqual(self._popularity(), 2)
+
+        booking.status = Booking.Status.CANCELED
+        booking.save(update_fields=["status"])
+        self.assertEqual(self._popularity(), 1)
+
+        Booking.objects.filter(status=Booking.Status.ACCEPTED).get().delete()
+        self.assertEqual(self._popularity(), 0)
+
+    def test_editing_experience_keeps_popularity(self):
+        stale = Experience.objects.get(pk=self.experience.pk)
+        self._book()
+
+        stale.title = "Timanfaya al atardecer"
+        stale.save()
+        self.assertEqual(self._popularity(), 1)
+
+    def test_refresh_with_decay(self):
+        old = self._book()
+        self._book()
+        Booking.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=30))
+
+        refresh_popularity(half_life_days=30)
+        self.assertAlmostEqual(self._popularity(), 1.5, places=3)
+        self.assertAlmostEqual(Booking.objects.get(pk=old.pk).popularity_weight, 0.5, places=3)
+
+        refresh_popularity(half_life_days=None)
+        self.assertEqual(self._popularity(), 2)
+        self.assertEqual(Booking.objects.get(pk=old.pk).popularity_weight, 1)
+
+    def test_removal_subtracts_the_weight_that_was_added(self):
+        with mock.patch("apps.experiences.popularity.HALF_LIFE_DAYS", 30):
+            booking = self._book()
+            self._book(Booking.Status.REJECTED)
+            self.assertAlmostEqual(self._popularity(), 1.0, places=3)
+
+            # Se cancela una vida media después: hoy pesaría 0.5, pero se sumó 1
+            Booking.objects.filter(pk=booking.pk).update(created_at=timezone.now() - timedelta(days=30))
+            booking = Booking.objects.get(pk=booking.pk)
+            booking.status = Booking.Status.CANCELED
+            booking.save(update_fields=["status"])
+
+        self.assertEqual(self._popularity(), 0)
+        self.assertEqual(set(Booking.objects.values_list("popularity_weight", flat=True)), {0})
+
+
+class ExperienceListQueryTests(TestCase):
+    """experience_list pinta las tarjetas con guía y perfil en la misma query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            guide = create_guide(f"guide{i}")
+            for j in range(2):
+                create_experience(guide, title=f"Experiencia {i}-{j}", description="Lanzarote")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_query_count(self):
+        # tarjetas + categorías + facetas
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("experiences:list"))
+        self.assertEqual(len(response.context["experiences"]), 6)
+        self.assertContains(response, "Guía verificado", count=6)
+
+    def test_popular_sort_query_count(self):
+        with self.assertNumQueries(3):
+            self.client.get(reverse("experiences:list"), {"sort": "popular"})
+
+
+class ResponsiveImageTests(TestCase):
+    """Derivados WebP/JPEG, EXIF eliminado y dimensiones guardadas al subir."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide(verified=False)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    @staticmethod
+    def _jpeg(width=1000, height=600, **save_kwargs):
+        buffer = BytesIO()
+        Image.new("RGB", (width, height), "orange").save(buffer, "JPEG", **save_kwargs)
+        return SimpleUploadedFile("foto.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+    def _experience(self, image):
+        return create_experience(self.guide, image=image)
+
+    def test_upload_strips_exif_and_builds_variants(self):
+        exif = Image.Exif()
+        exif[0x010F] = "Camara"  # Make
+        exif[0x0112] = 6         # Orientation: girada 90º
+        experience = self._experience(self._jpeg(exif=exif.tobytes()))
+        experience.refresh_from_db()
+
+        # La rotación EXIF se aplica a los píxeles
+        self.assertEqual((experience.image_width, experience.image_height), (600, 1000))
+        self.assertEqual(experience.image_variants, [320])
+
+        with default_storage.open(experience.image.name) as fh, Image.open(fh) as img:
+            self.assertEqual(len(img.getexif()), 0)
+        for ext, image_format in (("webp", "WEBP"), ("jpg", "JPEG")):
+            with default_storage.open(variant_name(experience.image.name, 320, ext)) as fh, Image.open(fh) as img:
+                self.assertEqual(img.format, image_format)
+                self.assertEqual(img.size, (320, 533))
+                self.assertEqual(len(img.getexif()), 0)
+
+    def test_template_tag(self):
+        experience = self._experience(self._jpeg())
+        html = Template(
+            '{% load image_tags %}{% responsive_image exp.image sizes="50vw" alt="Foto" loading="lazy" %}'
+        ).render(Context({"exp": experience}))
+
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn("variants/foto.jpg-320w.webp 320w, ", html)
+        self.assertIn("variants/foto.jpg-960w.jpg 960w", html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('width="1000"', html)
+        self.assertIn('height="600"', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_same_stem_different_extension_keeps_its_variants(self):
+        buffer = BytesIO()
+        Image.new("RGB", (700, 400), "blue").save(buffer, "PNG")
+        jpeg = self._experience(self._jpeg())
+        png = self._experience(SimpleUploadedFile("foto.png", buffer.getvalue(), content_type="image/png"))
+
+        self.assertNotEqual(variant_name(jpeg.image.name, 320, "webp"), variant_name(png.image.name, 320, "webp"))
+        for experience, size in ((jpeg, (320, 192)), (png, (320, 183))):
+            with default_storage.open(variant_name(experience.image.name, 320, "webp")) as fh, Image.open(fh) as img:
+                self.assertEqual(img.size, size)
+
+    def test_template_tag_without_variants(self):
+        experience = self._experience(self._jpeg())
+        Experience.objects.filter(pk=experience.pk).update(image_variants=[], image_width=None, image_height=None)
+        experience.refresh_from_db()
+        html = Template("{% load image_tags %}{% responsive_image exp.image %}").render(Context({"exp": experience}))
+
+        self.assertNotIn("<picture>", html)
+        self.assertIn(f'src="{experience.image.url}"', html)
+
+    def test_backfill_command(self):
+        first = self._experience(self._jpeg())
+        second = self._experience(self._jpeg(width=200, height=100))
+        Experience.objects.update(image_variants=[], image_width=None, image_height=None)
+        default_storage.delete(variant_name(first.image.name, 640, "webp"))
+
+        for workers in ("1", "2"):
+            with self.subTest(workers=workers):
+                out = StringIO()
+                call_command("build_image_variants", "--workers", workers, "--force", stdout=out)
+                self.assertIn("Built variants for 2 images", out.getvalue())
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image_variants, [320, 640, 960])
+        self.assertEqual((second.image_width, second.image_height), (200, 100))
+        # Más pequeña que todos los anchos: un derivado a su tamaño, sin ampliar
+        self.assertEqual(second.image_variants, [200])
+        self.assertTrue(default_storage.exists(variant_name(first.image.name, 640, "webp")))
+
+
+class CatalogueFacetTests(TestCase):
+    """Recuentos por categoría, precio y duración en una query, cacheados por filtros."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide()
+        cls.food = Category.objects.create(name="Gastronomía", slug="gastronomia")
+        cls.nature = Category.objects.create(name="Naturaleza", slug="naturaleza")
+        Category.objects.create(name="Buceo", slug="buceo")
+
+        for title, category, price, duration in (
+            ("Cata de vinos", cls.food, 25, 90),
+            ("Ruta de tapas", cls.food, 45, 180),
+            ("Timanfaya", cls.nature, 80, 240),
+            ("Volcanes al atardecer", cls.nature, 120, 300),
+            ("Paseo libre", None, 10, 45),
+        ):
+            create_experience(
+                cls.guide,
+                category=category,
+                title=title,
+                description="Lanzarote",
+                price=price,
+                duration_minutes=duration,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def _facets(self, **filters):
+        response = self.client.get(reverse("experiences:list"), filters)
+        return {
+            title: {link["label"]: link["count"] for link in links}
+            for title, links in response.context["facet_groups"]
+        }
+
+    def test_counts_without_filters(self):
+        facets = self._facets()
+        self.assertEqual(facets["Categoría"], {"Buceo": 0, "Gastronomía": 2, "Naturaleza": 2})
+        self.assertEqual(
+            facets["Precio"],
+            {"Menos de 30 €": 2, "30 – 60 €": 1, "60 – 100 €": 1, "Más de 100 €": 1},
+        )
+        self.assertEqual(facets["Duración"], {"Hasta 1 h": 1, "Hasta 2 h": 2, "Hasta 4 h": 4, "Hasta 8 h": 5})
+
+    def test_each_facet_ignores_its_own_filter(self):
+        facets = self._facets(category="gastronomia", max_duration="120")
+        # Categorías: solo filtra la duración
+        self.assertEqual(facets["Categoría"], {"Buceo": 0, "Gastronomía": 1, "Naturaleza": 0})
+        # Precio: categoría + duración
+        self.assertEqual(facets["Precio"]["Menos de 30 €"], 1)
+        self.assertEqual(facets["Precio"]["30 – 60 €"], 0)
+        # Duración: solo la categoría
+        self.assertEqual(facets["Duración"], {"Hasta 1 h": 0, "Hasta 2 h": 1, "Hasta 4 h": 2, "Hasta 8 h": 2})
+
+    def test_search_narrows_facets(self):
+        facets = self._facets(q="timanfaya")
+        self.assertEqual(facets["Categoría"]["Naturaleza"], 1)
+        self.assertEqual(facets["Categoría"]["Gastronomía"], 0)
+
+    def test_price_link_matches_band(self):
+        response = self.client.get(reverse("experiences:list"))
+        link = dict(response.context["facet_groups"])["Precio"][1]
+        self.assertIn("min_price=30", link["url"])
+        self.assertIn("max_price=59.99", link["url"])
+
+        response = self.client.get(link["url"])
+        self.assertEqual([e.title for e in response.context["experiences"]], ["Ruta de tapas"])
+        selected = dict(response.context["facet_groups"])["Precio"][1]
+        self.assertTrue(selected["selected"])
+        self.assertNotIn("min_price", selected["url"])
+
+    def test_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            count_facets(Experience.objects.all(), {"min_price": "20", "category": "naturaleza"})
+
+    def test_cached_by_normalized_signature(self):
+        self.client.get(reverse("experiences:list"), {"q": "Volcán", "min_price": "20"})
+        # Mismos filtros escritos distinto, otro orden y cursor: facetas desde cache
+        with self.assertNumQueries(2):
+            self.client.get(
+                reverse("experiences:list"),
+                {"q": " volcan", "min_price": "20.00", "sort": "price_asc", "cursor": "x"},
+            )
+        self.assertEqual(
+            facet_signature({"q": "Volcán", "min_price": "20"}),
+            facet_signature({"q": "volcan ", "min_price": "20.0"}),
+        )
+
+        self.assertNotEqual(
+            facet_signature({"q": "volcan"}),
+            facet_signature({"q": "volcan", "category": "naturaleza"}),
+        )
+
+    def test_availability_filter_is_not_cached(self):
+        date = timezone.localdate() + timedelta(days=7)
+        timanfaya = Experience.objects.get(title="Timanfaya")
+        ExperienceAvailability.objects.create(experience=timanfaya, daily_capacity_bookings=1)
+        params = {"date": date.isoformat(), "people": "2"}
+        self.assertEqual(self._facets(**params)["Categoría"]["Naturaleza"], 2)
+
+        # Aceptar una reserva llena el día sin tocar la generación del catálogo
+        create_booking(timanfaya, create_traveler(), date=date, status=Booking.Status.ACCEPTED)
+        self.assertEqual(self._facets(**params)["Categoría"]["Naturaleza"], 1)
+        self.assertEqual(self._facets()["Categoría"]["Naturaleza"], 2)
+
+
+class CatalogueCacheTests(TestCase):
+    """IDs de cada página cacheados por firma de filtros e invalidados por generación."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide()
+        cls.profile = GuideProfile.objects.get(user=cls.guide)
+        cls.category = Category.objects.create(name="Naturaleza", slug="naturaleza")
+        for i in range(3):
+            cls._experience(f"Ruta por Timanfaya {i}")
+
+    @classmethod
+    def _experience(cls, title):
+        return create_experience(cls.guide, category=cls.category, title=title)
+
+    def setUp(self):
+        cache.clear()
+
+    def _titles(self, **params):
+        response = self.client.get(reverse("experiences:list"), params)
+        return [experience.title for experience in response.context["experiences"]]
+
+    def test_hit_hydrates_cards_in_one_query(self):
+        first = self._titles(q="Volcán", sort="price_asc")
+        # Misma búsqueda escrita distinto: IDs desde cache + una query por PK + categorías
+        with self.assertNumQueries(2):
+            second = self._titles(q="volcan ", sort="price_asc")
+        self.assertEqual(first, second)
+        self.assertEqual(len(second), 3)
+
+    def test_next_page_from_cache(self):
+        with mock.patch("apps.experiences.views.CATALOGUE_PAGE_SIZE", 2):
+            data = self.client.get(reverse("experiences:list_page")).json()
+            with self.assertNumQueries(1):
+                cached = self.client.get(reverse("experiences:list_page")).json()
+        self.assertEqual(data, cached)
+        self.assertTrue(cached["has_next"])
+
+    def test_experience_changes_invalidate(self):
+        self._titles()
+        with self.captureOnCommitCallbacks(execute=True):
+            new = self._experience("Cueva de los Verdes")
+        self.assertIn(new.title, self._titles())
+
+        new.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            new.save()
+        self.assertNotIn(new.title, self._titles())
+
+    def test_invalidation_waits_for_the_commit(self):
+        generation = catalogue_generation()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self._experience("Cueva de los Verdes")
+        # Dentro de la transacción la cache sigue sirviendo la generación confirmada
+        self.assertEqual(catalogue_generation(), generation)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(catalogue_generation(), generation)
+
+    def test_category_changes_invalidate(self):
+        self.assertEqual(len(self._titles(category="naturaleza")), 3)
+        self.category.slug = "volcanes"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        self.assertEqual(self._titles(category="naturaleza"), [])
+
+    def test_verification_status_changes_invalidate(self):
+        self.assertEqual(len(self._titles()), 3)
+
+        # Otros campos del perfil no invalidan
+        profile = GuideProfile.objects.get(pk=self.profile.pk)
+        generation = catalogue_generation()
+        profile.bio = "Guía de volcanes"
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(catalogue_generation(), generation)
+
+        profile.verification_status = GuideProfile.VerificationStatus.REJECTED
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(self._titles(), [])
+
+    def test_availability_filter_is_not_cached(self):
+        with mock.patch("apps.experiences.views.cached_page") as cached_page:
+            self._titles(date="2030-01-01")
+        cached_page.assert_not_called()
+
+    def test_home_featured(self):
+        self.client.get(reverse("pages:home"))
+        # Fragmento de la home en cache: ni siquiera se hidratan las tarjetas
+        with self.assertNumQueries(0):
+            self.client.get(reverse("pages:home"))
+        cache.delete(make_template_fragment_key("home_featured", [catalogue_generation(), "anonymous"]))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("pages:home"))
+        self.assertEqual(len(response.context["featured_experiences"]), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._experience("Cueva de los Verdes")
+        response = self.client.get(reverse("pages:home"))
+        self.assertEqual(response.context["featured_experiences"][0].title, "Cueva de los Verdes")
+
+
+class FragmentCacheTests(TestCase):
+    """Tarjetas versionadas por updated_at; secciones de la home por generación."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide()
+        cls.experience = create_experience(cls.guide, title="Ruta por Timanfaya")
+
+    def setUp(self):
+        cache.clear()
+
+    def _list(self):
+        return self.client.get(reverse("experiences:list")).content.decode()
+
+    def test_card_is_versioned_by_updated_at(self):
+        self.assertIn("50.00 €", self._list())
+
+        # Sin tocar updated_at (UPDATE directo) la tarjeta sale de cache
+        Experience.objects.filter(pk=self.experience.pk).update(price=60)
+        self.assertIn("50.00 €", self._list())
+
+        experience = Experience.objects.get(pk=self.experience.pk)
+        experience.save()
+        self.assertIn("60.00 €", self._list())
+
+    def test_guide_changes_refresh_the_card(self):
+        self.assertIn("Guía verificado", self._list())
+        profile = GuideProfile.objects.get(user=self.guide)
+        profile.verification_status = GuideProfile.VerificationStatus.PENDING
+        profile.save()
+        self.assertNotIn("Guía verificado", self.client.get(reverse("pages:home")).content.decode())
+
+    def test_username_refreshes_the_card_of_a_guide_without_full_name(self):
+        self._list()
+
+        guide = User.objects.get(pk=self.guide.pk)
+        guide.username = "ana_lanzarote"
+        with self.captureOnCommitCallbacks(execute=True):
+            guide.save()
+        self.assertIn("ana_lanzarote", self._list())
+
+    def test_guide_name_and_avatar_refresh_the_home(self):
+        self.assertContains(self.client.get(reverse("pages:home")), "guide")
+
+        guide = User.objects.get(pk=self.guide.pk)
+        guide.first_name, guide.last_name = "Ana", "Pérez"
+        with self.captureOnCommitCallbacks(execute=True):
+            guide.save()
+        self.assertContains(self.client.get(reverse("pages:home")), "Ana Pérez")
+
+        generation = catalogue_generation()
+        profile = GuideProfile.objects.get(user=self.guide)
+        profile.avatar = "guides/avatars/ana.jpg"
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertNotEqual(catalogue_generation(), generation)
+
+    def test_unrelated_user_and_profile_saves_keep_the_generation(self):
+        generation = catalogue_generation()
+        guide = User.objects.get(pk=self.guide.pk)
+        guide.last_login = timezone.now()
+        profile = GuideProfile.objects.get(user=self.guide)
+        profile.bio = "Guía de volcanes"
+        with self.captureOnCommitCallbacks(execute=True):
+            guide.save(update_fields=["last_login"])
+            profile.save()
+            User.objects.create_user("traveler")
+        self.assertEqual(catalogue_generation(), generation)
+
+    def test_owner_buttons_are_not_cached(self):
+        edit_url = reverse("experiences:edit", args=[self.experience.pk])
+        self.client.force_login(self.guide)
+        self.assertIn(edit_url, self.client.get(reverse("pages:home")).content.decode())
+        self.client.logout()
+        self.assertNotIn(edit_url, self.client.get(reverse("pages:home")).content.decode())
+        self.assertNotIn(edit_url, self._list())
+
+    def test_home_sections_follow_the_generation(self):
+        self.client.get(reverse("pages:home"))
+        with self.captureOnCommitCallbacks(execute=True):
+            create_experience(self.guide, title="Cueva de los Verdes", description="Lava", price=30, duration_minutes=60)
+        self.assertContains(self.client.get(reverse("pages:home")), "Cueva de los Verdes")
+
+    def test_cached_template_loader(self):
+        from django.template import engines
+        from django.template.loaders.cached import Loader
+
+        self.assertIsInstance(engines["django"].engine.template_loaders[0], Loader)
+
+
+class MyExperiencesTests(TestCase):
+    """Listado "mis experiencias" del guía: mismos filtros que el catálogo, sin facetas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide()
+        cls.volcano = create_experience(cls.guide, title="Ruta por Timanfaya")
+        cls.tasting = create_experience(cls.guide, title="Cata de vinos", description="Bodegas", price=25)
+        create_experience(create_guide("other"), title="Ruta por Famara")
+
+    def setUp(self):
+        self.client.force_login(self.guide)
+
+    def _titles(self, **params):
+        response = self.client.get(reverse("experiences:mine"), params)
+        self.assertEqual(response.status_code, 200)
+        return [experience.title for experience in response.context["experiences"]]
+
+    def test_lists_only_own_experiences(self):
+        self.assertEqual(self._titles(), ["Cata de vinos", "Ruta por Timanfaya"])
+
+    def test_filters(self):
+        self.assertEqual(self._titles(q="timanfaya"), ["Ruta por Timanfaya"])
+        self.assertEqual(self._titles(max_price="30", sort="price_asc"), ["Cata de vinos"])
+
+    def test_next_page(self):
+        with mock.patch("apps.experiences.views.CATALOGUE_PAGE_SIZE", 1):
+            data = self.client.get(reverse("experiences:mine_page")).json()
+        self.assertTrue(data["has_next"])
+
+
+class SeedLoadDatasetTests(TestCase):
+    def _seed(self, prefix, seed=7):
+        call_command(
+            "seed_load_dataset",
+            "--guides", 3,
+            "--travelers", 10,
+            "--experiences-per-guide", 2,
+            "--bookings", 60,
+            "--review-rate", 1,
+            "--seed", seed,
+            "--anchor-date", "2026-06-01",
+            "--prefix", prefix,
+            stdout=StringIO(),
+        )
+        return list(
+            Booking.objects.filter(traveler__username__startswith=f"{prefix}_")
+            .order_by("id")
+            .values_list("date", "status", "adults", "children", "total_price")
+        )
+
+    def test_volumes_profiles_and_statuses(self):
+        self._seed("load")
+
+        self.assertEqual(User.objects.filter(role=User.Role.GUIDE).count(), 3)
+        self.assertEqual(
+            GuideProfile.objects.filter(verification_status=GuideProfile.VerificationStatus.VERIFIED).count(),
+            3,
+        )
+        self.assertEqual(User.objects.filter(role=User.Role.TRAVELER, traveler_profile__isnull=False).count(), 10)
+        self.assertEqual(Experience.objects.count(), 6)
+        self.assertEqual(
+            set(Booking.objects.values_list("status", flat=True).distinct()),
+            set(Booking.Status.values),
+        )
+        # Reseñas solo de reservas aceptadas ya pasadas, una por (experiencia, viajero)
+        reviews = Review.objects.select_related("booking")
+        self.assertTrue(reviews.exists())
+        for review in reviews:
+            self.assertEqual(review.booking.status, Booking.Status.ACCEPTED)
+            self.assertLess(review.booking.date, timezone.localdate(review.created_at))
+
+    def test_same_seed_same_dataset(self):
+        self.assertEqual(self._seed("load_a"), self._seed("load_b"))
+        self.assertNotEqual(self._seed("load_c", seed=8), self._seed("load_d"))
+
+    def test_existing_prefix_is_rejected(self):
+        self._seed("load")
+        with self.assertRaises(CommandError):
+            self._seed("load")
@@ -5,7 +5,9 @@ app_name = "experiences"
 
 urlpatterns = [
     path("", views.experience_list, name="list"),
+    path("page/", views.experience_list_page, name="list_page"),
     path("mine/", views.my_experiences, name="mine"),    
+    path("mine/page/", views.my_experiences_page, name="mine_page"),
     path("new/", views.experience_create, name="create"),
     path("<int:pk>/", views.experience_detail, name="detail"),
     path("<int:pk>/edit/", views.experience_edit, name="edit"),
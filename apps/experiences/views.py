@@ -1,11 +1,22 @@
+from decimal import Decimal
+
+from django.conf import settings
 from django.contrib import messages
-from django.db.models import Q, Count
+from django.db.models import Count
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.dateparse import parse_date
 
 from core.decorators import guide_required
-from apps.bookings.models import Booking
+from core.pagination import paginate_keyset
+from apps.availability.services import filter_available_on
+from .caching import cached_page, catalogue_key
+from .facets import DURATION_LIMITS, PRICE_BANDS, catalogue_facets, facet_conditions, facet_signature
 from .forms import ExperienceForm
 from .models import Category, Experience
+from .search import search_experiences, tokenize
 from apps.reviews.models import Review 
 
 from django.db.models import Avg, Count
@@ -13,119 +24,234 @@ from apps.reviews.models import Review
 from apps.reviews.services import traveler_can_review
 
 
-def experience_list(request):
+# Orden total por sort: el último campo (id) desempata para el cursor
+SORT_ORDERINGS = {
+    "recent": ("-created_at", "-id"),
+    "price_asc": ("price", "-created_at", "-id"),
+    "price_desc": ("-price", "-created_at", "-id"),
+    "duration_asc": ("duration_minutes", "-created_at", "-id"),
+    "duration_desc": ("-duration_minutes", "-created_at", "-id"),
+    "popular": ("-popularity", "-created_at", "-id"),
+    "relevance": ("-search_rank", "-created_at", "-id"),
+}
+
+CATALOGUE_PAGE_SIZE = getattr(settings, "EXPERIENCE_LIST_PAGE_SIZE", 12)
+
+
+def _sort_experiences(experiences, sort, q):
+    """Devuelve (queryset, ordering) para `sort`. "popular" usa la columna indexada popularity."""
+    if sort == "relevance" and not tokenize(q):
+        # Sin términos de búsqueda (vacía o solo signos) no hay search_rank: las más recientes
+        sort = "recent"
+
+    return experiences, SORT_ORDERINGS.get(sort, SORT_ORDERINGS["recent"])
+
+
+def _page_url(request, url_name, cursor):
+    params = request.GET.copy()
+    params["cursor"] = cursor
+    return f"{reverse(url_name)}?{params.urlencode()}"
+
+
+def _page_json(request, page, url_name, fragment_url_name):
+    """Fragmento para scroll infinito: HTML de las tarjetas + siguiente cursor."""
+    html = render_to_string(
+        "components/experience_grid_items.html",
+        {"experiences": page.items},
+        request=request,
+    )
+    return JsonResponse({
+        "html": html,
+        "has_next": page.has_next,
+        "next_cursor": page.next_cursor,
+        "next_page_url": _page_url(request, url_name, page.next_cursor) if page.has_next else None,
+        "next_fragment_url": _page_url(request, fragment_url_name, page.next_cursor) if page.has_next else None,
+    })
+
+
+def _public_filters(request) -> dict:
+    # "relevance" (por defecto): por ranking si hay búsqueda, si no las más recientes
+    filters = {
+        key: request.GET.get(key, "").strip()
+        for key in ("q", "category", "min_price", "max_price", "max_duration", "date", "people")
+    }
+    filters["sort"] = request.GET.get("sort", "relevance").strip()
+    return filters
+
+
+def _public_base(filters):
+    """Catálogo público con búsqueda y disponibilidad, sin los filtros facetados."""
     # Público: solo experiencias activas de guías verificados
     experiences = (
         Experience.objects.filter(
             is_active=True,
             guide__guide_profile__verification_status="verified",
         )
-        .select_related("guide", "category")
+        .for_cards()
     )
 
-    categories = Category.objects.all()
+    if filters["q"]:
+        # Texto completo (FTS5 / Postgres) sin acentos, anota search_rank
+        experiences = search_experiences(experiences, filters["q"])
 
-    # Filtros por querystring
-    q = request.GET.get("q", "").strip()
-    category_slug = request.GET.get("category", "").strip()
-    min_price = request.GET.get("min_price", "").strip()
-    max_price = request.GET.get("max_price", "").strip()
-    max_duration = request.GET.get("max_duration", "").strip()
-    sort = request.GET.get("sort", "recent").strip()
-    # ¿Hay filtros activos? (para cambiar el empty state)
-    has_filters = any([q, category_slug, min_price, max_price, max_duration, sort != "recent"])
-
-    if q:
-        experiences = experiences.filter(
-            Q(title__icontains=q)
-            | Q(description__icontains=q)
-            | Q(location__icontains=q)
-            | Q(tags__icontains=q)
-            | Q(guide__username__icontains=q)
-            | Q(category__name__icontains=q)
-        )
-
-    if category_slug:
-        experiences = experiences.filter(category__slug=category_slug)
-
-    if min_price:
+    # Disponibilidad: con plaza para N personas ese día (en conjunto, no por experiencia)
+    if filters["date"]:
         try:
-            experiences = experiences.filter(price__gte=float(min_price))
+            available_on = parse_date(filters["date"])
+            people_count = int(filters["people"]) if filters["people"] else 1
         except ValueError:
-            pass
+            available_on = None
+        if available_on:
+            experiences = filter_available_on(experiences, available_on, people_count)
 
-    if max_price:
-        try:
-            experiences = experiences.filter(price__lte=float(max_price))
-        except ValueError:
-            pass
+    return experiences
 
-    if max_duration:
-        try:
-            experiences = experiences.filter(duration_minutes__lte=int(max_duration))
-        except ValueError:
-            pass
 
-    # Ordenación
-    if sort == "price_asc":
-        experiences = experiences.order_by("price", "-created_at")
-    elif sort == "price_desc":
-        experiences = experiences.order_by("-price", "-created_at")
-    elif sort == "duration_asc":
-        experiences = experiences.order_by("duration_minutes", "-created_at")
-    elif sort == "duration_desc":
-        experiences = experiences.order_by("-duration_minutes", "-created_at")
-    elif sort == "popular":
-        experiences = experiences.annotate(
-            bookings_count=Count(
-                "bookings",
-                filter=Q(bookings__status__in=[Booking.Status.PENDING, Booking.Status.ACCEPTED]),
-            )
-        ).order_by("-bookings_count", "-created_at")
-    else:
-        experiences = experiences.order_by("-created_at")
+def _public_catalogue(request):
+    """Catálogo público filtrado por querystring. Devuelve (queryset, ordering, filters, has_filters)."""
+    filters = _public_filters(request)
+    # ¿Hay filtros activos? (para cambiar el empty state)
+    has_filters = any([
+        filters["q"], filters["category"], filters["min_price"], filters["max_price"],
+        filters["max_duration"], filters["date"], filters["sort"] not in ("relevance", "recent"),
+    ])
+
+    # Categoría, precio y duración (los mismos Q que cuentan las facetas)
+    experiences = _public_base(filters)
+    for condition in facet_conditions(filters).values():
+        experiences = experiences.filter(condition)
+
+    # Ordenación (la aplica el paginador por cursor)
+    experiences, ordering = _sort_experiences(experiences, filters["sort"], filters["q"])
+    return experiences, ordering, filters, has_filters
+
+
+def _catalogue_page(request):
+    """
+    Página del catálogo público: (page, filters, has_filters). Los IDs de cada
+    página se cachean por firma de filtros + orden + cursor (ver caching.py).
+    """
+    experiences, ordering, filters, has_filters = _public_catalogue(request)
+    cursor = request.GET.get("cursor")
+
+    def paginate():
+        return paginate_keyset(experiences, ordering, cursor, CATALOGUE_PAGE_SIZE)
+
+    if filters["date"]:
+        # La disponibilidad cambia con cada reserva: sin cache
+        return paginate(), filters, has_filters
+
+    key = catalogue_key("page", facet_signature(filters), ordering, cursor or "", CATALOGUE_PAGE_SIZE)
+    return cached_page(key, paginate), filters, has_filters
+
+
+def _facet_url(request, **params):
+    """URL del catálogo con `params` cambiados (None = quitar) y sin cursor."""
+    query = request.GET.copy()
+    query.pop("cursor", None)
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return f"{reverse('experiences:list')}?{query.urlencode()}"
+
+
+def _facet_links(request, filters, categories):
+    """Facetas con recuento y enlace (volver a pulsar una faceta activa la quita)."""
+    counts = catalogue_facets(_public_base(filters), filters)
+
+    category_links = []
+    for category in categories:
+        selected = filters["category"] == category.slug
+        category.facet_count = counts["categories"].get(category.slug, 0)
+        category_links.append({
+            "label": category.name,
+            "count": category.facet_count,
+            "selected": selected,
+            "url": _facet_url(request, category=None if selected else category.slug),
+        })
+
+    price_links = []
+    for (low, high), count in zip(PRICE_BANDS, counts["price"]):
+        min_price = str(low) if low else ""
+        max_price = f"{Decimal(high) - Decimal('0.01')}" if high is not None else ""
+        selected = filters["min_price"] == min_price and filters["max_price"] == max_price
+        if high is None:
+            label = f"Más de {low} €"
+        elif not low:
+            label = f"Menos de {high} €"
+        else:
+            label = f"{low} – {high} €"
+        price_links.append({
+            "label": label,
+            "count": count,
+            "selected": selected,
+            "url": _facet_url(
+                request,
+                min_price=None if selected or not min_price else min_price,
+                max_price=None if selected or not max_price else max_price,
+            ),
+        })
+
+    duration_links = []
+    for limit, count in zip(DURATION_LIMITS, counts["duration"]):
+        selected = filters["max_duration"] == str(limit)
+        duration_links.append({
+            "label": f"Hasta {limit // 60} h",
+            "count": count,
+            "selected": selected,
+            "url": _facet_url(request, max_duration=None if selected else str(limit)),
+        })
+
+    return [
+        ("Categoría", category_links),
+        ("Precio", price_links),
+        ("Duración", duration_links),
+    ]
+
+
+def experience_list(request):
+    page, filters, has_filters = _catalogue_page(request)
 
+    categories = list(Category.objects.all())
     context = {
-        "experiences": experiences,
+        "experiences": page.items,
         "categories": categories,
+        "facet_groups": _facet_links(request, filters, categories),
         "has_filters": has_filters,
-        "filters": {
-            "q": q,
-            "category": category_slug,
-            "min_price": min_price,
-            "max_price": max_price,
-            "max_duration": max_duration,
-            "sort": sort,
-        },
+        "filters": filters,
+        "next_page_url": _page_url(request, "experiences:list", page.next_cursor) if page.has_next else None,
+        "next_fragment_url": _page_url(request, "experiences:list_page", page.next_cursor) if page.has_next else None,
     }
     return render(request, "experiences/list.html", context)
 
-@guide_required
-def my_experiences(request):
+
+def experience_list_page(request):
+    """Siguiente página del catálogo en JSON (scroll infinito)."""
+    page, _, _ = _catalogue_page(request)
+    return _page_json(request, page, "experiences:list", "experiences:list_page")
+
+
+def _guide_catalogue(request):
+    """Experiencias del guía filtradas por querystring. Devuelve (queryset, ordering, filters, has_filters)."""
     experiences = (
         Experience.objects.filter(guide=request.user)
-        .select_related("guide", "category")
+        .for_cards()
     )
 
-    categories = Category.objects.all()
-
     # Filtros por querystring
     q = request.GET.get("q", "").strip()
     category_slug = request.GET.get("category", "").strip()
     min_price = request.GET.get("min_price", "").strip()
     max_price = request.GET.get("max_price", "").strip()
     max_duration = request.GET.get("max_duration", "").strip()
-    sort = request.GET.get("sort", "recent").strip()
+    sort = request.GET.get("sort", "relevance").strip()
 
-    has_filters = any([q, category_slug, min_price, max_price, max_duration, sort != "recent"])
+    has_filters = any([q, category_slug, min_price, max_price, max_duration, sort not in ("relevance", "recent")])
 
     if q:
-        experiences = experiences.filter(
-            Q(title__icontains=q)
-            | Q(description__icontains=q)
-            | Q(location__icontains=q)
-            | Q(tags__icontains=q)
-        )
+        experiences = search_experiences(experiences, q)
 
     if category_slug:
         experiences = experiences.filter(category__slug=category_slug)
@@ -148,34 +274,45 @@ def my_experiences(request):
         except ValueError:
             pass
 
-    # Ordenación (igual estilo que list)
-    if sort == "price_asc":
-        experiences = experiences.order_by("price", "-created_at")
-    elif sort == "price_desc":
-        experiences = experiences.order_by("-price", "-created_at")
-    elif sort == "duration_asc":
-        experiences = experiences.order_by("duration_minutes", "-created_at")
-    elif sort == "duration_desc":
-        experiences = experiences.order_by("-duration_minutes", "-created_at")
-    else:
-        experiences = experiences.order_by("-created_at")
+    # Ordenación (igual que el catálogo público)
+    experiences, ordering = _sort_experiences(experiences, sort, q)
+
+    filters = {
+        "q": q,
+        "category": category_slug,
+        "min_price": min_price,
+        "max_price": max_price,
+        "max_duration": max_duration,
+        "sort": sort,
+    }
+    return experiences, ordering, filters, has_filters
 
+
+@guide_required
+def my_experiences(request):
+    experiences, ordering, filters, has_filters = _guide_catalogue(request)
+    page = paginate_keyset(experiences, ordering, request.GET.get("cursor"), CATALOGUE_PAGE_SIZE)
+
+    categories = list(Category.objects.all())
     context = {
-        "experiences": experiences,
+        "experiences": page.items,
         "categories": categories,
         "has_filters": has_filters,
-        "filters": {
-            "q": q,
-            "category": category_slug,
-            "min_price": min_price,
-            "max_price": max_price,
-            "max_duration": max_duration,
-            "sort": sort,
-        },
+        "filters": filters,
+        "next_page_url": _page_url(request, "experiences:mine", page.next_cursor) if page.has_next else None,
+        "next_fragment_url": _page_url(request, "experiences:mine_page", page.next_cursor) if page.has_next else None,
     }
     return render(request, "experiences/my_list.html", context)
 
 
+@guide_required
+def my_experiences_page(request):
+    """Siguiente página de "mis experiencias" en JSON (scroll infinito)."""
+    experiences, ordering, _, _ = _guide_catalogue(request)
+    page = paginate_keyset(experiences, ordering, request.GET.get("cursor"), CATALOGUE_PAGE_SIZE)
+    return _page_json(request, page, "experiences:mine", "experiences:mine_page")
+
+
 @guide_required
 def experience_create(request):
     if request.method == "POST":
@@ -0,0 +1,141 @@
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.bookings.models import Booking
+from apps.experiences.models import Experience
+from apps.experiences.views import SORT_ORDERINGS
+from apps.profiles.models import GuideProfile
+from core.benchmark import Scenario, compare_results, run_benchmark
+
+
+DISABLED_DATES_WINDOWS = (30, 90, 365)
+HELPDESK_QUERY = "cancelación"
+CATALOGUE_QUERY = "volcán"
+
+
+def build_scenarios() -> list[Scenario]:
+    """Escenarios de los endpoints calientes con el guía, viajero y experiencia más cargados."""
+    experience = (
+        Experience.objects.filter(
+            is_active=True,
+            guide__guide_profile__verification_status=GuideProfile.VerificationStatus.VERIFIED,
+        )
+        .order_by("-popularity", "-id")
+        .first()
+    )
+    traveler_id = (
+        Booking.objects.values("traveler_id")
+        .annotate(total=Count("id"))
+        .order_by("-total", "traveler_id")
+        .values_list("traveler_id", flat=True)
+        .first()
+    )
+    if experience is None or traveler_id is None:
+        raise CommandError("Need an active experience of a verified guide and some bookings. Run seed_load_dataset first.")
+
+    guide = experience.guide
+    traveler = User.objects.get(pk=traveler_id)
+    list_url = reverse("experiences:list")
+
+    scenarios = [
+        Scenario(
+            f"experience_list[{sort}]",
+            f"{list_url}?sort={sort}" + (f"&q={CATALOGUE_QUERY}" if sort == "relevance" else ""),
+        )
+        for sort in SORT_ORDERINGS
+    ]
+    scenarios.append(Scenario("experience_detail", reverse("experiences:detail", args=[experience.pk])))
+
+    today = timezone.localdate()
+    disabled_dates_url = reverse("availability:experience_disabled_dates", args=[experience.pk])
+    scenarios += [
+        Scenario(
+            f"experience_disabled_dates[{days}d]",
+            f"{disabled_dates_url}?start={today}&end={today + timedelta(days=days - 1)}&people=2",
+        )
+        for days in DISABLED_DATES_WINDOWS
+    ]
+
+    scenarios += [
+        Scenario("guide_dashboard", reverse("pages:guide_dashboard"), guide),
+        Scenario("traveler_dashboard", reverse("pages:traveler_dashboard"), traveler),
+        Scenario("guide_bookings", reverse("bookings:guide_list"), guide),
+        Scenario("traveler_bookings", reverse("bookings:traveler_list"), traveler),
+        Scenario("helpdesk_search", f"{reverse('helpdesk:helpdesk')}?q={HELPDESK_QUERY}"),
+    ]
+    return scenarios
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot endpoints in-process with the test client against the current database "
+        "(seed it with seed_load_dataset). Records p50/p95 latency, query count and peak allocated "
+        "memory, writes JSON results and optionally compares them with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=30, help="Timed requests per endpoint (default: 30).")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed requests first (default: 3).")
+        parser.add_argument(
+            "--cold-cache",
+            action="store_true",
+            help="Clear the cache before every request (default: measure with a warm cache).",
+        )
+        parser.add_argument("--only", default="", help="Only endpoints whose name contains this text.")
+        parser.add_argument("--output", help="Write the JSON results to this file.")
+        parser.add_argument("--baseline", help="JSON results to compare with; fails on regressions.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed latency/memory increase over the baseline (default: 0.2 = 20%%).",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = json.loads(Path(options["baseline"]).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline: {exc}")
+
+        scenarios = [scenario for scenario in build_scenarios() if options["only"] in scenario.name]
+        if not scenarios:
+            raise CommandError(f"No endpoint matches '{options['only']}'.")
+
+        self.stdout.write(f"{'endpoint':<34} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'mem KB':>9}")
+        results = run_benchmark(
+            scenarios,
+            repeat=options["repeat"],
+            warmup=options["warmup"],
+            cold_cache=options["cold_cache"],
+            progress=self._print_result,
+        )
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2) + "\n")
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = compare_results(results, baseline, tolerance=options["tolerance"])
+            if regressions:
+                for line in regressions:
+                    self.stdout.write(self.style.ERROR(f"  {line}"))
+                raise CommandError(f"{len(regressions)} regressions against {options['baseline']}.")
+            self.stdout.write(f"No regressions against {options['baseline']}.")
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {len(scenarios)} endpoints measured."))
+
+    def _print_result(self, result):
+        duplicates = f"  ({result.duplicate_queries} duplicated)" if result.duplicate_queries else ""
+        self.stdout.write(
+            f"{result.name:<34} {result.status:>6} {result.p50_ms:>9.2f} {result.p95_ms:>9.2f} "
+            f"{result.queries:>8} {result.peak_memory_kb:>9.0f}{duplicates}"
+        )
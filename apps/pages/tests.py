@@ -1,3 +1,311 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.bookings.metrics import guide_booking_kpis, traveler_booking_kpis
+from apps.bookings.models import Booking
+from apps.bookings.rollups import rebuild_rollups
+from apps.experiences.models import Experience
+from core.benchmark import compare_results, percentile
+from core.instrumentation import query_budget
+from core.testing import create_booking, create_experience, create_guide, create_traveler
+
+
+class DashboardKpiTests(TestCase):
+    """
+    Los KPIs de reservas salen de una agregación condicional sobre Booking y de
+    los rollups diarios: el número de queries de cada dashboard no depende de
+    cuántas reservas haya.
+    """
+
+    # sesión + usuario + experiencias + KPIs (estados + rollups) + reseñas
+    # + recientes + badge
+    guide_dashboard_queries = 8
+    # sesión + usuario + KPIs (estados + rollups) + próxima + reseñas + badge
+    # + recientes + categorías + top experiencias (tarjetas con guía y perfil)
+    traveler_dashboard_queries = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide(verified=False)
+        cls.traveler = create_traveler()
+        cls.experience = create_experience(cls.guide)
+
+        date = timezone.localdate() + timedelta(days=10)
+        for status in [
+            Booking.Status.PENDING,
+            Booking.Status.PENDING,
+            Booking.Status.CHANGE_REQUESTED,
+            Booking.Status.CANCEL_REQUESTED,
+            Booking.Status.ACCEPTED,
+            Booking.Status.ACCEPTED,
+            Booking.Status.REJECTED,
+        ]:
+            create_booking(
+                cls.experience,
+                cls.traveler,
+                date=date,
+                adults=2,
+                unit_price=50,
+                total_price=100,
+                status=status,
+                seen_by_guide=status != Booking.Status.REJECTED,
+            )
+
+        # Una reserva antigua: fuera de la ventana de 30 días
+        old = create_booking(
+            cls.experience,
+            cls.traveler,
+            date=date,
+            adults=2,
+            unit_price=50,
+            total_price=100,
+            status=Booking.Status.ACCEPTED,
+        )
+        Booking.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=60),
+        )
+        # update() no pasa por las señales: el backfill recoloca la reserva
+        rebuild_rollups()
+
+    def setUp(self):
+        # El badge de no vistas se cachea: cada test parte de cache vacía
+        cache.clear()
+
+    def test_guide_kpis(self):
+        with self.assertNumQueries(2):
+            kpis = guide_booking_kpis(self.guide)
+
+        self.assertEqual(kpis["bookings_30d"], 7)
+        self.assertEqual(kpis["pending_new"], 2)
+        self.assertEqual(kpis["pending_change"], 1)
+        self.assertEqual(kpis["pending_cancel"], 1)
+        self.assertEqual(kpis["pending"], 4)
+        self.assertEqual(kpis["revenue_30d"], Decimal("200.00"))
+        self.assertEqual(kpis["unseen"], 1)
+
+    def test_traveler_kpis(self):
+        with self.assertNumQueries(2):
+            kpis = traveler_booking_kpis(self.traveler)
+
+        self.assertEqual(kpis["bookings_30d"], 7)
+        self.assertEqual(kpis["accepted"], 3)
+        self.assertEqual(kpis["rejected"], 1)
+        self.assertEqual(kpis["pending"], 2)
+        self.assertEqual(kpis["spent_30d"], Decimal("200.00"))
+
+    def test_guide_trends(self):
+        last_90, last_year = guide_booking_kpis(self.guide)["trends"]
+
+        self.assertEqual(len(last_90["series"]), 13)
+        self.assertEqual(last_90["bookings"], 8)
+        self.assertEqual(last_90["series"][-1]["bookings"], 7)
+        self.assertEqual(last_90["series"][-1]["pct"], 100)
+
+        self.assertEqual(len(last_year["series"]), 12)
+        self.assertEqual(last_year["bookings"], 8)
+        self.assertEqual(last_year["revenue"], Decimal("300.00"))
+        self.assertEqual(sum(point["bookings"] for point in last_year["series"]), 8)
+
+    def test_trend_totals_match_the_series(self):
+        _, last_year = guide_booking_kpis(self.guide)["trends"]
+        # Dentro de los 365 días pero antes del primer mes de la serie
+        before_series = create_booking(self.experience, self.traveler, status=Booking.Status.ACCEPTED, total_price=100)
+        Booking.objects.filter(pk=before_series.pk).update(
+            created_at=timezone.make_aware(
+                datetime.combine(last_year["series"][0]["start"] - timedelta(days=1), time(12)),
+            ),
+        )
+        rebuild_rollups()
+
+        for trend in guide_booking_kpis(self.guide)["trends"]:
+            with self.subTest(days=trend["days"]):
+                self.assertEqual(trend["bookings"], sum(point["bookings"] for point in trend["series"]))
+                self.assertEqual(trend["revenue"], sum(point["revenue"] for point in trend["series"]))
+
+    def test_rollups_follow_status_changes(self):
+        booking = Booking.objects.filter(status=Booking.Status.PENDING).first()
+        booking.status = Booking.Status.ACCEPTED
+        booking.save(update_fields=["status"])
+
+        self.assertEqual(guide_booking_kpis(self.guide)["revenue_30d"], Decimal("300.00"))
+
+        booking.delete()
+        kpis = guide_booking_kpis(self.guide)
+        self.assertEqual(kpis["bookings_30d"], 6)
+        self.assertEqual(kpis["revenue_30d"], Decimal("200.00"))
+
+    def test_kpis_without_bookings(self):
+        other = create_traveler("other")
+        kpis = traveler_booking_kpis(other)
+
+        self.assertEqual(kpis["bookings_30d"], 0)
+        self.assertEqual(kpis["spent_30d"], Decimal("0.00"))
+
+    def test_guide_dashboard_query_count(self):
+        self.client.force_login(self.guide)
+        url = reverse("pages:guide_dashboard")
+
+        with self.assertNumQueries(self.guide_dashboard_queries):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["kpis"]["pending"], 4)
+
+    def test_traveler_dashboard_query_count(self):
+        self.client.force_login(self.traveler)
+        url = reverse("pages:traveler_dashboard")
+
+        with self.assertNumQueries(self.traveler_dashboard_queries):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["kpis"]["accepted"], 3)
+
+
+class ExperienceCardQueryTests(TestCase):
+    """Las tarjetas de experiencia no disparan una query por tarjeta (guía, perfil)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(2):
+            guide = create_guide(f"guide{i}")
+            for j in range(3):
+                create_experience(guide, title=f"Experiencia {i}-{j}", description="Lanzarote")
+        cls.traveler = create_traveler()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_home_view(self):
+        # tarjetas destacadas
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("pages:home"))
+        self.assertEqual(len(response.context["featured_experiences"]), 6)
+        self.assertContains(response, "Guía verificado")
+
+    def test_traveler_dashboard(self):
+        self.client.force_login(self.traveler)
+        # mismas queries que DashboardKpiTests aunque haya 6 tarjetas de 2 guías
+        with self.assertNumQueries(DashboardKpiTests.traveler_dashboard_queries):
+            response = self.client.get(reverse("pages:traveler_dashboard"))
+        self.assertEqual(len(response.context["top_experiences"]), 6)
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide()
+        cls.traveler = create_traveler()
+        create_booking(create_experience(cls.guide), cls.traveler)
+
+    def setUp(self):
+        cache.clear()
+
+    def _result(self, **values):
+        result = {"status": 200, "queries": 5, "p50_ms": 10.0, "p95_ms": 20.0, "peak_memory_kb": 100.0}
+        return {"results": {"home": {**result, **values}}}
+
+    def test_percentile_is_nearest_rank(self):
+        values = [float(v) for v in range(1, 21)]
+        self.assertEqual(percentile(values, 50), 10.0)
+        self.assertEqual(percentile(values, 95), 19.0)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+
+    def test_compare_results(self):
+        baseline = self._result()
+        self.assertEqual(compare_results(self._result(p50_ms=11.5, p95_ms=21.0), baseline), [])
+        self.assertEqual(compare_results({"results": {"other": {}}}, baseline), [])
+
+        regressions = compare_results(
+            self._result(status=500, queries=6, p95_ms=30.0, peak_memory_kb=200.0),
+            baseline,
+        )
+        self.assertEqual(len(regressions), 4)
+        self.assertIn("home: queries 5 -> 6", regressions)
+
+    def test_command_writes_results_and_checks_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "results.json"
+            call_command(
+                "benchmark_endpoints", "--repeat", 2, "--warmup", 0, "--only", "dashboard",
+                "--output", output, stdout=StringIO(),
+            )
+            results = json.loads(output.read_text())
+            self.assertEqual(set(results["results"]), {"guide_dashboard", "traveler_dashboard"})
+            guide_dashboard = results["results"]["guide_dashboard"]
+            self.assertEqual(guide_dashboard["status"], 200)
+            self.assertEqual(guide_dashboard["samples"], 2)
+            self.assertGreater(guide_dashboard["queries"], 0)
+            self.assertGreater(guide_dashboard["peak_memory_kb"], 0)
+
+            # Baseline con menos queries: regresión
+            results["results"]["guide_dashboard"]["queries"] -= 1
+            output.write_text(json.dumps(results))
+            with self.assertRaises(CommandError):
+                call_command(
+                    "benchmark_endpoints", "--repeat", 2, "--warmup", 0, "--only", "guide_dashboard",
+                    "--baseline", output, "--tolerance", 100, stdout=StringIO(),
+                )
+
+
+@override_settings(MIDDLEWARE=["core.instrumentation.QueryInstrumentationMiddleware", *settings.MIDDLEWARE])
+class QueryInstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide(verified=False)
+        for i in range(3):
+            create_experience(cls.guide, title=f"Experiencia {i}", description="Lanzarote")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_logs_view_profile_and_server_timing(self):
+        with self.assertLogs("core.instrumentation", "INFO") as logs:
+            response = self.client.get(reverse("pages:home"))
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "pages:home")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["queries"], 1)
+        self.assertGreater(record["template_ms"], 0)
+        self.assertEqual(record["duplicate_queries"], [])
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="1 queries", tpl;dur=[\d.]+, total;dur=[\d.]+$')
+
+    def test_sampling(self):
+        with mock.patch("core.instrumentation.SAMPLE_RATE", 0), self.assertNoLogs("core.instrumentation"):
+            response = self.client.get(reverse("pages:home"))
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def test_query_budget(self):
+        with query_budget(1) as profile:
+            list(Experience.objects.all())
+        self.assertEqual(profile.count, 1)
+
+        with self.assertRaisesMessage(AssertionError, "2 queries, budget is 1"):
+            with query_budget(1):
+                list(Experience.objects.all())
+                list(User.objects.all())
+
+    def test_query_budget_detects_n_plus_one(self):
+        @query_budget(10)
+        def guides():
+            return [experience.guide.username for experience in Experience.objects.all()]
+
+        with self.assertRaisesMessage(AssertionError, "repeated 3 times (N+1?)"):
+            guides()
+
+        with query_budget(1):
+            [experience.guide.username for experience in Experience.objects.select_related("guide")]
@@ -3,27 +3,37 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 
 from apps.profiles.forms import GuideProfileForm, TravelerProfileForm
-from django.db.models import Count, Q, Sum
 
+from apps.experiences.caching import cached_ids, catalogue_generation, catalogue_key
 from apps.experiences.models import Experience, Category
+from apps.bookings.metrics import guide_booking_kpis, traveler_booking_kpis
 from apps.bookings.models import Booking
 from apps.reviews.models import Review
 
-from decimal import Decimal
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.functional import SimpleLazyObject
 
 
 def home_view(request):
-    featured_experiences = (
-        Experience.objects
-        .filter(is_active=True)
-        .select_related("guide", "category")
-        .order_by("-created_at")[:6]
-    )
+    # IDs cacheados por generación del catálogo: con cache hit, una query por PK.
+    # Perezoso: si el fragmento de la home está en cache no se consulta nada
+    featured_experiences = SimpleLazyObject(lambda: cached_ids(
+        catalogue_key("home_featured"),
+        lambda: Experience.objects.filter(is_active=True).for_cards().order_by("-created_at")[:6],
+    ))
+
+    # Los fragmentos de la home cambian con el catálogo y con quién mira: CTA de
+    # registro (anónimo o no) y botones de dueño en las tarjetas (cada guía)
+    user = request.user
+    if user.is_authenticated and user.is_guide():
+        home_viewer = f"guide:{user.pk}"
+    else:
+        home_viewer = "user" if user.is_authenticated else "anonymous"
 
     return render(request, "pages/home.html", {
         "featured_experiences": featured_experiences,
+        "catalogue_generation": catalogue_generation(),
+        "home_viewer": home_viewer,
     })
 
 
@@ -39,38 +49,15 @@ def guide_dashboard(request):
     if not request.user.is_guide():
         return redirect("pages:dashboard")
 
-    today = timezone.localdate()
-    since = today - timedelta(days=30)
-
-    experiences_qs = Experience.objects.filter(guide=request.user, is_active=True)
-    experiences_count = experiences_qs.count()
-
-    guide_bookings_qs = Booking.objects.filter(experience__guide=request.user)
-
-    bookings_30d = guide_bookings_qs.filter(created_at__date__gte=since).count()
-
-    # Pendientes “de acción” para el guía (NUEVO)
-    pending_new = guide_bookings_qs.filter(status=Booking.Status.PENDING).count()
-    pending_change = guide_bookings_qs.filter(status=Booking.Status.CHANGE_REQUESTED).count()
-    pending_cancel = guide_bookings_qs.filter(status=Booking.Status.CANCEL_REQUESTED).count()
+    experiences_count = Experience.objects.filter(guide=request.user, is_active=True).count()
 
-    pending_total = pending_new + pending_change + pending_cancel
-
-    revenue_30d = (
-        guide_bookings_qs.filter(
-            status=Booking.Status.ACCEPTED,
-            created_at__date__gte=since,
-        )
-        .aggregate(total=Sum("total_price"))["total"]
-        or Decimal("0.00")
-    )
-
-    # “No vistas” por el guía (ya lo tenías)
-    unseen_guide_bookings = guide_bookings_qs.filter(seen_by_guide=False).count()
+    # KPIs de reservas: estados en una query, volumen/ingresos/tendencias desde los rollups diarios
+    booking_kpis = guide_booking_kpis(request.user)
 
     # Reservas recientes: puedes priorizar las que requieren acción arriba (opcional)
     recent_bookings = (
-        guide_bookings_qs.select_related("experience", "traveler")
+        Booking.objects.filter(experience__guide=request.user)
+        .select_related("experience", "traveler")
         .order_by("-created_at")[:8]
     )
 
@@ -81,17 +68,15 @@ def guide_dashboard(request):
 
     kpis = {
         "experiences": experiences_count,
-        "bookings_30d": bookings_30d,
-
-        # Aquí cambiamos pending para que sea “pendientes totales”
-        "pending": pending_total,
+        "bookings_30d": booking_kpis["bookings_30d"],
 
-        # Si quieres mostrar desglose en el template
-        "pending_new": pending_new,
-        "pending_change": pending_change,
-        "pending_cancel": pending_cancel,
+        # Pendientes totales + desglose para el template
+        "pending": booking_kpis["pending"],
+        "pending_new": booking_kpis["pending_new"],
+        "pending_change": booking_kpis["pending_change"],
+        "pending_cancel": booking_kpis["pending_cancel"],
 
-        "revenue_30d": revenue_30d,
+        "revenue_30d": booking_kpis["revenue_30d"],
         "reviews": reviews_total,
     }
 
@@ -100,7 +85,8 @@ def guide_dashboard(request):
         "pages/guide_dashboard.html",
         {
             "kpis": kpis,
-            "unseen_guide_bookings": unseen_guide_bookings,
+            "unseen_guide_bookings": booking_kpis["unseen"],
+            "trends": booking_kpis["trends"],
             "recent_bookings": recent_bookings,
         },
     )
@@ -113,41 +99,22 @@ def traveler_dashboard(request):
         return redirect("pages:dashboard")
 
     today = timezone.localdate()
-    since = today - timedelta(days=30)
 
     categories = Category.objects.all()
 
-    # Top experiencias (por reservas pending+accepted). Si no hay reservas, se ordena por created_at.
+    # Top experiencias (por reservas pending+accepted, columna popularity indexada).
+    # Si no hay reservas, se ordena por created_at.
     top_experiences = (
         Experience.objects.filter(is_active=True)
-        .select_related("guide", "category")
-        .annotate(
-            bookings_count=Count(
-                "bookings",
-                filter=Q(bookings__status__in=[Booking.Status.PENDING, Booking.Status.ACCEPTED]),
-            )
-        )
-        .order_by("-bookings_count", "-created_at")[:6]
+        .for_cards()
+        .order_by("-popularity", "-created_at")[:6]
     )
 
     # Bookings del traveler
     traveler_bookings_qs = Booking.objects.filter(traveler=request.user).select_related("experience", "experience__guide")
 
-    # KPIs
-    bookings_30d = traveler_bookings_qs.filter(created_at__date__gte=since).count()
-    accepted = traveler_bookings_qs.filter(status=Booking.Status.ACCEPTED).count()
-    rejected = traveler_bookings_qs.filter(status=Booking.Status.REJECTED).count()
-    pending = traveler_bookings_qs.filter(status=Booking.Status.PENDING).count()
-
-    spent_30d = (
-        traveler_bookings_qs.filter(
-            status=Booking.Status.ACCEPTED,
-            created_at__date__gte=since,
-        ).aggregate(total=Sum("total_price"))["total"]
-        or Decimal("0.00")
-    )
-
-    unseen_traveler_bookings = traveler_bookings_qs.filter(seen_by_traveler=False).count()
+    # KPIs de reservas (estados + rollups diarios de los últimos 30 días)
+    booking_kpis = traveler_booking_kpis(request.user)
 
     # Próxima reserva (futura) - yo excluiría canceled y rejected
     next_booking = (
@@ -165,11 +132,11 @@ def traveler_dashboard(request):
     ).count()
 
     kpis = {
-        "bookings_30d": bookings_30d,
-        "spent_30d": spent_30d,
-        "accepted": accepted,
-        "rejected": rejected,
-        "pending": pending,
+        "bookings_30d": booking_kpis["bookings_30d"],
+        "spent_30d": booking_kpis["spent_30d"],
+        "accepted": booking_kpis["accepted"],
+        "rejected": booking_kpis["rejected"],
+        "pending": booking_kpis["pending"],
         "reviews": reviews_count,
     }
 
@@ -180,7 +147,7 @@ def traveler_dashboard(request):
             "categories": categories,
             "top_experiences": top_experiences,
             "kpis": kpis,
-            "unseen_traveler_bookings": unseen_traveler_bookings,
+            "unseen_traveler_bookings": booking_kpis["unseen"],
             "next_booking": next_booking,
             "recent_bookings": recent_bookings,
         },
@@ -15,6 +15,7 @@ class GuideProfileAdmin(admin.ModelAdmin):
         ("Datos", {"fields": ("user", "display_name", "bio", "languages", "phone", "instagram", "website")}),
         ("Documentación", {"fields": ("guide_license_document", "insurance_or_registration_document")}),
         ("Verificación", {"fields": ("verification_status", "verification_notes", "verified_at", "verified_by")}),
+        ("Notificaciones", {"fields": ("digest_notifications", "digest_last_sent_at")}),
     )
 
     def save_model(self, request, obj, form, change):
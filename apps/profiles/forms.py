@@ -15,7 +15,11 @@ class GuideProfileForm(forms.ModelForm):
             "avatar",
             "guide_license_document",
             "insurance_or_registration_document",
+            "digest_notifications",
         ]
+        labels = {
+            "digest_notifications": "Resumen de reservas",
+        }
 
 
 class TravelerProfileForm(forms.ModelForm):
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_travelerprofile_city_travelerprofile_country_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guideprofile',
+            name='digest_last_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='guideprofile',
+            name='digest_notifications',
+            field=models.BooleanField(default=False, help_text='Recibir un resumen periódico de reservas en lugar de un email por cada evento.'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_guideprofile_digest_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guideprofile',
+            name='avatar_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='guideprofile',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='guideprofile',
+            name='avatar_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -21,6 +21,10 @@ class GuideProfile(models.Model):
         null=True,
         help_text="Foto de perfil (JPG/PNG)."
     )
+    # Dimensiones y derivados responsive del avatar (ver core/images.py)
+    avatar_width = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    avatar_height = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    avatar_variants = models.JSONField(default=list, blank=True, editable=False)
     
     display_name = models.CharField(max_length=120, blank=True)
     bio = models.TextField(blank=True)
@@ -63,8 +67,30 @@ class GuideProfile(models.Model):
         help_text="Admin/Staff que verificó el perfil.",
     )
 
+    # --- Notificaciones ---
+    digest_notifications = models.BooleanField(
+        default=False,
+        help_text="Recibir un resumen periódico de reservas en lugar de un email por cada evento.",
+    )
+    digest_last_sent_at = models.DateTimeField(blank=True, null=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Lo que el catálogo muestra del perfil: solo listar guías verificados y su
+    # avatar en las tarjetas. Cambiarlos invalida la cache del catálogo
+    CATALOGUE_FIELDS = ("verification_status", "avatar")
+
+    def catalogue_fields(self) -> tuple:
+        return (self.verification_status, self.avatar.name or "")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Foto de los campos del catálogo tal como están en BD
+        if set(cls.CATALOGUE_FIELDS).issubset(field_names):
+            instance._saved_catalogue_fields = instance.catalogue_fields()
+        return instance
+
     def __str__(self):
         return f"GuideProfile({self.user.username})"
 
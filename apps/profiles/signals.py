@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 
 from apps.accounts.models import User
+from core.images import build_variants, prepare_upload
 from .models import GuideProfile, TravelerProfile
 
 
@@ -14,3 +15,13 @@ def create_profile_for_user(sender, instance: User, created: bool, **kwargs):
         GuideProfile.objects.create(user=instance, display_name=instance.username)
     elif instance.role == User.Role.TRAVELER:
         TravelerProfile.objects.create(user=instance, display_name=instance.username)
+
+
+@receiver(pre_save, sender=GuideProfile)
+def prepare_guide_avatar(sender, instance: GuideProfile, **kwargs):
+    prepare_upload(instance, "avatar")
+
+
+@receiver(post_save, sender=GuideProfile)
+def build_guide_avatar_variants(sender, instance: GuideProfile, **kwargs):
+    build_variants(instance, "avatar")
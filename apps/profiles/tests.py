@@ -1,3 +1,19 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import create_experience, create_guide
+
+
+class PublicGuideProfileTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.guide = create_guide()
+        for i in range(4):
+            create_experience(cls.guide, title=f"Experiencia {i}", description="Lanzarote")
+
+    def test_cards_without_n_plus_one(self):
+        url = reverse("profiles:public_guide", args=[self.guide.pk])
+        # guía + perfil + tarjetas + stats de reseñas + reseñas recientes
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context["experiences"]), 4)
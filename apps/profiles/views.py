@@ -13,7 +13,7 @@ def public_guide_profile(request, user_id: int):
 
     experiences = (
         Experience.objects.filter(guide=guide_user, is_active=True)
-        .select_related("guide")
+        .for_cards()
         .order_by("-created_at")
     )
 
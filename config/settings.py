@@ -55,8 +55,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Instrumentación de queries/templates por vista (logs JSON + Server-Timing).
+# Opt-in; en producción conviene muestrear (QUERY_INSTRUMENTATION_SAMPLE_RATE=0.05)
+if env.bool("QUERY_INSTRUMENTATION", default=False):
+    MIDDLEWARE.insert(0, 'core.instrumentation.QueryInstrumentationMiddleware')
+QUERY_INSTRUMENTATION_SAMPLE_RATE = env.float("QUERY_INSTRUMENTATION_SAMPLE_RATE", default=1.0)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.instrumentation': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 ROOT_URLCONF = 'config.urls'
 
+# Sin OPTIONS['loaders'] Django usa el cached loader (parsea cada template una
+# vez por proceso; con DEBUG además recarga al editar). Si algún día se definen
+# loaders a mano, hay que envolverlos en django.template.loaders.cached.Loader
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -69,6 +89,9 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.booking_badges',
             ],
+            'libraries': {
+                'image_tags': 'core.templatetags.image_tags',
+            },
         },
     },
 ]
@@ -87,6 +110,14 @@ DATABASES = {
 }
 
 
+# Cache
+# Contadores, reglas de disponibilidad... se invalidan desde señales: en
+# producción con varios procesos usa una cache compartida (redis://, pymemcache://)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -0,0 +1,162 @@
+"""
+Benchmark HTTP en proceso de los endpoints calientes.
+
+Cada escenario se pide con el test client de Django (pila completa: middleware,
+vista, templates) sobre la base de datos actual, pensada para un dataset de
+carga (`seed_load_dataset`). Por escenario se mide:
+- latencia p50/p95/máx. en ms, sobre `repeat` peticiones tras `warmup`
+- nº de queries y memoria asignada (pico de tracemalloc) en una petición extra
+  instrumentada, para no inflar los tiempos
+
+Los resultados son JSON y se pueden comparar con una baseline guardada
+(compare_results) para detectar regresiones.
+"""
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from .instrumentation import QueryProfile
+
+
+# Por debajo de este margen (ms) una subida de latencia se considera ruido
+LATENCY_NOISE_MS = 2.0
+
+
+@dataclass
+class Scenario:
+    name: str
+    url: str
+    user: object = None
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    url: str
+    status: int
+    samples: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    queries: int
+    peak_memory_kb: float
+    # Queries repetidas (misma SQL, otros parámetros) de la petición instrumentada: pista de N+1
+    duplicate_queries: int = 0
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentil por rango más cercano (sin interpolar: con pocas muestras no inventa valores)."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _request(client, scenario: Scenario, cold_cache: bool):
+    if cold_cache:
+        cache.clear()
+    return client.get(scenario.url)
+
+
+def measure(scenario: Scenario, *, repeat: int = 30, warmup: int = 3, cold_cache: bool = False) -> ScenarioResult:
+    client = Client()
+    if scenario.user is not None:
+        client.force_login(scenario.user)
+
+    for _ in range(warmup):
+        _request(client, scenario, cold_cache)
+
+    timings = []
+    status = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = _request(client, scenario, cold_cache)
+        timings.append((time.perf_counter() - start) * 1000)
+        status = response.status_code
+
+    # Petición instrumentada aparte: tracemalloc y el registro de queries tienen su coste
+    if cold_cache:
+        cache.clear()
+    profile = QueryProfile()
+    tracemalloc.start()
+    try:
+        with profile.capture():
+            client.get(scenario.url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return ScenarioResult(
+        name=scenario.name,
+        url=scenario.url,
+        status=status,
+        samples=len(timings),
+        p50_ms=round(statistics.median(timings), 3),
+        p95_ms=round(percentile(timings, 95), 3),
+        max_ms=round(max(timings), 3),
+        queries=profile.count,
+        peak_memory_kb=round(peak / 1024, 1),
+        duplicate_queries=sum(n - 1 for n in profile.duplicates().values()),
+    )
+
+
+def run_benchmark(scenarios, *, repeat: int = 30, warmup: int = 3, cold_cache: bool = False, progress=None) -> dict:
+    """Mide `scenarios` y devuelve el documento de resultados (serializable a JSON)."""
+    results = {}
+    # El test client usa el host "testserver"
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        for scenario in scenarios:
+            result = measure(scenario, repeat=repeat, warmup=warmup, cold_cache=cold_cache)
+            results[scenario.name] = asdict(result)
+            if progress is not None:
+                progress(result)
+
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "debug": settings.DEBUG,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "repeat": repeat,
+            "warmup": warmup,
+            "cold_cache": cold_cache,
+        },
+        "results": results,
+    }
+
+
+def compare_results(current: dict, baseline: dict, *, tolerance: float = 0.2) -> list[str]:
+    """
+    Regresiones de `current` frente a `baseline` (documentos de run_benchmark):
+    p50/p95 o memoria más de `tolerance` por encima, o cualquier query de más.
+    Los escenarios que solo están en uno de los dos se ignoran.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+
+        if result["status"] != before["status"]:
+            regressions.append(f"{name}: status {before['status']} -> {result['status']}")
+        if result["queries"] > before["queries"]:
+            regressions.append(f"{name}: queries {before['queries']} -> {result['queries']}")
+        for metric in ("p50_ms", "p95_ms"):
+            limit = max(before[metric] * (1 + tolerance), before[metric] + LATENCY_NOISE_MS)
+            if result[metric] > limit:
+                regressions.append(f"{name}: {metric} {before[metric]:.1f} -> {result[metric]:.1f}")
+        if result["peak_memory_kb"] > before["peak_memory_kb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak_memory_kb {before['peak_memory_kb']:.0f} -> {result['peak_memory_kb']:.0f}"
+            )
+    return regressions
@@ -1,4 +1,4 @@
-from apps.bookings.models import Booking
+from apps.bookings.badges import GUIDE, TRAVELER, get_unseen_count
 
 
 def booking_badges(request):
@@ -10,18 +10,13 @@ def booking_badges(request):
         "unseen_guide_bookings": 0,
     }
 
+    # Contadores cacheados por usuario (se invalidan al cambiar sus reservas)
     # Traveler
     if hasattr(request.user, "is_traveler") and request.user.is_traveler():
-        data["unseen_traveler_bookings"] = Booking.objects.filter(
-            traveler=request.user,
-            seen_by_traveler=False,
-        ).count()
+        data["unseen_traveler_bookings"] = get_unseen_count(TRAVELER, request.user.pk)
 
     # Guide
     if hasattr(request.user, "is_guide") and request.user.is_guide():
-        data["unseen_guide_bookings"] = Booking.objects.filter(
-            experience__guide=request.user,
-            seen_by_guide=False,
-        ).count()
+        data["unseen_guide_bookings"] = get_unseen_count(GUIDE, request.user.pk)
 
     return data
@@ -0,0 +1,239 @@
+"""
+Derivados responsive de las imágenes subidas (Experience.image, GuideProfile.avatar).
+
+Convención por campo de imagen `<campo>`:
+- `<campo>_width` / `<campo>_height`: dimensiones del original (ya rotado según EXIF)
+- `<campo>_variants`: anchos generados, p. ej. [320, 640, 960]
+
+Cada ancho tiene una versión WebP y otra JPEG junto al original:
+    experiences/foto.jpg -> experiences/variants/foto.jpg-640w.webp
+                            experiences/variants/foto.jpg-640w.jpg
+El nombre del derivado conserva la extensión del original: foto.jpg y
+foto.png en la misma carpeta no comparten derivados.
+
+Al subir (pre_save) el original se reescribe sin metadatos EXIF (GPS, cámara...)
+y tras guardar (post_save) se generan los derivados. Para la media que ya
+existía: `build_image_variants` (en paralelo con un pool de procesos).
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+# "app_label.Modelo" -> (campo, anchos)
+RESPONSIVE_IMAGES = {
+    "experiences.Experience": ("image", (320, 640, 960, 1280)),
+    # Los avatares se pintan a 36-80 px: 1x/2x/3x
+    "profiles.GuideProfile": ("avatar", (64, 128, 256)),
+}
+
+VARIANT_FORMATS = (("webp", "WEBP"), ("jpg", "JPEG"))
+VARIANT_QUALITY = getattr(settings, "RESPONSIVE_IMAGE_QUALITY", 80)
+ORIGINAL_QUALITY = 90
+
+
+def variant_name(name: str, width: int, ext: str) -> str:
+    directory, filename = os.path.split(name)
+    return f"{directory}/variants/{filename}-{width}w.{ext}"
+
+
+def _open(fileobj) -> Image.Image:
+    """Abre y aplica la orientación EXIF (la rotación pasa a los píxeles)."""
+    with Image.open(fileobj) as img:
+        img.load()
+        return ImageOps.exif_transpose(img)
+
+
+def strip_metadata(fileobj) -> tuple[bytes | None, int, int]:
+    """
+    Reescribe la imagen sin EXIF. Devuelve (bytes, ancho, alto); bytes es None
+    si el formato no se reescribe (GIF animados, formatos raros): se guarda tal cual.
+    """
+    with Image.open(fileobj) as original:
+        image_format = original.format
+        animated = getattr(original, "is_animated", False)
+        icc_profile = original.info.get("icc_profile")
+        original.load()
+        img = ImageOps.exif_transpose(original)
+
+    if animated or image_format not in ("JPEG", "PNG", "WEBP"):
+        return None, *img.size
+
+    buffer = BytesIO()
+    if image_format == "PNG":
+        img.save(buffer, "PNG", optimize=True, icc_profile=icc_profile)
+    else:
+        img.save(buffer, image_format, quality=ORIGINAL_QUALITY, icc_profile=icc_profile)
+    return buffer.getvalue(), *img.size
+
+
+def _encode(img: Image.Image, image_format: str) -> bytes:
+    if image_format == "JPEG" and img.mode != "RGB":
+        # Sin canal alfa en JPEG: fondo blanco
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, "white")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        img = background
+    elif img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+
+    buffer = BytesIO()
+    img.save(buffer, image_format, quality=VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def render_variants(name: str, widths) -> tuple[int, int, list[int]]:
+    """
+    Genera los derivados de `name` (ruta en default_storage) y devuelve
+    (ancho, alto, anchos generados). No toca la base de datos: se puede
+    ejecutar en un proceso aparte.
+    """
+    with default_storage.open(name, "rb") as fh:
+        img = _open(fh)
+
+    width, height = img.size
+    # Nunca se amplía; si es más pequeña que todos los anchos, un derivado a su tamaño
+    targets = sorted(w for w in widths if w <= width) or [width]
+
+    for target in targets:
+        resized = img if target == width else img.resize(
+            (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS,
+        )
+        for ext, image_format in VARIANT_FORMATS:
+            path = variant_name(name, target, ext)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            default_storage.save(path, ContentFile(_encode(resized, image_format)))
+
+    return width, height, targets
+
+
+def prepare_upload(instance, field_name: str) -> None:
+    """
+    pre_save: si hay un fichero nuevo, lo reescribe sin EXIF y guarda sus
+    dimensiones. Marca la instancia para generar los derivados en post_save.
+    """
+    fieldfile = getattr(instance, field_name)
+    if not fieldfile:
+        setattr(instance, f"{field_name}_width", None)
+        setattr(instance, f"{field_name}_height", None)
+        setattr(instance, f"{field_name}_variants", [])
+        return
+    if fieldfile._committed:
+        return
+
+    try:
+        data, width, height = strip_metadata(fieldfile.file)
+    except OSError:
+        # El formulario ya valida con Pillow; si aun así no se puede leer, se guarda tal cual
+        logger.warning("Could not read uploaded image %s", fieldfile.name)
+        return
+    finally:
+        fieldfile.file.seek(0)
+
+    if data is not None:
+        setattr(instance, field_name, ContentFile(data, name=os.path.basename(fieldfile.name)))
+    setattr(instance, f"{field_name}_width", width)
+    setattr(instance, f"{field_name}_height", height)
+    setattr(instance, f"{field_name}_variants", [])
+    instance._pending_variants = field_name
+
+
+def _image_fields(model, field_name: str) -> list[str]:
+    fields = [f"{field_name}_width", f"{field_name}_height", f"{field_name}_variants"]
+    # updated_at es la versión del fragment cache de la tarjeta: los derivados cambian el HTML
+    if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+        fields.append("updated_at")
+    return fields
+
+
+def build_variants(instance, field_name: str) -> None:
+    """post_save: genera los derivados del fichero recién subido."""
+    if getattr(instance, "_pending_variants", None) != field_name:
+        return
+    del instance._pending_variants
+
+    name = getattr(instance, field_name).name
+    _, widths = RESPONSIVE_IMAGES[instance._meta.label]
+    try:
+        width, height, variants = render_variants(name, widths)
+    except OSError:
+        logger.warning("Could not build variants for %s", name)
+        return
+
+    fields = _image_fields(type(instance), field_name)
+    values = dict(zip(fields, (width, height, variants, timezone.now())))
+    # UPDATE directo: no vuelve a disparar las señales de guardado
+    type(instance).objects.filter(pk=instance.pk).update(**values)
+    for attname, value in values.items():
+        setattr(instance, attname, value)
+
+
+def registered_models():
+    """[(modelo, campo, anchos)] de RESPONSIVE_IMAGES."""
+    return [
+        (apps.get_model(label), field_name, widths)
+        for label, (field_name, widths) in RESPONSIVE_IMAGES.items()
+    ]
+
+
+def _render_job(job):
+    # Se ejecuta en los procesos del pool: solo ficheros, nada de BD
+    label, pk, name, widths = job
+    try:
+        return label, pk, render_variants(name, widths)
+    except OSError:
+        return label, pk, None
+
+
+def backfill_variants(*, workers: int | None = None, force: bool = False) -> tuple[int, int]:
+    """
+    Genera los derivados de la media existente en un pool de `workers` procesos
+    (None = uno por CPU, 1 = en este proceso). Sin `force`, solo las filas sin
+    derivados. Devuelve (procesadas, fallidas).
+    """
+    models = {}
+    jobs = []
+    for model, field_name, widths in registered_models():
+        label = model._meta.label
+        models[label] = (model, field_name)
+        rows = model.objects.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+        if not force:
+            rows = rows.filter(**{f"{field_name}_variants": []})
+        jobs += [(label, pk, name, widths) for pk, name in rows.values_list("pk", field_name)]
+
+    if workers == 1 or len(jobs) <= 1:
+        results = [_render_job(job) for job in jobs]
+    else:
+        # Los procesos hijos no deben heredar conexiones abiertas
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            results = list(pool.map(_render_job, jobs, chunksize=8))
+
+    updates = {label: [] for label in models}
+    failed = 0
+    for label, pk, result in results:
+        if result is None:
+            failed += 1
+            continue
+        model, field_name = models[label]
+        values = zip(_image_fields(model, field_name), (*result, timezone.now()))
+        updates[label].append(model(pk=pk, **dict(values)))
+
+    for label, objs in updates.items():
+        model, field_name = models[label]
+        model.objects.bulk_update(objs, _image_fields(model, field_name), batch_size=500)
+
+    return len(results) - failed, failed
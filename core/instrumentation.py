@@ -0,0 +1,191 @@
+"""
+Coste de base de datos y de templates por petición.
+
+- QueryInstrumentationMiddleware (opt-in, ver settings.QUERY_INSTRUMENTATION):
+  por vista registra nº de queries, tiempo de BD, queries repetidas (la misma
+  SQL con otros parámetros N veces: la firma de un N+1) y tiempo de render de
+  templates. Escribe una línea JSON en el logger "core.instrumentation" y la
+  cabecera Server-Timing. Solo mide una fracción de las peticiones
+  (QUERY_INSTRUMENTATION_SAMPLE_RATE).
+- query_budget: context manager / decorador para tests que falla si se pasa
+  de un nº de queries o aparece un N+1.
+
+Las queries lanzadas durante el render cuentan también en el tiempo de
+templates (los QuerySets perezosos se evalúan ahí).
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ContextDecorator, ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends import django as django_backend
+
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = getattr(settings, "QUERY_INSTRUMENTATION_SAMPLE_RATE", 1.0)
+# Veces que se tiene que repetir la misma SQL para considerarla un N+1
+DUPLICATE_THRESHOLD = getattr(settings, "QUERY_INSTRUMENTATION_DUPLICATE_THRESHOLD", 3)
+# Por encima de este tiempo de BD (ms) la línea sale como WARNING
+SLOW_DB_MS = getattr(settings, "QUERY_INSTRUMENTATION_SLOW_MS", 200)
+SERVER_TIMING = getattr(settings, "QUERY_INSTRUMENTATION_SERVER_TIMING", True)
+
+_current_profile = ContextVar("query_profile", default=None)
+
+
+class QueryProfile:
+    """execute_wrapper que acumula las queries (SQL sin parámetros) y su duración."""
+
+    def __init__(self):
+        self.statements = []
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self._render_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - start) * 1000
+            self.statements.append(sql)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def duplicates(self, threshold: int = 2) -> dict[str, int]:
+        """{sql: veces} de las queries repetidas al menos `threshold` veces."""
+        counts = {}
+        for sql in self.statements:
+            counts[sql] = counts.get(sql, 0) + 1
+        return {sql: n for sql, n in counts.items() if n >= threshold}
+
+    def capture(self):
+        """Context manager que registra las queries de todas las conexiones y los renders."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        token = _current_profile.set(self)
+        stack.callback(_current_profile.reset, token)
+        return stack
+
+
+_original_render = django_backend.Template.render
+
+
+def _timed_render(self, context=None, request=None):
+    profile = _current_profile.get()
+    if profile is None:
+        return _original_render(self, context, request)
+
+    # render_to_string dentro de un render no se cuenta dos veces
+    profile._render_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        profile._render_depth -= 1
+        if not profile._render_depth:
+            profile.template_ms += (time.perf_counter() - start) * 1000
+
+
+def install_template_timing() -> None:
+    """Envuelve Template.render del backend de Django (una vez por proceso)."""
+    if django_backend.Template.render is not _timed_render:
+        django_backend.Template.render = _timed_render
+
+
+def _view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "<unresolved>"
+    return match.view_name or match._func_path
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_timing()
+
+    def __call__(self, request):
+        if SAMPLE_RATE < 1 and random.random() >= SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        start = time.perf_counter()
+        with profile.capture():
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        duplicates = profile.duplicates(DUPLICATE_THRESHOLD)
+        record = {
+            "view": _view_name(request),
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": profile.count,
+            "db_ms": round(profile.db_ms, 2),
+            "template_ms": round(profile.template_ms, 2),
+            "total_ms": round(total_ms, 2),
+            "duplicate_queries": [
+                {"sql": sql[:300], "count": n}
+                for sql, n in sorted(duplicates.items(), key=lambda item: -item[1])
+            ],
+        }
+        level = logging.WARNING if duplicates or profile.db_ms > SLOW_DB_MS else logging.INFO
+        logger.log(level, json.dumps(record, ensure_ascii=False), extra={"query_profile": record})
+
+        if SERVER_TIMING:
+            timings = [
+                f'db;dur={profile.db_ms:.1f};desc="{profile.count} queries"',
+                f"tpl;dur={profile.template_ms:.1f}",
+                f"total;dur={total_ms:.1f}",
+            ]
+            if response.has_header("Server-Timing"):
+                timings.insert(0, response["Server-Timing"])
+            response["Server-Timing"] = ", ".join(timings)
+        return response
+
+
+class query_budget(ContextDecorator):
+    """
+    Para tests: falla si el bloque lanza más de `max_queries` queries o repite
+    la misma SQL `duplicates` veces o más (None = no comprobar N+1).
+
+        with query_budget(5):
+            self.client.get(url)
+
+        @query_budget(3, duplicates=2)
+        def test_algo(self): ...
+    """
+
+    def __init__(self, max_queries: int, *, duplicates: int | None = DUPLICATE_THRESHOLD):
+        self.max_queries = max_queries
+        self.duplicate_threshold = duplicates
+
+    def __enter__(self):
+        self.profile = QueryProfile()
+        self._capture = self.profile.capture()
+        self._capture.__enter__()
+        return self.profile
+
+    def __exit__(self, exc_type, exc, tb):
+        self._capture.__exit__(exc_type, exc, tb)
+        if exc_type is not None:
+            return False
+
+        problems = []
+        if self.profile.count > self.max_queries:
+            problems.append(f"{self.profile.count} queries, budget is {self.max_queries}")
+        if self.duplicate_threshold is not None:
+            for sql, n in self.profile.duplicates(self.duplicate_threshold).items():
+                problems.append(f"repeated {n} times (N+1?): {sql}")
+        if problems:
+            listing = "\n".join(f"  {i}. {sql}" for i, sql in enumerate(self.profile.statements, 1))
+            raise AssertionError("; ".join(problems) + f"\nCaptured queries:\n{listing}")
+        return False
@@ -0,0 +1,104 @@
+"""
+Paginación por cursor (keyset).
+
+En vez de OFFSET, cada página filtra "después de la última fila vista" según el
+orden: la página 100 cuesta lo mismo que la 1 y no se saltan ni repiten filas
+si entran datos nuevos mientras se navega.
+
+El orden debe ser total: el último campo tiene que ser único (p. ej. "-id").
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+
+
+DEFAULT_PAGE_SIZE = 24
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str | None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def _parse_ordering(ordering) -> list[tuple[str, bool]]:
+    """["-price", "id"] -> [("price", True), ("id", False)] (True = descendente)."""
+    return [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list | None:
+    """None si el cursor no es válido (se sirve la primera página)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _after(fields: list[tuple[str, bool]], values: list) -> Q:
+    """
+    Filas estrictamente posteriores a `values` en el orden dado:
+    (a > va) OR (a = va AND b > vb) OR ...
+    """
+    condition = Q()
+    equal = {}
+    for (field, descending), value in zip(fields, values):
+        lookup = "lt" if descending else "gt"
+        condition |= Q(**equal, **{f"{field}__{lookup}": value})
+        equal[field] = value
+    return condition
+
+
+def paginate_keyset(
+    queryset: QuerySet,
+    ordering,
+    cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> KeysetPage:
+    """
+    Devuelve la página de `queryset` ordenado por `ordering` que empieza tras
+    `cursor`. Los campos de `ordering` pueden ser anotaciones.
+    """
+    fields = _parse_ordering(ordering)
+    queryset = queryset.order_by(*ordering)
+
+    values = decode_cursor(cursor) if cursor else None
+    if values is not None and len(values) == len(fields):
+        try:
+            queryset = queryset.filter(_after(fields, values))
+        except (ValidationError, ValueError, TypeError):
+            # Cursor manipulado: primera página
+            pass
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, field) for field, _ in fields])
+
+    return KeysetPage(items=items, next_cursor=next_cursor)
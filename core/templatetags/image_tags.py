@@ -0,0 +1,48 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from core.images import variant_name
+
+register = template.Library()
+
+
+def _srcset(name, widths, ext):
+    return ", ".join(f"{default_storage.url(variant_name(name, w, ext))} {w}w" for w in widths)
+
+
+@register.simple_tag
+def responsive_image(fieldfile, sizes="100vw", **attrs):
+    """
+    <picture> con srcset WebP/JPEG, `sizes` y width/height del original
+    (reserva el hueco y evita saltos de layout). Sin derivados todavía:
+    <img> con el original.
+
+        {% responsive_image experience.image sizes="(min-width: 1024px) 33vw, 100vw" alt=experience.title loading="lazy" %}
+
+    El resto de argumentos (alt, class, loading, fetchpriority...) pasan al <img>.
+    """
+    if not fieldfile:
+        return ""
+
+    instance, field_name = fieldfile.instance, fieldfile.field.name
+    width = getattr(instance, f"{field_name}_width", None)
+    height = getattr(instance, f"{field_name}_height", None)
+    variants = getattr(instance, f"{field_name}_variants", None) or []
+
+    img_attrs = {"src": fieldfile.url}
+    if width and height:
+        img_attrs.update(width=width, height=height)
+    img_attrs.setdefault("decoding", "async")
+    img_attrs.update(attrs)
+
+    if not variants:
+        return format_html("<img{}>", flatatt(img_attrs))
+
+    img_attrs.update(srcset=_srcset(fieldfile.name, variants, "jpg"), sizes=sizes)
+    return format_html(
+        '<picture><source type="image/webp"{}><img{}></picture>',
+        flatatt({"srcset": _srcset(fieldfile.name, variants, "webp"), "sizes": sizes}),
+        flatatt(img_attrs),
+    )
@@ -0,0 +1,55 @@
+"""
+Fixtures compartidas por los tests de las apps.
+
+Cada helper crea el objeto con valores por defecto válidos; los tests solo
+pasan los campos que les importan:
+
+    guide = create_guide()
+    experience = create_experience(guide, title="Cueva de los Verdes", price=30)
+    booking = create_booking(experience, create_traveler(), status=Booking.Status.ACCEPTED)
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.bookings.models import Booking
+from apps.experiences.models import Experience
+from apps.profiles.models import GuideProfile
+
+
+def create_guide(username: str = "guide", *, verified: bool = True, **fields) -> User:
+    """Usuario guía; verificado por defecto (solo esos salen en el catálogo)."""
+    guide = User.objects.create_user(username, role=User.Role.GUIDE, **fields)
+    if verified:
+        GuideProfile.objects.filter(user=guide).update(
+            verification_status=GuideProfile.VerificationStatus.VERIFIED,
+        )
+    return guide
+
+
+def create_traveler(username: str = "traveler", **fields) -> User:
+    return User.objects.create_user(username, **fields)
+
+
+def create_experience(guide: User, **fields) -> Experience:
+    values = {
+        "title": "Timanfaya",
+        "description": "Volcanes",
+        "price": 50,
+        "duration_minutes": 120,
+        "max_people": 10,
+        "location": "Lanzarote",
+        **fields,
+    }
+    return Experience.objects.create(guide=guide, **values)
+
+
+def create_booking(experience: Experience, traveler: User, **fields) -> Booking:
+    """Reserva PENDING para dentro de 10 días salvo que se indique otra cosa."""
+    values = {
+        "date": timezone.localdate() + timedelta(days=10),
+        "preferred_language": Booking.Language.ES,
+        **fields,
+    }
+    return Booking.objects.create(experience=experience, traveler=traveler, **values)
@@ -4,7 +4,9 @@
   if (!input || !cfg) return;
 
   const urlBase = cfg.dataset.disabledDatesUrl;
-  if (!urlBase) return;
+  // Calendario mensual con ETag: el navegador revalida y recibe 304 si no cambió
+  const calendarUrl = cfg.dataset.calendarUrl;
+  if (!urlBase && !calendarUrl) return;
 
   if (!window.flatpickr) return;
 
@@ -20,6 +22,17 @@
 
   async function loadDisabledDates(year, month) {
     try {
+      if (calendarUrl) {
+        const monthISO = `${year}-${String(month + 1).padStart(2, "0")}`;
+        const url = `${calendarUrl}?month=${monthISO}&people=${getPeople()}`;
+        const res = await fetch(url, { headers: { "X-Requested-With": "XMLHttpRequest" } });
+        if (!res.ok) throw new Error("Bad response");
+
+        const data = await res.json();
+        disabledSet = new Set((data.days || []).filter((d) => !d.available).map((d) => d.date));
+        return;
+      }
+
       const start = new Date(year, month, 1);
       const end = new Date(year, month + 1, 0);
 
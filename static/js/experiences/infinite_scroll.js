@@ -0,0 +1,54 @@
+(function () {
+  const button = document.querySelector("[data-load-more]");
+  const grid = document.querySelector("[data-experience-grid]");
+  if (!button || !grid || !button.dataset.fragmentUrl) return;
+
+  let loading = false;
+
+  async function loadMore() {
+    const url = button.dataset.fragmentUrl;
+    if (loading || !url) return;
+    loading = true;
+    button.setAttribute("aria-busy", "true");
+
+    try {
+      const res = await fetch(url, { headers: { "X-Requested-With": "XMLHttpRequest" } });
+      if (!res.ok) throw new Error("Bad response");
+      const data = await res.json();
+
+      const tpl = document.createElement("template");
+      tpl.innerHTML = data.html;
+      // Las tarjetas nuevas ya están en pantalla: sin esperar al scroll reveal
+      tpl.content.querySelectorAll("[data-animate]").forEach((el) => el.classList.add("is-in"));
+      grid.appendChild(tpl.content);
+
+      if (data.has_next) {
+        button.dataset.fragmentUrl = data.next_fragment_url;
+        // Si falla el fetch, el enlace navega a la página siguiente completa
+        button.href = data.next_page_url;
+      } else {
+        observer?.disconnect();
+        button.parentElement.remove();
+      }
+    } catch (e) {
+      // Fallback: navegación normal
+      window.location.href = button.href;
+    } finally {
+      loading = false;
+      button.removeAttribute("aria-busy");
+    }
+  }
+
+  button.addEventListener("click", (e) => {
+    e.preventDefault();
+    loadMore();
+  });
+
+  // Scroll infinito: carga al acercarse al final de la lista
+  const observer = "IntersectionObserver" in window
+    ? new IntersectionObserver((entries) => {
+        if (entries.some((entry) => entry.isIntersecting)) loadMore();
+      }, { rootMargin: "400px 0px" })
+    : null;
+  observer?.observe(button);
+})();